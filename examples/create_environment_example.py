@@ -183,9 +183,7 @@ def train_and_evaluate(
     print(f"Agent: {agent}")
 
     agent.train(n_episodes=n_episodes, n_steps=n_steps, progress_bar=True)
-    performance = pd.DataFrame.from_dict(
-        train_env.action_scheme.portfolio.performance, orient="index"
-    )
+    performance = train_env.action_scheme.portfolio.performance.as_frame()
     print("Training performance: \n", performance)
     performance.plot()
 
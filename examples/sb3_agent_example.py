@@ -227,7 +227,7 @@ if __name__ == "__main__":
         # callbacks=[ProgressBarCallback(100)]
     )
 
-    performance = pd.DataFrame.from_dict(env.action_scheme.portfolio.performance, orient="index")
+    performance = env.action_scheme.portfolio.performance.as_frame()
     print(performance)
 
     performance.plot()
@@ -249,9 +249,7 @@ if __name__ == "__main__":
         # callbacks=[ProgressBarCallback(100)]
     )
 
-    performance = pd.DataFrame.from_dict(
-        env_multiple.action_scheme.portfolio.performance, orient="index"
-    )
+    performance = env_multiple.action_scheme.portfolio.performance.as_frame()
     print(performance)
 
     performance.plot()
@@ -0,0 +1,143 @@
+"""
+Compares loading MetaTrader symbol data from a joblib file and from a memory-mapped store.
+
+Synthetic M1 data is generated for a number of forex symbols and saved in both
+formats. Each format is then loaded in a fresh process, which reports the time
+to load and the memory it holds before and after reading every close price.
+Memory-mapped pages are counted as file-backed memory, which is shared between
+the processes mapping the same store, while the unpickled data of a joblib file
+is anonymous memory private to each process.
+
+Usage:
+    python examples/symbol_store_benchmark.py --symbols 28 --rows 1000000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from trade_flow.environments.metatrader.terminal import SymbolInfo
+from trade_flow.environments.metatrader.data.store import save_store, load_store
+
+
+CURRENCIES = ["EUR", "USD", "GBP", "JPY", "CHF", "CAD", "AUD", "NZD"]
+
+
+def memory() -> dict:
+    """Reads the resident memory of the current process, in MiB, from /proc (Linux only)."""
+    usage = {}
+    with open("/proc/self/status") as file:
+        for line in file:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                usage[key] = int(value.split()[0]) / 1024
+    return usage
+
+
+def generate(n_symbols: int, n_rows: int) -> tuple:
+    """Generates random walk OHLCV data at a one minute frequency."""
+    rng = np.random.default_rng(0)
+    pairs = [(a, b) for a in CURRENCIES for b in CURRENCIES if a != b][:n_symbols]
+    index = pd.date_range("2016-01-01", periods=n_rows, freq="min", tz="UTC", name="Time")
+
+    symbols_info, symbols_data = {}, {}
+    for margin, profit in pairs:
+        name = margin + profit
+        symbols_info[name] = SymbolInfo(
+            SimpleNamespace(
+                name=name,
+                path=f"Forex\\{name}",
+                currency_margin=margin,
+                currency_profit=profit,
+                trade_contract_size=100000.0,
+                volume_min=0.01,
+                volume_max=100.0,
+                volume_step=0.01,
+            )
+        )
+        close = np.exp(np.cumsum(rng.normal(0, 1e-4, n_rows)))
+        symbols_data[name] = pd.DataFrame(
+            {
+                "Open": close,
+                "Close": close,
+                "Low": close,
+                "High": close,
+                "Volume": rng.integers(0, 1000, n_rows).astype(np.uint64),
+            },
+            index=index,
+        )
+    return symbols_info, symbols_data
+
+
+def load(fmt: str, path: str) -> dict:
+    """Loads the data in the given format and measures the time and memory it takes."""
+    before = memory()
+    start = time.perf_counter()
+    if fmt == "joblib":
+        with open(path, "rb") as file:
+            _, symbols_data = joblib.load(file)
+    else:
+        _, symbols_data = load_store(path)
+    elapsed = time.perf_counter() - start
+    loaded = memory()
+
+    total = sum(float(df["Close"].to_numpy().sum()) for df in symbols_data.values())
+    touched = memory()
+
+    return {
+        "format": fmt,
+        "load_s": elapsed,
+        "loaded": {k: loaded[k] - before[k] for k in loaded},
+        "touched": {k: touched[k] - before[k] for k in touched},
+        "checksum": total,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=28)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--load", nargs=2, metavar=("FORMAT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.load:
+        print(json.dumps(load(*args.load)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        symbols_info, symbols_data = generate(args.symbols, args.rows)
+        joblib_path = os.path.join(directory, "symbols.joblib")
+        store_path = os.path.join(directory, "symbols")
+        with open(joblib_path, "wb") as file:
+            joblib.dump((symbols_info, symbols_data), file)
+        save_store(store_path, symbols_info, symbols_data)
+        del symbols_info, symbols_data
+
+        print(f"{args.symbols} symbols x {args.rows} rows")
+        for fmt, path in [("joblib", joblib_path), ("store", store_path)]:
+            output = subprocess.run(
+                [sys.executable, __file__, "--load", fmt, path],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"{fmt:>6}: load {result['load_s'] * 1000:9.1f} ms"
+                + "".join(f" | {k} {v:8.1f} MiB" for k, v in result["loaded"].items())
+                + " | after reading closes:"
+                + "".join(f" {k} {v:8.1f} MiB" for k, v in result["touched"].items())
+            )
+
+
+if __name__ == "__main__":
+    main()
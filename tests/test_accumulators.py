@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from trade_flow.feed import DataFeed, Stream
+
+
+DATA = [3.0, 1.0, np.nan, 4.0, 1.5, 0.5, np.nan, 2.0]
+
+
+def make_feed():
+    x = Stream.source(DATA, dtype="float").rename("x")
+    return DataFeed(
+        [
+            x.cumsum().rename("cumsum"),
+            x.cumprod().rename("cumprod"),
+            x.cummin().rename("cummin"),
+            x.cummax().rename("cummax"),
+            x.cummin(skipna=False).rename("cummin_na"),
+            x.cummax(skipna=False).rename("cummax_na"),
+        ]
+    )
+
+
+def run(mode):
+    feed = make_feed()
+    feed.compile(mode)
+    before = [feed.next() for _ in range(5)]
+    feed.reset()
+    after = [feed.next() for _ in range(len(DATA))]
+    return before, after
+
+
+NAMES = ["cumsum", "cumprod", "cummin", "cummax", "cummin_na", "cummax_na"]
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_step_matches_vectorized_across_reset(name):
+    (step_before, step_after), (vec_before, vec_after) = run("step"), run("vectorized")
+
+    np.testing.assert_allclose([v[name] for v in step_before], [v[name] for v in vec_before])
+    np.testing.assert_allclose([v[name] for v in step_after], [v[name] for v in vec_after])
+    np.testing.assert_allclose([v[name] for v in step_after[:5]], [v[name] for v in step_before])
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("stable_baselines3")
+
+import trade_flow.environments.default as default
+from trade_flow.environments.default.actions import BSH, SimpleOrders
+from trade_flow.environments.default.batched import BatchedTradingEnv
+from trade_flow.environments.default.engine.exchanges import Exchange, ExchangeOptions
+from trade_flow.environments.default.engine.execution.simulated import execute_order
+from trade_flow.environments.default.engine.instruments import Instrument
+from trade_flow.environments.default.engine.portfolio import Portfolio
+from trade_flow.environments.default.engine.wallet import Wallet
+from trade_flow.environments.default.rewards import SimpleProfit
+from trade_flow.feed import DataFeed, Stream
+
+
+USD = Instrument("USD", 2, "U.S. Dollar")
+BTC = Instrument("BTC", 8, "Bitcoin")
+ETH = Instrument("ETH", 8, "Ethereum")
+
+
+def make_components(scheme):
+    rng = np.random.RandomState(0)
+    prices = {
+        "USD-BTC": np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.01, 300))), 2),
+        "USD-ETH": np.round(300 * np.exp(np.cumsum(rng.normal(0, 0.02, 300))), 2),
+    }
+    if scheme == "bsh":
+        del prices["USD-ETH"]
+
+    streams = [Stream.source(list(v), dtype="float").rename(k) for k, v in prices.items()]
+    options = ExchangeOptions(commission=0.0025)
+    exchange = Exchange("exchange", service=execute_order, options=options)(*streams)
+    cash = Wallet(exchange, 10000 * USD)
+    btc = Wallet(exchange, 0 * BTC)
+    wallets = [cash, btc] if scheme == "bsh" else [cash, btc, Wallet(exchange, 2 * ETH)]
+
+    feed = DataFeed(
+        [s.log().diff().rename("lr:" + s.name) for s in streams]
+        + [s.rolling(5).mean().rename("mean:" + s.name) for s in streams]
+    )
+    if scheme == "bsh":
+        action_scheme = BSH(cash, btc)
+    else:
+        action_scheme = SimpleOrders(trade_sizes=3, min_order_pct=0.0)
+    return Portfolio(USD, wallets), action_scheme, SimpleProfit(window_size=2), feed
+
+
+@pytest.mark.parametrize("scheme", ["bsh", "simple"])
+def test_matches_default_environment(scheme):
+    env = default.create(*make_components(scheme), window_size=3, min_periods=4)
+    batched = BatchedTradingEnv(1, *make_components(scheme), window_size=3, min_periods=4)
+    assert batched.action_space.n == env.action_space.n
+
+    obs, _ = env.reset()
+    np.testing.assert_allclose(batched.reset()[0], obs, atol=1e-6)
+
+    rng = np.random.RandomState(1)
+    episodes = 0
+    for _ in range(400):
+        action = rng.randint(env.action_space.n)
+        obs, reward, terminated, _, info = env.step(action)
+        batched_obs, rewards, dones, infos = batched.step(np.array([action]))
+
+        assert dones[0] == terminated
+        assert infos[0]["step"] == info["step"]
+        assert infos[0]["net_worth"] == pytest.approx(info["net_worth"], rel=1e-5)
+        assert rewards[0] == pytest.approx(reward, abs=1e-5)
+        if terminated:
+            episodes += 1
+            np.testing.assert_allclose(infos[0]["terminal_observation"], obs, atol=1e-6)
+            obs, _ = env.reset()
+        np.testing.assert_allclose(batched_obs[0], obs, atol=1e-6)
+
+    assert episodes > 0
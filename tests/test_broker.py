@@ -0,0 +1,267 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from gymnasium.spaces import Discrete
+
+import trade_flow.environments.default as default
+from trade_flow.core import TimeIndexed
+from trade_flow.environments.default.actions import TradeFlowActionScheme
+from trade_flow.environments.default.engine.exchanges import Exchange, ExchangeOptions
+from trade_flow.environments.default.engine.execution.simulated import execute_order
+from trade_flow.environments.default.engine.instruments import Instrument
+from trade_flow.environments.default.engine.orders import (
+    Broker,
+    Order,
+    OrderStatus,
+    TradeSide,
+    TradeType,
+)
+from trade_flow.environments.default.engine.orders.criteria import Limit, Stop
+from trade_flow.environments.default.engine.orders.order_listener import OrderListener
+from trade_flow.environments.default.engine.portfolio import Portfolio
+from trade_flow.environments.default.engine.wallet import Wallet
+from trade_flow.environments.default.rewards import SimpleProfit
+from trade_flow.feed import DataFeed, Stream
+
+
+USD = Instrument("USD", 2, "U.S. Dollar")
+BTC = Instrument("BTC", 8, "Bitcoin")
+
+
+class LinearBroker(OrderListener, TimeIndexed):
+    """The broker scanning every resting order on every step, which the
+    indexed `Broker` replaced."""
+
+    def __init__(self):
+        self.reset()
+
+    def submit(self, order):
+        self.unexecuted += [order]
+
+    def cancel(self, order):
+        if order in self.unexecuted:
+            self.unexecuted.remove(order)
+        order.cancel()
+
+    def update(self):
+        executed_ids = []
+        for order in self.unexecuted:
+            if order.is_executable:
+                executed_ids.append(order.id)
+                self.executed[order.id] = order
+
+                order.attach(self)
+                order.execute()
+
+        for order_id in executed_ids:
+            self.unexecuted.remove(self.executed[order_id])
+
+        for order in self.unexecuted + list(self.executed.values()):
+            if order.is_active and order.is_expired:
+                self.cancel(order)
+
+    def on_fill(self, order, trade):
+        if trade.order_id in self.executed and trade not in self.trades:
+            self.trades[trade.order_id] = self.trades.get(trade.order_id, [])
+            self.trades[trade.order_id] += [trade]
+
+            if order.is_complete:
+                next_order = order.complete()
+                if next_order:
+                    if next_order.is_executable:
+                        self.executed[next_order.id] = next_order
+                        next_order.attach(self)
+                        next_order.execute()
+                    else:
+                        self.submit(next_order)
+
+    def reset(self):
+        self.unexecuted = []
+        self.executed = {}
+        self.trades = {}
+
+
+class RandomOrders(TradeFlowActionScheme):
+    """Submits random limit and stop orders, some of them expiring, and
+    cancels random resting orders."""
+
+    def __init__(self, broker, seed):
+        super().__init__()
+        self.broker = broker
+        self.seed = seed
+        self.orders = []
+
+    @property
+    def action_space(self):
+        return Discrete(1)
+
+    def get_orders(self, action, portfolio):
+        pair = portfolio.exchange_pairs[0]
+        price = pair.price
+        step = self.clock.step
+
+        resting = self.broker.unexecuted
+        if resting and self.rng.rand() < 0.2:
+            self.broker.cancel(resting[self.rng.randint(len(resting))])
+
+        orders = []
+        for _ in range(self.rng.randint(3)):
+            side = TradeSide.BUY if self.rng.rand() < 0.5 else TradeSide.SELL
+            if self.rng.rand() < 0.5:
+                limit = float(price) * (1 + self.rng.uniform(-0.03, 0.03))
+                criteria = Limit(round(limit, 2))
+            else:
+                direction = "up" if self.rng.rand() < 0.5 else "down"
+                criteria = Stop(direction, self.rng.choice([0.005, 0.01, 0.02]))
+            size = 5 if side == TradeSide.BUY else 0.0005
+            orders += [
+                Order(
+                    step=step,
+                    side=side,
+                    trade_type=TradeType.MARKET,
+                    exchange_pair=pair,
+                    quantity=size * side.instrument(pair.pair),
+                    portfolio=portfolio,
+                    price=price,
+                    criteria=criteria,
+                    end=step + self.rng.randint(1, 30) if self.rng.rand() < 0.5 else None,
+                )
+            ]
+        self.orders += orders
+        return orders
+
+    def reset(self):
+        super().reset()
+        self.rng = np.random.RandomState(self.seed)
+        self.orders = []
+
+
+def make_env(action_scheme, close):
+    price = Stream.source(close, dtype="float").rename("USD-BTC")
+    exchange = Exchange("exchange", service=execute_order, options=ExchangeOptions())(price)
+    portfolio = Portfolio(USD, [Wallet(exchange, 100000 * USD), Wallet(exchange, 10 * BTC)])
+
+    feed = DataFeed([Stream.source(close, dtype="float").rename("close")])
+    return default.create(portfolio, action_scheme, SimpleProfit(), feed, window_size=1)
+
+
+def run(broker, seed, close):
+    scheme = RandomOrders(broker, seed)
+    env = make_env(scheme, close)
+    env.reset()
+
+    net_worths = []
+    for _ in range(len(close) - 2):
+        _, _, terminated, _, info = env.step(0)
+        net_worths += [info["net_worth"]]
+        if terminated:
+            break
+
+    log = [
+        (str(o.status), str(o.criteria), o.end, [t.step for t in o.trades]) for o in scheme.orders
+    ]
+    # The orders executed on the same step are executed in submission order.
+    index = {o.id: i for i, o in enumerate(scheme.orders)}
+    executed = [index[order_id] for order_id in broker.executed]
+    return log, executed, net_worths
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_fills_match_linear_scan(seed):
+    rng = np.random.RandomState(seed)
+    close = list(np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.005, 300))), 2))
+
+    log, executed, net_worths = run(Broker(), seed, close)
+    expected, expected_executed, expected_net_worths = run(LinearBroker(), seed, close)
+
+    statuses = {status for status, *_ in log}
+    assert {"filled", "cancelled", "pending"} <= statuses
+    assert any(trades for *_, trades in log)
+    assert log == expected
+    assert executed == expected_executed
+    assert net_worths == expected_net_worths
+
+
+@pytest.mark.parametrize("tolerance, filled", [(Broker.tolerance, True), (0, False)])
+def test_stop_trigger_tolerance(monkeypatch, tolerance, filled):
+    # The quote crosses the stop exactly: (109 - 100) / 100 >= 0.09 holds, but
+    # 100 * (1 + 0.09) is 109.00000000000001 in floating point.
+    assert float(Decimal("100.00")) * (1 + 0.09) > 109
+    monkeypatch.setattr(Broker, "tolerance", tolerance)
+
+    class StopOrder(RandomOrders):
+        def get_orders(self, action, portfolio):
+            if self.orders:
+                return []
+            pair = portfolio.exchange_pairs[0]
+            self.orders = [
+                Order(
+                    step=self.clock.step,
+                    side=TradeSide.SELL,
+                    trade_type=TradeType.MARKET,
+                    exchange_pair=pair,
+                    quantity=1 * BTC,
+                    portfolio=portfolio,
+                    price=pair.price,
+                    criteria=Stop("up", 0.09),
+                )
+            ]
+            return self.orders
+
+    scheme = StopOrder(Broker(), 0)
+    env = make_env(scheme, [100.0, 100.0, 104.0, 109.0, 108.0, 107.0])
+    env.reset()
+    for _ in range(4):
+        env.step(0)
+
+    (order,) = scheme.orders
+    assert order.price == Decimal("100.00")
+    assert order.status == (OrderStatus.FILLED if filled else OrderStatus.PENDING)
+    assert [t.price for t in order.trades] == ([Decimal("109.00")] if filled else [])
+
+
+def test_cancel_and_expiry_leave_the_heaps():
+    scheme = RandomOrders(Broker(), 0)
+    env = make_env(scheme, list(np.linspace(100, 101, 200)))
+    env.reset()
+
+    # Far from the quote, the orders rest in the heaps until cancelled or expired.
+    pair = scheme.portfolio.exchange_pairs[0]
+    orders = [
+        Order(
+            step=env.clock.step,
+            side=TradeSide.BUY,
+            trade_type=TradeType.MARKET,
+            exchange_pair=pair,
+            quantity=1 * USD,
+            portfolio=scheme.portfolio,
+            price=pair.price,
+            criteria=Limit(50.0),
+            end=env.clock.step + 5 if i % 2 else None,
+        )
+        for i in range(200)
+    ]
+    broker = scheme.broker
+    for order in orders:
+        broker.submit(order)
+    assert broker.unexecuted == orders
+
+    for order in orders[::4]:
+        broker.cancel(order)
+    with pytest.raises(Warning):
+        broker.cancel(orders[0])
+    assert broker.unexecuted == [o for i, o in enumerate(orders) if i % 4]
+
+    for _ in range(5):
+        env.clock.increment()
+        broker.update()
+    assert broker.unexecuted == [o for i, o in enumerate(orders) if i % 4 and i % 2 == 0]
+    assert all(o.is_cancelled for i, o in enumerate(orders) if i % 4 == 0 or i % 2)
+    assert not broker.executed
+
+    (_, below, above), = broker._books.values()
+    assert len(below) <= 2 * len(broker.unexecuted) and not above
+
+    with pytest.raises(AttributeError):
+        broker.unexecuted = []
@@ -0,0 +1,82 @@
+import numpy as np
+
+import trade_flow.environments.default as default
+from trade_flow.environments.default.actions import BSH
+from trade_flow.environments.default.engine.exchanges import Exchange
+from trade_flow.environments.default.engine.execution.simulated import execute_order
+from trade_flow.environments.default.engine.instruments import Instrument
+from trade_flow.environments.default.engine.portfolio import Portfolio
+from trade_flow.environments.default.engine.wallet import Wallet
+from trade_flow.environments.default.rewards import SimpleProfit
+from trade_flow.feed import DataFeed, Stream
+
+
+USD = Instrument("USD", 2, "U.S. Dollar")
+BTC = Instrument("BTC", 8, "Bitcoin")
+
+
+def count_sorts(monkeypatch):
+    sorts = []
+    toposort = Stream.toposort
+
+    def counting(edges):
+        sorts.append(len(edges))
+        return toposort(edges)
+
+    monkeypatch.setattr(Stream, "toposort", staticmethod(counting))
+    return sorts
+
+
+def test_plan_reused_until_rewired(monkeypatch):
+    sorts = count_sorts(monkeypatch)
+    x = Stream.source([1.0, 2.0, 3.0, 4.0], dtype="float").rename("x")
+    mean = x.rolling(2).mean().rename("mean")
+    feed = DataFeed([mean])
+
+    feed.compile()
+    process = feed.process
+    x.rolling(3).sum().rename("outside")
+    feed.compile()
+    assert feed.process is process
+    assert len(sorts) == 1
+
+    # Connect the rolling window under the unchanged input to another source.
+    y = Stream.source([10.0, 20.0, 30.0, 40.0], dtype="float").rename("y")
+    mean.inputs[0](y)
+    feed.compile()
+    assert len(sorts) == 2
+    assert any(s is y for s in feed.process)
+    assert not any(s is x for s in feed.process)
+    assert [feed.next()["mean"] for _ in range(2)] == [10.0, 15.0]
+
+
+def make_env(feed, price):
+    exchange = Exchange("exchange", service=execute_order)(price)
+    cash = Wallet(exchange, 10000 * USD)
+    asset = Wallet(exchange, 0 * BTC)
+    portfolio = Portfolio(USD, [cash, asset])
+    return default.create(portfolio, BSH(cash, asset), SimpleProfit(), feed, window_size=2)
+
+
+def test_observers_reuse_plan_of_feed(monkeypatch):
+    close = list(np.linspace(100, 200, 50))
+    price = Stream.source(close, dtype="float").rename("USD-BTC")
+    p = Stream.source(close, dtype="float")
+    feed = DataFeed([p.rolling(5).mean().rename("mean"), p.log().diff().rename("lr")])
+
+    sorts = count_sorts(monkeypatch)
+    first = make_env(feed, price)
+    n_sorted = sorts[:]
+    second = make_env(feed, price)
+
+    # The second observer only sorts its own streams, not those of the feed.
+    assert len(sorts) == len(n_sorted) + 1
+    assert sorts[-1] == n_sorted[-1]
+
+    feed.compile()
+    assert len(sorts) == len(n_sorted) + 1
+    for env in (first, second):
+        assert all(a is b for a, b in zip(env.observer.feed.process, feed.process))
+
+    obs, _ = first.reset()
+    np.testing.assert_array_equal(second.reset()[0], obs)
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+import trade_flow.environments.default as default
+from trade_flow.environments.default.actions import ManagedRiskOrders
+from trade_flow.environments.default.engine.exchanges import Exchange, ExchangeOptions
+from trade_flow.environments.default.engine.execution.simulated import execute_order
+from trade_flow.environments.default.engine.instruments import Instrument
+from trade_flow.environments.default.engine.portfolio import Portfolio
+from trade_flow.environments.default.engine.wallet import Wallet
+from trade_flow.environments.default.rewards import RiskAdjustedReturns
+from trade_flow.feed import DataFeed, Stream
+
+
+USD = Instrument("USD", 2, "U.S. Dollar")
+BTC = Instrument("BTC", 8, "Bitcoin")
+
+
+def make_env(**kwargs):
+    rng = np.random.RandomState(0)
+    close = list(np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.01, 500))), 2))
+
+    price = Stream.source(close, dtype="float").rename("USD-BTC")
+    exchange = Exchange("exchange", service=execute_order, options=ExchangeOptions())(price)
+    cash = Wallet(exchange, 10000 * USD)
+    asset = Wallet(exchange, 0 * BTC)
+
+    p = Stream.source(close, dtype="float")
+    feed = DataFeed(
+        [
+            p.log().diff().rename("lr"),
+            p.rolling(10).mean().rename("mean"),
+            p.ewm(span=5).mean().rename("ewm"),
+            p.lag(3).rename("lag"),
+        ]
+    )
+    return default.create(
+        Portfolio(USD, [cash, asset]),
+        ManagedRiskOrders(trade_sizes=3, durations=[10, 50]),
+        RiskAdjustedReturns(window_size=10),
+        feed,
+        window_size=5,
+        **kwargs,
+    )
+
+
+def rollout(env, actions):
+    steps = []
+    for action in actions:
+        obs, reward, terminated, _, info = env.step(int(action))
+        steps.append((obs.copy(), reward, info["net_worth"]))
+        if terminated:
+            break
+    return steps
+
+
+def assert_same(steps, expected):
+    assert len(steps) == len(expected)
+    for (obs, reward, net_worth), (e_obs, e_reward, e_net_worth) in zip(steps, expected):
+        np.testing.assert_allclose(obs, e_obs)
+        assert reward == pytest.approx(e_reward, nan_ok=True)
+        assert net_worth == e_net_worth
+
+
+def test_restore_replays_episode():
+    env = make_env()
+    env.reset(seed=0)
+    rng = np.random.RandomState(1)
+    rollout(env, rng.randint(env.action_space.n, size=100))
+
+    snapshot = env.snapshot()
+    actions = rng.randint(env.action_space.n, size=150)
+    expected = rollout(env, actions)
+
+    for _ in range(2):
+        env.restore(snapshot)
+        assert_same(rollout(env, actions), expected)
+        env.restore(snapshot)
+        rollout(env, rng.randint(env.action_space.n, size=150))
+
+
+def test_restore_from_another_environment():
+    env = make_env()
+    env.reset()
+
+    with pytest.raises(ValueError):
+        make_env().restore(env.snapshot())
+
+
+def test_restore_after_reset():
+    env = make_env()
+    env.reset(seed=0)
+    rng = np.random.RandomState(2)
+    rollout(env, rng.randint(env.action_space.n, size=50))
+
+    portfolio = env.action_scheme.portfolio
+    snapshot = env.snapshot()
+    history = portfolio.performance.as_frame().copy()
+    actions = rng.randint(env.action_space.n, size=100)
+    expected = rollout(env, actions)
+
+    env.reset(seed=1)
+    rollout(env, rng.randint(env.action_space.n, size=100))
+
+    env.restore(snapshot)
+    assert portfolio.performance.as_frame().equals(history)
+    assert_same(rollout(env, actions), expected)
+
+
+def test_vectorized_feed_mode():
+    env = make_env()
+    vectorized = make_env(feed_mode="vectorized")
+    assert vectorized.observer.external.mode == "vectorized"
+
+    for seed in range(2):
+        obs, _ = env.reset(seed=seed)
+        np.testing.assert_allclose(vectorized.reset(seed=seed)[0], obs)
+        actions = np.random.RandomState(seed).randint(env.action_space.n, size=200)
+        assert_same(rollout(vectorized, actions), rollout(env, actions))
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+
+from trade_flow.feed import DataFeed, FeatureCache, Stream
+
+
+SCALE = 1
+
+
+def scale(x):
+    return x * SCALE
+
+
+def make_feed(data, window=3, fn=scale):
+    x = Stream.source(data, dtype="float").rename("x")
+    return DataFeed([x, x.rolling(window).mean().rename("mean"), x.apply(fn).rename("scaled")])
+
+
+def compile_values(feed, cache):
+    feed.compile("vectorized", cache=cache)
+    return [feed.next() for _ in range(3)]
+
+
+def test_hit_and_miss(tmpdir):
+    cache = FeatureCache(str(tmpdir))
+    data = [1.0, 2.0, 3.0, 4.0]
+
+    expected = compile_values(make_feed(data), cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    assert compile_values(make_feed(data), cache) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    compile_values(make_feed(data, window=2), cache)
+    compile_values(make_feed([1.0, 2.0, 3.0, 5.0]), cache)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_miss_on_changed_global(tmpdir, monkeypatch):
+    cache = FeatureCache(str(tmpdir))
+    data = [1.0, 2.0, 3.0]
+
+    assert [v["scaled"] for v in compile_values(make_feed(data), cache)] == data
+
+    monkeypatch.setitem(globals(), "SCALE", 10)
+    values = compile_values(make_feed(data), cache)
+    assert [v["scaled"] for v in values] == [10.0, 20.0, 30.0]
+    assert cache.hits == 0
+
+
+def test_eviction(tmpdir):
+    directory = str(tmpdir)
+    cache = FeatureCache(directory)
+    for n in range(3):
+        compile_values(make_feed(np.arange(100.0) + n), cache)
+    files = sorted(os.listdir(directory), key=lambda f: os.path.getmtime(os.path.join(directory, f)))
+    assert len(files) == 3
+
+    size = os.path.getsize(os.path.join(directory, files[-1]))
+    FeatureCache(directory, max_bytes=2 * size)
+    assert sorted(os.listdir(directory)) == sorted(files[1:])
+
+    FeatureCache(directory, max_age=-1)
+    assert os.listdir(directory) == []
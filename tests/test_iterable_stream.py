@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from trade_flow.environments.default.engine.exchanges import Exchange
+from trade_flow.environments.default.engine.execution.simulated import execute_order
+from trade_flow.environments.default.engine.instruments import Instrument
+from trade_flow.feed import DataFeed, Stream
+
+
+USD = Instrument("USD", 2, "U.S. Dollar")
+BTC = Instrument("BTC", 8, "Bitcoin")
+
+
+@pytest.mark.parametrize(
+    "source", [pd.Series([100, 101, 102]), np.array([100, 101, 102]), [100, 101, 102]]
+)
+def test_reads_python_scalars(source):
+    s = Stream.source(source, dtype="float")
+    feed = DataFeed([s])
+    feed.compile()
+
+    values = [feed.next()[s.name] for _ in range(3)]
+    assert values == [100, 101, 102]
+    assert all(type(v) is int for v in values)
+
+
+def test_quote_price_from_int_column():
+    price = Stream.source(pd.Series([100, 101, 102]), dtype="float").rename("USD-BTC")
+    exchange = Exchange("exchange", service=execute_order)(price)
+    feed = DataFeed(exchange.streams())
+    feed.compile()
+
+    feed.next()
+    assert exchange.quote_price(USD / BTC) == Decimal("100.00")
+    feed.next()
+    assert exchange.quote_price(USD / BTC) == Decimal("101.00")
@@ -0,0 +1,161 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from test_environment_snapshot import make_env, rollout
+
+from trade_flow.environments.default.engine.ledger import Ledger, Transaction
+from trade_flow.environments.default.engine.wallet import Wallet
+
+
+class ListLedger:
+    """The ledger storing `Transaction` tuples the columnar ledger replaced."""
+
+    def __init__(self):
+        self.transactions = []
+
+    def commit(self, wallet, quantity, source, target, memo):
+        poid = quantity.path_id
+        locked_poid_balance = None if poid not in wallet.locked.keys() else wallet.locked[poid]
+        self.transactions += [
+            Transaction(
+                poid,
+                wallet.exchange.clock.step,
+                source,
+                target,
+                memo,
+                quantity,
+                wallet.balance,
+                wallet.locked_balance,
+                locked_poid_balance,
+            )
+        ]
+
+    def as_frame(self, sort_by_order_seq=False):
+        df = pd.DataFrame(self.transactions)
+        if not sort_by_order_seq:
+            return df
+        frames = [df.loc[df.poid == poid, :] for poid in df.poid.unique()]
+        return pd.concat(frames, ignore_index=True, axis=0)
+
+
+def key(transaction):
+    def quantity(q):
+        return None if q is None else (q.instrument.symbol, q.size, q.path_id)
+
+    return transaction[:5] + tuple(quantity(q) for q in transaction[5:])
+
+
+@pytest.fixture
+def recorded(request, monkeypatch):
+    """Records an episode in a columnar ledger and in a `ListLedger`."""
+    ledger = Ledger(capacity=getattr(request, "param", 4))
+    reference = ListLedger()
+    commit = ledger.commit
+
+    def record(**kwargs):
+        reference.commit(**kwargs)
+        commit(**kwargs)
+
+    monkeypatch.setattr(Wallet, "ledger", ledger)
+    monkeypatch.setattr(ledger, "commit", record)
+
+    env = make_env()
+    env.reset(seed=0)
+    rollout(env, np.random.RandomState(1).randint(env.action_space.n, size=300))
+    return env, ledger, reference
+
+
+def test_transactions_match_list_ledger(recorded):
+    _, ledger, reference = recorded
+
+    assert len(ledger) == len(reference.transactions)
+    assert [key(t) for t in ledger.transactions] == [key(t) for t in reference.transactions]
+
+
+@pytest.mark.parametrize("sort_by_order_seq", [False, True])
+def test_as_frame_matches_list_ledger(recorded, sort_by_order_seq):
+    _, ledger, reference = recorded
+    frame = ledger.as_frame(sort_by_order_seq=sort_by_order_seq)
+    expected = reference.as_frame(sort_by_order_seq=sort_by_order_seq)
+
+    assert list(frame.columns[: len(Transaction._fields)]) == list(Transaction._fields)
+    for k in ["poid", "step", "source", "target", "memo"]:
+        assert list(frame[k]) == list(expected[k])
+    for k in ["amount", "free", "locked", "locked_poid"]:
+        values = [np.nan if q is None else float(q.size) for q in expected[k]]
+        np.testing.assert_allclose(frame[k].to_numpy(), values, rtol=1e-12)
+
+
+def test_order_groups_paths_in_order_of_appearance(recorded):
+    _, ledger, _ = recorded
+    poids = [t.poid for t in ledger.transactions]
+    order = ledger.order(sort_by_order_seq=True)
+
+    assert sorted(order) == list(range(len(ledger)))
+    expected = sorted(range(len(poids)), key=lambda i: poids.index(poids[i]))
+    assert list(order) == expected
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_round_trip_is_exact(recorded, tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    _, ledger, _ = recorded
+    path = str(tmp_path / f"ledger.{fmt}")
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        ledger.to_parquet(path, row_group_size=16, sort_by_order_seq=True)
+        assert pq.ParquetFile(path).num_row_groups == -(-len(ledger) // 16)
+        table = pq.read_table(path)
+    else:
+        ledger.to_arrow(path, batch_size=16, sort_by_order_seq=True)
+        with pa.ipc.open_file(path) as reader:
+            assert reader.num_record_batches == -(-len(ledger) // 16)
+            table = reader.read_all()
+
+    order = ledger.order(sort_by_order_seq=True)
+    transactions = [ledger.transactions[i] for i in order]
+    rows = table.to_pylist()
+    assert len(rows) == len(transactions)
+
+    for row, t in zip(rows, transactions):
+        assert (row["poid"], row["step"], row["source"], row["target"], row["memo"]) == t[:5]
+        assert row["instrument"] == t.amount.instrument.symbol
+        assert row["precision"] == t.amount.instrument.precision
+        for k in ["amount", "free", "locked", "locked_poid"]:
+            q = getattr(t, k)
+            if q is None:
+                assert row[k] is None
+            else:
+                assert Decimal(row[k]).scaleb(-row["precision"]) == q.size
+
+
+# Branches grow their own columns from a small capacity, and share them with a
+# large one.
+@pytest.mark.parametrize("recorded", [4, 4096], indirect=True)
+def test_restore_does_not_overwrite_other_branches(recorded):
+    env, ledger, _ = recorded
+    rng = np.random.RandomState(2)
+
+    snapshot = env.snapshot()
+    committed = [key(t) for t in ledger.transactions]
+
+    rollout(env, rng.randint(env.action_space.n, size=100))
+    first = [key(t) for t in ledger.transactions]
+    first_snapshot = env.snapshot()
+
+    env.restore(snapshot)
+    assert [key(t) for t in ledger.transactions] == committed
+    rollout(env, rng.randint(env.action_space.n, size=100))
+    second = [key(t) for t in ledger.transactions]
+    assert second[: len(committed)] == committed
+    assert second != first
+
+    env.restore(first_snapshot)
+    assert [key(t) for t in ledger.transactions] == first
+    env.restore(snapshot)
+    assert [key(t) for t in ledger.transactions] == committed
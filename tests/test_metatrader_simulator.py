@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+simulated = pytest.importorskip(
+    "trade_flow.environments.metatrader.engine.execution.simulated_2",
+    reason="the metatrader environment cannot be imported",
+)
+
+from trade_flow.environments.metatrader.engine.orders import OrderType
+from trade_flow.environments.metatrader.terminal import SymbolInfo
+
+
+START = datetime(2024, 1, 1)
+
+
+def symbol_info(name):
+    return SymbolInfo(
+        SimpleNamespace(
+            name=name,
+            path=f"Forex\\Majors\\{name}",
+            currency_margin=name[:3],
+            currency_profit=name[3:],
+            trade_contract_size=100000.0,
+            volume_min=0.01,
+            volume_max=100.0,
+            volume_step=0.01,
+        )
+    )
+
+
+def make_simulator(seed=0, hedge=True, **kwargs):
+    rng = np.random.RandomState(seed)
+    simulator = simulated.Simulator(hedge=hedge, **kwargs)
+    # GBPUSD starts an hour after EURUSD.
+    for name, price, offset in [("EURUSD", 1.1, 0), ("GBPUSD", 1.3, 60)]:
+        index = pd.date_range(START + timedelta(minutes=offset), periods=500, freq="min")
+        close = price * np.exp(np.cumsum(rng.normal(0, 0.001, len(index))))
+        simulator.symbols_info[name] = symbol_info(name)
+        simulator.symbols_data[name] = pd.DataFrame({"Close": close}, index=index)
+    simulator.current_time = START + timedelta(minutes=60)
+    return simulator
+
+
+class MinLoopSimulator(simulated.Simulator):
+    """Stops out orders one at a time, closing the least profitable one until
+    the margin level recovers, as the simulator did before `_stop_out`."""
+
+    def _stop_out(self, orders, profits):
+        while self.margin_level < self.stop_out_level and len(self.orders) > 0:
+            self.close_order(min(self.orders, key=lambda order: order.profit))
+
+
+def test_time_index_before_data_is_first_bar():
+    simulator = make_simulator()
+    index = simulator.symbols_data["GBPUSD"].index
+
+    for time in [START, index[0] - timedelta(seconds=1)]:
+        assert simulator._time_index("GBPUSD", time) == 0
+        assert simulator.nearest_time("GBPUSD", time) == index[0]
+        assert simulator.price_at("GBPUSD", time).equals(simulator.symbols_data["GBPUSD"].iloc[0])
+
+    assert simulator._time_index("GBPUSD", index[-1] + timedelta(days=1)) == len(index) - 1
+
+
+def test_time_index_matches_search():
+    simulator = make_simulator()
+    index = simulator.symbols_data["EURUSD"].index
+    rng = np.random.RandomState(1)
+
+    # Steps forward hit the cursor, jumps and steps back search again.
+    seconds = np.concatenate([np.arange(0, 600 * 60, 30), rng.randint(-3600, 40000, 500)])
+    for s in seconds.tolist():
+        time = START + timedelta(seconds=s)
+        expected = max(int((index <= time).sum()) - 1, 0)
+        assert simulator._time_index("EURUSD", time) == expected
+        close = simulator.symbols_data["EURUSD"].Close.iloc[expected]
+        assert simulator._close_at("EURUSD", time) == close
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stop_out_matches_min_loop(seed):
+    rng = np.random.RandomState(seed)
+    simulators = [
+        make_simulator(seed, leverage=1000, stop_out_level=2.0, balance=1000.0),
+        make_simulator(seed, leverage=1000, stop_out_level=2.0, balance=1000.0),
+    ]
+    simulators[1].__class__ = MinLoopSimulator
+
+    orders = [
+        (OrderType(rng.randint(2)), ["EURUSD", "GBPUSD"][rng.randint(2)], rng.randint(1, 20) / 100)
+        for _ in range(30)
+    ]
+    for simulator in simulators:
+        for order in orders:
+            simulator.create_order(*order, raise_exception=False)
+    assert len(simulators[0].orders) > 5
+
+    stopped = False
+    for _ in range(200):
+        for simulator in simulators:
+            simulator.tick(timedelta(minutes=1))
+        stopped |= len(simulators[0].closed_orders) > 0
+
+        states = [s.get_state() for s in simulators]
+        for k in ["balance", "equity", "margin"]:
+            assert states[0][k] == pytest.approx(states[1][k], rel=1e-9, abs=1e-9)
+        assert [o.id for o in simulators[0].closed_orders] == [
+            o.id for o in simulators[1].closed_orders
+        ]
+    assert stopped
+
+
+def test_open_orders_follow_modified_and_closed_orders():
+    simulator = make_simulator(hedge=False)
+
+    def assert_marked_to_market():
+        simulator.tick()
+        orders = simulator._get_open_orders()
+        assert orders["volume"].tolist() == [o.volume for o in simulator.orders]
+        assert orders["entry_price"].tolist() == [o.entry_price for o in simulator.orders]
+        assert orders["margin"].tolist() == [o.margin for o in simulator.orders]
+        equity = simulator.balance
+        for order in simulator.orders:
+            order.exit_price = simulator._close_at(order.symbol, simulator.current_time)
+            simulator._update_order_profit(order)
+            equity += order.profit
+        assert simulator.equity == pytest.approx(equity)
+
+    eur = simulator.create_order(OrderType.Buy, "EURUSD", 0.5)
+    simulator.create_order(OrderType.Sell, "GBPUSD", 0.3)
+    assert_marked_to_market()
+    cached = simulator._get_open_orders()
+    assert simulator._get_open_orders() is cached
+
+    simulator.current_time += timedelta(minutes=5)
+    assert simulator.create_order(OrderType.Buy, "EURUSD", 0.2) is eur
+    assert eur.volume == pytest.approx(0.7)
+    assert_marked_to_market()
+
+    # Reducing an order keeps the number of orders.
+    n = len(simulator.orders)
+    cached = simulator._get_open_orders()
+    simulator.current_time += timedelta(minutes=5)
+    simulator.create_order(OrderType.Sell, "EURUSD", 0.4)
+    assert eur.volume == pytest.approx(0.3)
+    assert len(simulator.orders) == n
+    assert simulator._get_open_orders() is not cached
+    assert_marked_to_market()
+
+    simulator.close_order(eur)
+    assert eur not in simulator.orders
+    assert_marked_to_market()
+    assert len(simulator._get_open_orders()) == len(simulator.orders)
+    assert simulator._open_symbols == list(dict.fromkeys(o.symbol for o in simulator.orders))
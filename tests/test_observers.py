@@ -0,0 +1,70 @@
+import numpy as np
+
+from trade_flow.environments.default.engine.exchanges import Exchange
+from trade_flow.environments.default.engine.execution.simulated import execute_order
+from trade_flow.environments.default.engine.instruments import Instrument
+from trade_flow.environments.default.engine.portfolio import Portfolio
+from trade_flow.environments.default.engine.wallet import Wallet
+from trade_flow.environments.default.observers import TradeFlowObserver
+from trade_flow.feed import DataFeed, Stream
+
+
+USD = Instrument("USD", 2, "U.S. Dollar")
+BTC = Instrument("BTC", 8, "Bitcoin")
+
+CLOSE = list(np.round(np.linspace(100, 120, 30), 2))
+
+
+def make_observer(nested, **kwargs):
+    price = Stream.source(CLOSE, dtype="float").rename("USD-BTC")
+    exchange = Exchange("exchange", service=execute_order)(price)
+    portfolio = Portfolio(USD, [Wallet(exchange, 10000 * USD), Wallet(exchange, 0 * BTC)])
+
+    p = Stream.source(CLOSE, dtype="float")
+    lr = p.log().diff().rename("lr")
+    mean = p.rolling(3).mean().rename("mean")
+    volume = Stream.source(list(range(len(CLOSE))), dtype="float").rename("volume")
+    if nested:
+        streams = [Stream.group([lr, mean]).rename("features"), volume]
+    else:
+        streams = [lr, mean, volume]
+    return TradeFlowObserver(portfolio, DataFeed(streams), window_size=4, **kwargs)
+
+
+def test_nested_groups_fall_back_to_dict_rows():
+    flat = make_observer(nested=False, min_periods=5)
+    nested = make_observer(nested=True, min_periods=5)
+
+    assert flat.feed.inputs[1].is_columnar
+    assert not nested.feed.inputs[1].is_columnar
+    assert nested.feature_index == {"lr": 0, "mean": 1, "volume": 2}
+    assert nested.observation_space == flat.observation_space
+
+    for _ in range(10):
+        np.testing.assert_array_equal(nested.observe(None), flat.observe(None))
+
+
+def test_vectorized_mode_matches_step_mode():
+    step = make_observer(nested=False, min_periods=5)
+    vectorized = make_observer(nested=False, min_periods=5, mode="vectorized")
+
+    assert vectorized.external is not None
+    assert vectorized.external.mode == "vectorized"
+    assert "external" not in vectorized.feed.next()
+
+    vectorized.reset()
+    for _ in range(5):
+        np.testing.assert_array_equal(vectorized.observe(None), step.observe(None))
+
+    state = vectorized.snapshot()
+    expected = [vectorized.observe(None) for _ in range(5)]
+    vectorized.restore(state)
+    for obs in expected:
+        np.testing.assert_array_equal(vectorized.observe(None), obs)
+
+    step.reset(random_start=3)
+    vectorized.reset(random_start=3)
+    while step.has_next():
+        assert vectorized.has_next()
+        np.testing.assert_array_equal(vectorized.observe(None), step.observe(None))
+    assert not vectorized.has_next()
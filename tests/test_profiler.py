@@ -0,0 +1,82 @@
+import json
+import time
+
+import numpy as np
+
+from trade_flow.feed import DataFeed, Stream
+from trade_flow.feed.instrumentation import LatencyHistogram
+
+
+def test_histogram_counts_and_percentiles():
+    rng = np.random.RandomState(0)
+    samples = [int(v) for v in rng.lognormal(mean=10, sigma=1.5, size=1000)] + [0, 3, 15]
+
+    histogram = LatencyHistogram()
+    for v in samples:
+        histogram.record(v)
+
+    assert histogram.count == len(samples)
+    assert histogram.total == sum(samples)
+    assert histogram.minimum == 0
+    assert histogram.maximum == max(samples)
+    assert histogram.mean == sum(samples) / len(samples)
+
+    ordered = sorted(samples)
+    for q in (1, 50, 90, 99, 100):
+        exact = ordered[max(1, int(np.ceil(len(samples) * q / 100))) - 1]
+        bound = histogram.percentile(q)
+        assert exact <= bound <= exact + exact / LatencyHistogram.n_sub_buckets
+
+    histogram.reset()
+    assert histogram.count == 0
+    assert histogram.buckets.sum() == 0
+
+
+def test_small_latencies_are_exact():
+    histogram = LatencyHistogram()
+    for v in range(16):
+        histogram.record(v)
+    assert [histogram.percentile(100 * (v + 1) / 16) for v in range(16)] == list(range(16))
+
+
+def test_empty_histogram_summary():
+    summary = LatencyHistogram().to_dict()
+    assert summary["count"] == 0
+    assert all(summary[k] is None for k in ("mean", "min", "p50", "p90", "p99", "max"))
+
+
+def make_feed():
+    x = Stream.source(list(np.arange(1.0, 51.0)), dtype="float").rename("x")
+    slow = x.apply(lambda v: time.sleep(1e-4) or v).rename("slow")
+    fast = x.apply(lambda v: v).rename("fast")
+    return DataFeed([slow, fast])
+
+
+def test_profiler_counts_and_ordering():
+    feed = make_feed()
+    profiler = feed.profile()
+    for _ in range(20):
+        feed.next()
+
+    stats = profiler.stats()
+    assert {s["name"]: s["calls"] for s in stats} == {"x": 20, "slow": 20, "fast": 20}
+    assert stats[0]["name"] == "slow"
+    totals = [s["total"] for s in stats]
+    assert totals == sorted(totals, reverse=True)
+
+    feed.stop_profiling()
+    feed.next()
+    assert all(s["calls"] == 20 for s in profiler.stats())
+
+
+def test_to_json_with_streams_never_called():
+    feed = make_feed()
+    feed.compile("vectorized")
+    profiler = feed.profile()
+    feed.next()
+
+    # The streams of a vectorized feed are precomputed, so none are called.
+    stats = json.loads(profiler.to_json(allow_nan=False))
+    assert {s["name"] for s in stats} == {"x", "slow", "fast"}
+    assert all(s["calls"] == 0 and s["mean"] is None and s["p99"] is None for s in stats)
+    assert all(line.split()[-2:] == ["-", "-"] for line in profiler.to_table().splitlines()[2:])
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from trade_flow.feed import Stream
+from trade_flow.feed.feed import PushFeed
+
+
+def test_latency_keyed_by_position():
+    x = Stream.placeholder(dtype="float").rename("x")
+    y = Stream.placeholder(dtype="float").rename("y")
+    feed = PushFeed([x.abs(), y.abs(), (x + y).rename("sum")], instrument=True)
+
+    for i in range(3):
+        feed.push({"x": float(i), "y": -float(i)})
+
+    assert sorted(feed.latency) == sorted(f"{i}:{s.name}" for i, s in enumerate(feed.process))
+    assert len(feed.latency) == len(feed.process)
+    assert all(h.count == 3 for h in feed.latency.values())
+
+
+def make_feed(calls):
+    def counted(name):
+        def f(v):
+            calls[name] = calls.get(name, 0) + 1
+            return v
+
+        return f
+
+    x = Stream.placeholder(dtype="float").rename("x")
+    y = Stream.placeholder(dtype="float").rename("y")
+    return PushFeed(
+        [
+            x.apply(counted("fx")).rename("fx"),
+            y.apply(counted("fy")).rename("fy"),
+            (x * 2 + y).rename("combined"),
+            x.rolling(3).mean().rename("x_mean"),
+        ]
+    )
+
+
+def test_partial_push_recomputes_dependants_only():
+    calls = {}
+    feed = make_feed(calls)
+
+    assert feed.push({"x": 1.0}) is None
+    first = feed.push({"y": 10.0})
+    assert first == {"fx": 1.0, "fy": 10.0, "combined": 12.0, "x_mean": 1.0}
+    assert calls == {"fx": 1, "fy": 1}
+
+    second = feed.push({"x": 2.0})
+    assert calls == {"fx": 2, "fy": 1}
+    assert second == {"fx": 2.0, "fy": 10.0, "combined": 14.0, "x_mean": 1.5}
+
+    third = feed.push({"y": 20.0})
+    assert calls == {"fx": 2, "fy": 2}
+    # The rolling mean of x only advances when x is pushed.
+    assert third == {"fx": 2.0, "fy": 20.0, "combined": 24.0, "x_mean": 1.5}
+
+
+def test_incremental_pushes_match_full_recompute():
+    rng = np.random.RandomState(0)
+    feed = make_feed({})
+    last = {"x": 0.0, "y": 0.0}
+    xs = [0.0]
+    feed.push(last)
+
+    for _ in range(50):
+        keys = [k for k in ("x", "y") if rng.rand() < 0.6] or ["x"]
+        data = {k: float(rng.randint(100)) for k in keys}
+        last.update(data)
+        if "x" in data:
+            xs += [data["x"]]
+
+        # Every output computed from scratch from the values pushed so far.
+        expected = {
+            "fx": last["x"],
+            "fy": last["y"],
+            "combined": 2 * last["x"] + last["y"],
+            "x_mean": np.mean(xs[-3:]),
+        }
+        output = feed.push(data)
+        assert output.keys() == expected.keys()
+        for k, v in expected.items():
+            assert output[k] == pytest.approx(v)
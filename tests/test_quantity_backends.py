@@ -0,0 +1,76 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from trade_flow.core.exceptions import InvalidNegativeQuantity
+from trade_flow.environments.default.engine.instruments import Instrument, Quantity, FixedQuantity
+
+
+USD = Instrument("USD", 2, "U.S. Dollar")
+BTC = Instrument("BTC", 8, "Bitcoin")
+
+
+@pytest.fixture
+def fixed_backend():
+    with Quantity.using_backend("fixed"):
+        yield
+
+
+def random_sizes(seed, n=500):
+    rng = random.Random(seed)
+    return [Decimal(rng.randint(0, 10**10)).scaleb(-rng.randint(4, 10)) for _ in range(n)]
+
+
+def test_backend_selection(fixed_backend):
+    assert isinstance(Quantity(BTC, 1), FixedQuantity)
+    assert isinstance(2 * BTC, FixedQuantity)
+    with Quantity.using_backend("decimal"):
+        assert type(Quantity(BTC, 1)) is Quantity
+    assert isinstance(Quantity(BTC, 1), FixedQuantity)
+
+
+def test_unsupported_backend():
+    with pytest.raises(ValueError):
+        Quantity.set_backend("float")
+
+
+@pytest.mark.parametrize("instrument", [USD, BTC])
+def test_matches_decimal_reference(instrument):
+    sizes = random_sizes(seed=instrument.precision)
+    price = Decimal("12345.67")
+
+    for a, b in zip(sizes[::2], sizes[1::2]):
+        ref_a = Quantity(instrument, a).quantize()
+        ref_b = Quantity(instrument, b).quantize()
+        fixed_a = FixedQuantity(instrument, a)
+        fixed_b = FixedQuantity(instrument, b)
+
+        assert fixed_a.size == ref_a.size
+        assert (fixed_a + fixed_b).size == (ref_a + ref_b).quantize().size
+        assert (fixed_a < fixed_b) == (ref_a < ref_b)
+        assert (fixed_a == fixed_b) == (ref_a == ref_b)
+        assert (fixed_a * price).size == (ref_a * price).quantize().size
+        assert (fixed_a * 0.0025).size == (ref_a * 0.0025).quantize().size
+        assert str(fixed_a) == str(ref_a)
+        if ref_a >= ref_b:
+            assert (fixed_a - fixed_b).size == (ref_a - ref_b).quantize().size
+
+
+def test_exact_units():
+    q = FixedQuantity(BTC, Decimal("0.1")) + FixedQuantity(BTC, Decimal("0.2"))
+
+    assert q.units == 30000000
+    assert q == Decimal("0.3")
+    assert q.as_float() == 0.3
+
+
+def test_negative_sizes():
+    assert FixedQuantity(BTC, Decimal("-0.00000001")).units == 0
+    with pytest.raises(InvalidNegativeQuantity):
+        FixedQuantity(BTC, 1) - FixedQuantity(BTC, 2)
+
+
+def test_overflow():
+    with pytest.raises(OverflowError):
+        FixedQuantity(BTC, 10**12)
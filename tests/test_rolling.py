@@ -0,0 +1,45 @@
+import numpy as np
+
+from trade_flow.feed import DataFeed, Stream
+
+
+def test_value_is_window_newest_first():
+    x = Stream.source([1.0, 2.0, 3.0, 4.0, 5.0], dtype="float").rename("x")
+    window = x.rolling(3).rename("window")
+    feed = DataFeed([window, window.apply(lambda w: w[0] - w[-1]).rename("spread")])
+    feed.compile()
+
+    rows = [feed.next() for _ in range(5)]
+    assert [r["window"] for r in rows] == [
+        [1.0],
+        [2.0, 1.0],
+        [3.0, 2.0, 1.0],
+        [4.0, 3.0, 2.0],
+        [5.0, 4.0, 3.0],
+    ]
+    assert [r["spread"] for r in rows] == [0.0, 1.0, 2.0, 2.0, 2.0]
+
+    # Values kept from earlier steps are not overwritten.
+    assert rows[2]["window"] == [3.0, 2.0, 1.0]
+
+
+def test_vectorized_windows_newest_first():
+    data = [1.0, np.nan, 3.0, 4.0, 5.0, 6.0]
+    x = Stream.source(data, dtype="float")
+    streams = [
+        x.rolling(3).sum().rename("sum"),
+        x.rolling(3, min_periods=2).mean().rename("mean"),
+        x.rolling(3).agg(np.nanmedian).rename("median"),
+        x.rolling(3).count().rename("count"),
+    ]
+
+    values = {}
+    for mode in ("step", "vectorized"):
+        feed = DataFeed(streams)
+        feed.compile(mode)
+        values[mode] = [feed.next() for _ in range(len(data))]
+
+    for name in ("sum", "mean", "median", "count"):
+        np.testing.assert_allclose(
+            [r[name] for r in values["step"]], [r[name] for r in values["vectorized"]]
+        )
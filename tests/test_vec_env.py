@@ -0,0 +1,66 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+pytest.importorskip("stable_baselines3")
+
+from trade_flow.environments.generic.vec_env import SharedMemoryVecEnv
+
+
+class CountingEnv(gym.Env):
+    """A small environment whose observation counts its steps."""
+
+    observation_space = gym.spaces.Box(-np.inf, np.inf, shape=(2,), dtype=np.float32)
+    action_space = gym.spaces.Discrete(3)
+
+    def __init__(self, length: int = 5):
+        self.length = length
+        self.t = 0
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.t = 0
+        return np.array([self.t, 0], dtype=np.float32), {"step": self.t}
+
+    def step(self, action):
+        self.t += 1
+        obs = np.array([self.t, action], dtype=np.float32)
+        return obs, float(action), self.t >= self.length, False, {"step": self.t}
+
+    def payload(self, size: int) -> bytes:
+        return bytes(size)
+
+
+@pytest.fixture
+def venv():
+    venv = SharedMemoryVecEnv([CountingEnv] * 3, start_method="fork", timeout=30)
+    yield venv
+    venv.close()
+
+
+def test_step_matches_sequential_envs(venv):
+    envs = [CountingEnv() for _ in range(3)]
+    obs = venv.reset()
+    assert np.array_equal(obs, np.stack([env.reset()[0] for env in envs]))
+
+    for t in range(7):
+        actions = np.array([t % 3, (t + 1) % 3, (t + 2) % 3])
+        obs, rewards, dones, infos = venv.step(actions)
+        for i, env in enumerate(envs):
+            expected, reward, terminated, truncated, _ = env.step(int(actions[i]))
+            if terminated or truncated:
+                assert np.array_equal(infos[i]["terminal_observation"], expected)
+                expected, _ = env.reset()
+            assert np.array_equal(obs[i], expected)
+            assert rewards[i] == reward
+            assert dones[i] == (terminated or truncated)
+
+
+def test_large_call_results(venv):
+    size = 16 * 2**20
+    results = venv.env_method("payload", size, indices=[0, 2])
+    assert [len(result) for result in results] == [size, size]
+
+    venv.set_attr("blob", bytes(size), indices=1)
+    assert len(venv.get_attr("blob", indices=1)[0]) == size
+    assert venv.get_attr("length") == [5, 5, 5]
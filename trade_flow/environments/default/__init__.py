@@ -52,7 +52,9 @@ def create(
         Whether to randomize the starting point within the environment at each
         observer reset, starting in the first X percentage of the sample
     **kwargs : keyword arguments
-        Extra keyword arguments needed to build the environment.
+        Extra keyword arguments needed to build the environment, such as
+        `feed_mode`, the mode to compile the `feed` in, `"step"` (default) or
+        `"vectorized"`, see `observers.TradeFlowObserver`.
 
     Returns
     -------
@@ -71,6 +73,7 @@ def create(
         renderer_feed=kwargs.get("renderer_feed", None),
         window_size=window_size,
         min_periods=min_periods,
+        mode=kwargs.get("feed_mode", "step"),
     )
 
     stopper = stoppers.MaxLossStopper(max_allowed_loss=kwargs.get("max_allowed_loss", 0.5))
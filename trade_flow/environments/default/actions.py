@@ -1,7 +1,7 @@
 import logging
 from abc import abstractmethod
 from itertools import product
-from typing import Union, List, Any
+from typing import Union, List, Any, Dict
 
 from gymnasium.spaces import Space, Discrete
 
@@ -113,6 +113,27 @@ class TradeFlowActionScheme(ActionScheme):
         """
         raise NotImplementedError()
 
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the state of the portfolio and of the broker.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the action scheme.
+        """
+        return {"portfolio": self.portfolio.snapshot(), "broker": self.broker.snapshot()}
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the portfolio and the broker to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the action scheme.
+        """
+        self.portfolio.restore(state["portfolio"])
+        self.broker.restore(state["broker"])
+
     def reset(self) -> None:
         """Resets the action scheme."""
         self.portfolio.reset()
@@ -169,6 +190,15 @@ class BSH(TradeFlowActionScheme):
 
         return [order]
 
+    def snapshot(self) -> "Dict[str, Any]":
+        state = super().snapshot()
+        state["action"] = self.action
+        return state
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        super().restore(state)
+        self.action = state["action"]
+
     def reset(self):
         super().reset()
         self.action = 0
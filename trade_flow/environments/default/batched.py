@@ -0,0 +1,433 @@
+"""
+A vectorized environment stepping many episodes of the default environment at once.
+
+Dependencies:
+    - Stable Baselines3
+"""
+
+from typing import Any, List, Sequence, Union
+
+import numpy as np
+
+from gymnasium.spaces import Box
+from stable_baselines3.common.vec_env import VecEnv
+
+from trade_flow.feed import Stream, DataFeed
+from trade_flow.environments.default import actions, rewards
+from trade_flow.environments.default.engine.orders import TradeSide, TradeType
+from trade_flow.environments.default.engine.portfolio import Portfolio
+
+
+class BatchedTradingEnv(VecEnv):
+    """A vectorized environment holding `num_envs` episodes of the default
+    environment as arrays and stepping them all at once.
+
+    Instead of one object graph of feed, portfolio, broker and observer per
+    environment, the state of every episode is kept as a row of a few arrays:
+    the cursor of each episode into the data, and the balances of each wallet
+    as integer numbers of the smallest units of its instrument. The features
+    and prices are computed once with a vectorized `DataFeed` and shared by
+    every episode. Each step executes the market orders of all the episodes,
+    values the portfolios and gathers the observation windows with NumPy
+    operations.
+
+    Only the action schemes whose orders are filled in the step they are
+    placed can be batched, i.e. `BSH` and `SimpleOrders` with market orders
+    and no criteria, together with the `SimpleProfit` reward scheme. Episodes
+    stop, as with `MaxLossStopper`, when they lose `max_allowed_loss` of their
+    initial net worth or run out of data, and are then reset automatically.
+    The portfolio must hold exactly one wallet of its base instrument.
+
+    Parameters
+    ----------
+    num_envs : int
+        The number of episodes to run at once.
+    portfolio : `Portfolio`
+        The portfolio whose wallets, exchanges and initial balances every
+        episode starts with.
+    action_scheme : `actions.TradeFlowActionScheme` or str
+        The action scheme to interpret actions with, either `BSH` or
+        `SimpleOrders`.
+    reward_scheme : `rewards.TradeFlowRewardScheme` or str
+        The reward scheme, which must be `SimpleProfit`.
+    feed : `DataFeed`
+        The feed for generating observations to be used in the look back
+        window.
+    window_size : int, default 1
+        The size of the look back window to use for the observation space.
+    min_periods : int, optional
+        The minimum number of steps to warm up the `feed`.
+    random_start_pct : float, default 0.0
+        Whether to randomize the starting point of each episode at reset,
+        starting in the first X percentage of the sample.
+    max_allowed_loss : float, default 0.5
+        The maximum percentage of initial funds that is willing to be lost
+        before stopping an episode.
+    dtype : `np.dtype`, default `np.float32`
+        The data type of the observations.
+    seed : int, optional
+        The seed of the random starting points.
+
+    Attributes
+    ----------
+    cash : `np.ndarray`
+        The balance of the wallet of the base instrument of each episode, in
+        units of the base instrument.
+    assets : `np.ndarray`
+        The balance of each other wallet of each episode, with shape
+        `(num_envs, n_assets)`, in units of their instruments.
+    net_worth : `np.ndarray`
+        The net worth of each episode.
+    cursor : `np.ndarray`
+        The index of the latest row of data observed by each episode.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        portfolio: "Portfolio",
+        action_scheme: "Union[actions.TradeFlowActionScheme, str]",
+        reward_scheme: "Union[rewards.TradeFlowRewardScheme, str]",
+        feed: "DataFeed",
+        window_size: int = 1,
+        min_periods: int = None,
+        random_start_pct: float = 0.00,
+        max_allowed_loss: float = 0.5,
+        dtype: "np.dtype" = np.float32,
+        seed: int = None,
+    ) -> None:
+        action_scheme = actions.get(action_scheme) if isinstance(action_scheme, str) else action_scheme
+        reward_scheme = rewards.get(reward_scheme) if isinstance(reward_scheme, str) else reward_scheme
+        action_scheme.portfolio = portfolio
+
+        if not isinstance(reward_scheme, rewards.SimpleProfit):
+            raise ValueError("Only the `SimpleProfit` reward scheme can be batched.")
+
+        base = portfolio.base_instrument
+        cash = [w for w in portfolio.wallets if w.instrument == base]
+        assets = [w for w in portfolio.wallets if w.instrument != base]
+        if len(cash) != 1:
+            raise ValueError(f"The portfolio must hold exactly one wallet of {base}.")
+
+        self.window_size = window_size
+        self.min_periods = min_periods
+        self.random_start_pct = random_start_pct
+        self.max_allowed_loss = max_allowed_loss
+        self.reward_window_size = reward_scheme._window_size
+
+        # Shared data
+        features = Stream.group(feed.inputs).rename("external")
+        features.columnar(dtype)
+        prices = Stream.group(
+            [
+                Stream.select(w.exchange.streams(), lambda s, w=w: s.name.endswith(w.instrument.symbol))
+                for w in assets
+            ]
+        ).rename("prices")
+        prices.columnar(np.float64)
+
+        data = DataFeed([features, prices])
+        data.compile("vectorized")
+        data.reset()
+        data = data.next_n(data.source_length)
+
+        self.features = np.nan_to_num(data["external"])
+        self.prices = data["prices"]
+        self.n_steps = len(self.features)
+
+        # Instruments and exchanges
+        self._base_scale = 10**base.precision
+        self._asset_scale = np.array([10**w.instrument.precision for w in assets], dtype=np.float64)
+        self._commission = np.array([w.exchange.options.commission for w in assets])
+        self._max_trade_size = np.array([w.exchange.options.max_trade_size for w in assets])
+        self._initial_cash = round(cash[0].balance.size * self._base_scale)
+        self._initial_assets = np.array(
+            [round(w.balance.size * 10**w.instrument.precision) for w in assets], dtype=np.int64
+        )
+
+        self._compile_actions(action_scheme, portfolio, assets)
+
+        observation_space = Box(
+            low=-np.inf, high=np.inf, shape=(window_size, self.features.shape[1]), dtype=dtype
+        )
+        self.render_mode = None
+        super().__init__(num_envs, observation_space, action_scheme.action_space)
+
+        self.cash = np.zeros(num_envs, dtype=np.int64)
+        self.assets = np.zeros((num_envs, len(assets)), dtype=np.int64)
+        self.net_worth = np.zeros(num_envs)
+        self.initial_net_worth = np.zeros(num_envs)
+        self.cursor = np.zeros(num_envs, dtype=np.int64)
+        self.start = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.position = np.zeros(num_envs, dtype=np.int64)
+        self._net_worths = np.zeros((num_envs, self.reward_window_size + 1))
+        self._recorded = np.zeros(num_envs, dtype=np.int64)
+        self._window = np.arange(1 - window_size, 1)
+        self._actions = None
+
+        self._rng = np.random.default_rng(seed)
+
+    def _compile_actions(
+        self, action_scheme: "actions.TradeFlowActionScheme", portfolio: "Portfolio", assets: list
+    ) -> None:
+        """Translates the action scheme into arrays indexed by action.
+
+        Parameters
+        ----------
+        action_scheme : `actions.TradeFlowActionScheme`
+            The action scheme to translate.
+        portfolio : `Portfolio`
+            The portfolio of the action scheme.
+        assets : list
+            The wallets of the portfolio not holding the base instrument.
+        """
+        if isinstance(action_scheme, actions.BSH):
+            if len(assets) != 1 or action_scheme.asset is not assets[0]:
+                raise ValueError("A batched `BSH` must trade the only asset wallet of the portfolio.")
+            self._scheme = "bsh"
+            return
+
+        if not isinstance(action_scheme, actions.SimpleOrders):
+            raise ValueError("Only the `BSH` and `SimpleOrders` action schemes can be batched.")
+        if action_scheme._trade_type != TradeType.MARKET or any(action_scheme.criteria):
+            raise ValueError("Only `SimpleOrders` placing market orders without criteria can be batched.")
+
+        # The action space builds the list of actions the first time it is read.
+        n = action_scheme.action_space.n
+        symbols = [w.instrument.symbol for w in assets]
+
+        self._scheme = "simple"
+        self._action_asset = np.zeros(n, dtype=np.int64)
+        self._action_side = np.zeros(n, dtype=np.int64)
+        self._action_proportion = np.zeros(n)
+        for i, a in enumerate(action_scheme.actions[1:], start=1):
+            ep, (_, proportion, _, side) = a
+            self._action_asset[i] = symbols.index(ep.pair.quote.symbol)
+            self._action_side[i] = 1 if side == TradeSide.BUY else -1
+            self._action_proportion[i] = proportion
+
+        self.min_order_pct = action_scheme.min_order_pct
+        self.min_order_abs = action_scheme.min_order_abs
+
+    def reset(self) -> "np.ndarray":
+        """Resets every episode.
+
+        Returns
+        -------
+        `np.ndarray`
+            The first observation of each episode.
+        """
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._observe()
+
+    def step_async(self, actions: "np.ndarray") -> None:
+        self._actions = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self) -> "tuple":
+        """Steps every episode with the actions given to `step_async`.
+
+        Returns
+        -------
+        obs : `np.ndarray`
+            The observation of each episode, or the first observation of the
+            next episode for the episodes that are done.
+        rewards : `np.ndarray`
+            The reward of each episode.
+        dones : `np.ndarray`
+            Whether each episode is done.
+        infos : `List[dict]`
+            The step and net worth of each episode, along with the last
+            observation of the episodes that are done.
+        """
+        asset, side, size = self._orders(self._actions)
+        self._execute(asset, side, size)
+
+        self.cursor += 1
+        self.steps += 1
+        self.net_worth = self._value(self.cursor)
+        rewards = self._reward()
+
+        dones = (1.0 - self.net_worth / self.initial_net_worth > self.max_allowed_loss) | (
+            self.cursor + 1 >= self.n_steps
+        )
+
+        obs = self._observe()
+        infos = [{"step": int(s), "net_worth": float(nw)} for s, nw in zip(self.steps, self.net_worth)]
+
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = False
+            self._reset_envs(dones)
+            obs[dones] = self._observe(dones)
+
+        return obs, rewards.astype(np.float32), dones, infos
+
+    def _orders(self, actions: "np.ndarray") -> "tuple":
+        """Interprets the actions of every episode as market orders.
+
+        Parameters
+        ----------
+        actions : `np.ndarray`
+            The action of each episode.
+
+        Returns
+        -------
+        asset : `np.ndarray`
+            The asset traded by each episode.
+        side : `np.ndarray`
+            1 for episodes buying the asset, -1 for episodes selling it and 0
+            for episodes placing no order.
+        size : `np.ndarray`
+            The size of each order, in units of the instrument being sold.
+        """
+        n = self.num_envs
+        if self._scheme == "bsh":
+            asset = np.zeros(n, dtype=np.int64)
+            balance = np.where(self.position == 0, self.cash, self.assets[:, 0])
+            trade = (actions != self.position) & (balance != 0)
+            side = np.where(trade, np.where(self.position == 0, 1, -1), 0)
+            self.position = np.where(trade, actions, self.position)
+            return asset, side, np.where(trade, balance, 0)
+
+        asset = self._action_asset[actions]
+        side = self._action_side[actions]
+        rows = np.arange(n)
+        scale = np.where(side > 0, self._base_scale, self._asset_scale[asset])
+        balance = np.where(side > 0, self.cash, self.assets[rows, asset]) / scale
+        size = np.minimum(balance * self._action_proportion[actions], balance)
+
+        side = np.where(
+            (size < 1 / scale)
+            | (size < self.min_order_pct * self.net_worth)
+            | (size < self.min_order_abs),
+            0,
+            side,
+        )
+        return asset, side, np.where(side != 0, np.rint(size * scale), 0).astype(np.int64)
+
+    def _execute(self, asset: "np.ndarray", side: "np.ndarray", size: "np.ndarray") -> None:
+        """Fills the market orders of every episode at the current prices.
+
+        Parameters
+        ----------
+        asset : `np.ndarray`
+            The asset traded by each episode.
+        side : `np.ndarray`
+            1 for episodes buying the asset, -1 for episodes selling it and 0
+            for episodes placing no order.
+        size : `np.ndarray`
+            The size of each order, in units of the instrument being sold.
+        """
+        active = np.flatnonzero(side)
+        if len(active) == 0:
+            return
+
+        asset, side, size = asset[active], side[active], size[active]
+        buy = side > 0
+        price_scale = self._base_scale
+        price = np.rint(self.prices[self.cursor[active], asset] * price_scale)
+        asset_scale = self._asset_scale[asset]
+        max_trade_size = self._max_trade_size[asset]
+
+        filled = np.where(
+            buy,
+            np.minimum(size, max_trade_size * price_scale),
+            np.where(
+                size * price / (asset_scale * price_scale) < max_trade_size,
+                size,
+                np.floor(max_trade_size * price_scale * asset_scale / price),
+            ),
+        )
+
+        commission_rate = self._commission[asset]
+        commission = filled * commission_rate
+        minimum = (commission_rate > 0) & (commission < 1)
+        quantity = np.where(minimum, filled - 1, np.rint(filled - commission))
+        commission = np.where(minimum, 1, np.rint(commission))
+        quantity = np.minimum(quantity, filled - commission)
+
+        converted = np.where(
+            buy,
+            np.rint(quantity * asset_scale / price),
+            np.rint(quantity * price / asset_scale),
+        )
+
+        debit = (quantity + commission).astype(np.int64)
+        converted = converted.astype(np.int64)
+        rows = active[buy]
+        self.cash[rows] -= debit[buy]
+        self.assets[rows, asset[buy]] += converted[buy]
+        rows = active[~buy]
+        self.assets[rows, asset[~buy]] -= debit[~buy]
+        self.cash[rows] += converted[~buy]
+
+    def _value(self, rows: "np.ndarray", envs: "np.ndarray" = None) -> "np.ndarray":
+        """Values the portfolios of the episodes at the given rows of data."""
+        envs = slice(None) if envs is None else envs
+        worth = (self.assets[envs] / self._asset_scale * self.prices[rows]).sum(axis=1)
+        return self.cash[envs] / self._base_scale + worth
+
+    def _reward(self) -> "np.ndarray":
+        """Records the net worths and computes the `SimpleProfit` rewards."""
+        w = self.reward_window_size + 1
+        rows = np.arange(self.num_envs)
+        self._net_worths[rows, self._recorded % w] = self.net_worth
+        self._recorded += 1
+
+        lag = np.minimum(self._recorded, w)
+        previous = self._net_worths[rows, (self._recorded - lag) % w]
+        return np.where(self._recorded > 1, self.net_worth / previous - 1.0, 0.0)
+
+    def _observe(self, envs: "np.ndarray" = None) -> "np.ndarray":
+        """Gathers the observation windows of the episodes."""
+        envs = slice(None) if envs is None else envs
+        rows = self.cursor[envs, None] + self._window
+        obs = self.features[np.maximum(rows, 0)]
+        obs[rows < self.start[envs, None]] = 0
+        return obs
+
+    def _reset_envs(self, envs: "np.ndarray") -> None:
+        """Starts new episodes for the selected environments."""
+        n = int(envs.sum())
+        high = int(self.n_steps * self.random_start_pct) if self.random_start_pct > 0 else 0
+        start = self._rng.integers(0, high + 1, size=n)
+
+        self.start[envs] = start
+        self.cursor[envs] = start + (self.min_periods or 0)
+        self.steps[envs] = 0
+        self.position[envs] = 0
+        self.cash[envs] = self._initial_cash
+        self.assets[envs] = self._initial_assets
+
+        self.initial_net_worth[envs] = self._value(start, envs)
+        self.net_worth[envs] = self._value(self.cursor[envs], envs)
+        self._net_worths[envs, 0] = self.net_worth[envs]
+        self._recorded[envs] = 1
+
+    def seed(self, seed: int = None) -> "List[int]":
+        self._rng = np.random.default_rng(seed)
+        return [seed] * self.num_envs
+
+    def close(self) -> None:
+        pass
+
+    def get_attr(self, attr_name: str, indices: "Union[None, int, Sequence[int]]" = None) -> "List[Any]":
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name: str, value: Any, indices: "Union[None, int, Sequence[int]]" = None) -> None:
+        setattr(self, attr_name, value)
+
+    def env_method(
+        self,
+        method_name: str,
+        *method_args,
+        indices: "Union[None, int, Sequence[int]]" = None,
+        **method_kwargs,
+    ) -> "List[Any]":
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class: type, indices: "Union[None, int, Sequence[int]]" = None) -> "List[bool]":
+        return [False] * len(self._get_indices(indices))
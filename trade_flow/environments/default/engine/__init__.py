@@ -8,6 +8,7 @@ from .orders import *
 from .exchanges import *
 from .wallet import *
 from .ledger import *
+from .performance import *
 from .portfolio import *
 from . import execution
 from . import slippage
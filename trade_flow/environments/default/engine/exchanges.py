@@ -13,11 +13,12 @@
 # limitations under the License.
 
 
-from typing import Callable
+from typing import Callable, Dict
 from decimal import Decimal
 
 from trade_flow.core import Component, TimedIdentifiable
 from trade_flow.environments.default.engine.instruments import TradingPair
+from trade_flow.environments.default.engine.instruments.instrument import registry
 
 
 class ExchangeOptions:
@@ -67,6 +68,12 @@ class Exchange(Component, TimedIdentifiable):
         The service to be used for filling orders.
     options : `ExchangeOptions`
         The options used to specify the setting of the exchange.
+
+    Notes
+    -----
+    Quoted prices are cached for the current step. The quantized price of a
+    pair is computed the first time it is quoted in a step and reused until
+    the clock advances or the value of its price stream changes.
     """
 
     registered_name = "exchanges"
@@ -77,6 +84,7 @@ class Exchange(Component, TimedIdentifiable):
         self._service = service
         self.options = options if options else ExchangeOptions()
         self._price_streams = {}
+        self._quotes = {}
 
     def __call__(self, *streams) -> "Exchange":
         """Sets up the price streams used to generate the prices.
@@ -120,7 +128,50 @@ class Exchange(Component, TimedIdentifiable):
         `Decimal`
             The quote price of the specified trading pair, denoted in the core instrument.
         """
-        price = Decimal(self._price_streams[str(trading_pair)].value)
+        key = str(trading_pair)
+        value = self._price_streams[key].value
+        step = self.clock.step
+
+        quote = self._quotes.get(key)
+        if quote is not None and quote[0] == step and quote[1] == value:
+            return quote[2]
+
+        price = self._quantize(trading_pair, value)
+        self._quotes[key] = (step, value, price)
+        return price
+
+    def quote_prices(self) -> "Dict[str, Decimal]":
+        """The quote prices of every trading pair on the exchange, denoted in
+        the core instrument.
+
+        Returns
+        -------
+        `Dict[str, Decimal]`
+            The quote price of each trading pair, keyed by the name of the pair.
+        """
+        prices = {}
+        for key in self._price_streams.keys():
+            base, quote = key.split("/")
+            prices[key] = self.quote_price(TradingPair(registry[base], registry[quote]))
+        return prices
+
+    @staticmethod
+    def _quantize(trading_pair: "TradingPair", value: float) -> "Decimal":
+        """Converts the value of a price stream into a quantized price.
+
+        Parameters
+        ----------
+        trading_pair : `TradingPair`
+            The trading pair of the price.
+        value : float
+            The value of the price stream of the trading pair.
+
+        Returns
+        -------
+        `Decimal`
+            The price quantized to the precision of the base instrument.
+        """
+        price = Decimal(value)
         if price == 0:
             raise ValueError(
                 "Price of trading pair {} is 0. Please check your input data to make sure there always is "
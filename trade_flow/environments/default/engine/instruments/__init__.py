@@ -1,5 +1,6 @@
 from .exchange_pair import ExchangePair
 from .instrument import *
 from .quantity import Quantity
+from .quantity import FixedQuantity as FixedQuantity
 from .trading_pair import TradingPair
 
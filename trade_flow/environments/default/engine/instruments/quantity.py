@@ -14,10 +14,11 @@
 
 import operator
 
-from typing import Union, Tuple, Callable, TypeVar
+from typing import TYPE_CHECKING, Union, Tuple, Callable, TypeVar, Iterator
 from numbers import Number
-from decimal import Decimal, ROUND_DOWN
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_EVEN
 from functools import total_ordering
+from contextlib import contextmanager
 
 from trade_flow.core.exceptions import (
     InvalidNegativeQuantity,
@@ -26,6 +27,10 @@ from trade_flow.core.exceptions import (
     QuantityOpPathMismatch,
 )
 
+if TYPE_CHECKING:
+    from trade_flow.environments.default.engine.instruments.exchange_pair import ExchangePair
+    from trade_flow.environments.default.engine.instruments.instrument import Instrument
+
 
 T = TypeVar("T")
 
@@ -48,8 +53,23 @@ class Quantity:
     ------
     InvalidNegativeQuantity
         Raised if the `size` of the quantity being created is negative.
+
+    Notes
+    -----
+    Sizes are stored as `Decimal` by default. When the `"fixed"` backend is
+    selected with `Quantity.set_backend`, creating a `Quantity` gives a
+    `FixedQuantity` instead, which stores its size as an integer number of
+    the smallest units of its instrument.
     """
 
+    backends = ("decimal", "fixed")
+    backend = "decimal"
+
+    def __new__(cls, *args, **kwargs) -> "Quantity":
+        if cls is Quantity and (args or kwargs) and Quantity.backend == "fixed":
+            cls = FixedQuantity
+        return object.__new__(cls)
+
     def __init__(self, instrument: "Instrument", size: Decimal, path_id: str = None):
         if size < 0:
             if abs(size) > Decimal(10) ** (-instrument.precision):
@@ -61,6 +81,42 @@ class Quantity:
         self.size = size if isinstance(size, Decimal) else Decimal(size)
         self.path_id = path_id
 
+    @classmethod
+    def set_backend(cls, backend: str) -> None:
+        """Sets the backend used to represent the size of new quantities.
+
+        Parameters
+        ----------
+        backend : str
+            Either `"decimal"` to store sizes as `Decimal`, or `"fixed"` to
+            store them as integers scaled by the precision of the instrument.
+
+        Raises
+        ------
+        ValueError
+            Raised if the backend is not supported.
+        """
+        if backend not in cls.backends:
+            raise ValueError(f"Unsupported quantity backend: {backend}. Use one of {cls.backends}.")
+        Quantity.backend = backend
+
+    @classmethod
+    @contextmanager
+    def using_backend(cls, backend: str) -> "Iterator[None]":
+        """Temporarily sets the backend used to represent the size of new quantities.
+
+        Parameters
+        ----------
+        backend : str
+            The backend to use inside the context.
+        """
+        previous = Quantity.backend
+        cls.set_backend(backend)
+        try:
+            yield
+        finally:
+            Quantity.backend = previous
+
     @property
     def is_locked(self) -> bool:
         """If quantity is locked for an order. (bool, read-only)"""
@@ -323,3 +379,199 @@ class Quantity:
 
     def __repr__(self) -> str:
         return str(self)
+
+
+class FixedQuantity(Quantity):
+    """A size of a financial instrument stored as a fixed-point integer.
+
+    The size is kept as the number of the smallest units of the instrument,
+    e.g. 1.5 BTC with a precision of 8 is stored as 150000000, so it is always
+    quantized and adding, subtracting and comparing quantities is exact
+    integer arithmetic. Sizes with more digits than the precision of the
+    instrument are rounded half to even, like `Quantity.quantize` does.
+
+    Parameters
+    ----------
+    instrument : `Instrument`
+        The unit of the quantity.
+    size : `Union[Decimal, Number]`
+        The number of units of the instrument.
+    path_id : str, optional
+        The path order_id that this quantity is allocated for and associated
+        with.
+
+    Attributes
+    ----------
+    units : int
+        The size as a number of the smallest units of the instrument.
+
+    Raises
+    ------
+    InvalidNegativeQuantity
+        Raised if the `size` of the quantity being created is negative.
+    OverflowError
+        Raised if the units of the size do not fit in a signed 64-bit integer.
+    """
+
+    max_units = 2**63 - 1
+
+    def __init__(self, instrument: "Instrument", size: "Union[Decimal, Number]", path_id: str = None):
+        if size < 0:
+            if abs(size) > Decimal(10) ** (-instrument.precision):
+                raise InvalidNegativeQuantity(float(size))
+            else:
+                size = 0
+
+        self.instrument = instrument
+        self.units = FixedQuantity.to_units(size, instrument.precision)
+        self.path_id = path_id
+
+    @classmethod
+    def from_units(cls, instrument: "Instrument", units: int, path_id: str = None) -> "FixedQuantity":
+        """Creates a quantity from a number of the smallest units of an instrument.
+
+        Parameters
+        ----------
+        instrument : `Instrument`
+            The unit of the quantity.
+        units : int
+            The size as a number of the smallest units of the instrument.
+        path_id : str, optional
+            The path order_id that this quantity is allocated for and associated
+            with.
+
+        Returns
+        -------
+        `FixedQuantity`
+            The quantity.
+        """
+        if units < 0:
+            if units < -1:
+                raise InvalidNegativeQuantity(float(Decimal(units).scaleb(-instrument.precision)))
+            units = 0
+        elif units > cls.max_units:
+            raise OverflowError(f"Quantity of {units} units of {instrument} does not fit in 64 bits.")
+
+        quantity = object.__new__(cls)
+        quantity.instrument = instrument
+        quantity.units = units
+        quantity.path_id = path_id
+        return quantity
+
+    @classmethod
+    def to_units(cls, size: "Union[Decimal, Number]", precision: int) -> int:
+        """Converts a size into a number of the smallest units of an instrument.
+
+        Parameters
+        ----------
+        size : `Union[Decimal, Number]`
+            The size to convert.
+        precision : int
+            The precision of the instrument.
+
+        Returns
+        -------
+        int
+            The size in units, rounded half to even.
+        """
+        if isinstance(size, int):
+            units = size * 10**precision
+        else:
+            size = size if isinstance(size, Decimal) else Decimal(size)
+            units = int(size.scaleb(precision).to_integral_value(ROUND_HALF_EVEN))
+        if abs(units) > cls.max_units:
+            raise OverflowError(f"Size {size} with precision {precision} does not fit in 64 bits.")
+        return units
+
+    @property
+    def size(self) -> "Decimal":
+        """The number of units of the instrument. (`Decimal`)"""
+        return Decimal(self.units).scaleb(-self.instrument.precision)
+
+    @size.setter
+    def size(self, size: "Union[Decimal, Number]") -> None:
+        self.units = FixedQuantity.to_units(size, self.instrument.precision)
+
+    def lock_for(self, path_id: str) -> "FixedQuantity":
+        return FixedQuantity.from_units(self.instrument, self.units, path_id)
+
+    def free(self) -> "FixedQuantity":
+        return FixedQuantity.from_units(self.instrument, self.units)
+
+    def quantize(self) -> "FixedQuantity":
+        return FixedQuantity.from_units(self.instrument, self.units, self.path_id)
+
+    def as_float(self) -> float:
+        return self.units / 10**self.instrument.precision
+
+    def _units_op(self, other: "Union[Quantity, Number]", op: "Callable[[int, int], T]") -> "T":
+        """Performs an operation on the units of this quantity and another
+        fixed-point quantity, converting numbers to the instrument first.
+
+        Parameters
+        ----------
+        other : `Union[FixedQuantity, Number]`
+            The right argument of the operation.
+        op : `Callable[[int, int], T]`
+            The operation to perform on the units.
+
+        Returns
+        -------
+        T
+            The result of performing `op` on the units of both arguments.
+        """
+        if not isinstance(other, FixedQuantity):
+            other = FixedQuantity(self.instrument, other, self.path_id)
+        left, right = Quantity.validate(self, other)
+        return op(left.units, right.units)
+
+    def _math_units_op(
+        self, other: "Union[Quantity, Number]", op: "Callable[[int, int], int]"
+    ) -> "Quantity":
+        if not isinstance(other, (FixedQuantity, Number)):
+            return Quantity._math_op(self, other, op)
+        units = self._units_op(other, op)
+        return FixedQuantity.from_units(self.instrument, units, self.path_id)
+
+    def _bool_units_op(self, other: "Union[Quantity, Number]", op: "Callable[[int, int], bool]") -> bool:
+        if isinstance(other, FixedQuantity):
+            return self._units_op(other, op)
+        if isinstance(other, int):
+            return op(self.units, other * 10**self.instrument.precision)
+        if isinstance(other, Number):
+            # Numbers are compared exactly rather than rounded to the precision.
+            return op(self.size, other)
+        return Quantity._bool_op(self, other, op)
+
+    def __add__(self, other: "Union[Quantity, Number]") -> "Quantity":
+        return self._math_units_op(other, operator.add)
+
+    def __sub__(self, other: "Union[Quantity, Number]") -> "Quantity":
+        return self._math_units_op(other, operator.sub)
+
+    def __iadd__(self, other: "Union[Quantity, Number]") -> "Quantity":
+        return self._math_units_op(other, operator.add)
+
+    def __isub__(self, other: "Union[Quantity, Number]") -> "Quantity":
+        return self._math_units_op(other, operator.sub)
+
+    def __mul__(self, other: "Union[Quantity, Number]") -> "Quantity":
+        if isinstance(other, int):
+            return FixedQuantity.from_units(self.instrument, self.units * other, self.path_id)
+        if isinstance(other, Number) and not isinstance(other, Quantity):
+            other = other if isinstance(other, Decimal) else Decimal(other)
+            units = int((self.units * other).to_integral_value(ROUND_HALF_EVEN))
+            return FixedQuantity.from_units(self.instrument, units, self.path_id)
+        return Quantity._math_op(self, other, operator.mul)
+
+    def __rmul__(self, other: "Union[Quantity, Number]") -> "Quantity":
+        return FixedQuantity.__mul__(self, other)
+
+    def __lt__(self, other: "Union[Quantity, Number]") -> bool:
+        return self._bool_units_op(other, operator.lt)
+
+    def __eq__(self, other: "Union[Quantity, Number]") -> bool:
+        return self._bool_units_op(other, operator.eq)
+
+    def __ne__(self, other: "Union[Quantity, Number]") -> bool:
+        return self._bool_units_op(other, operator.ne)
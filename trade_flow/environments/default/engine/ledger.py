@@ -1,9 +1,23 @@
 
-from typing import List
+import itertools
+
+from typing import Any, Dict, Iterator, List
 from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_EVEN
 
+import numpy as np
 import pandas as pd
 
+from trade_flow.environments.default.engine.instruments import Quantity, FixedQuantity
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 
 Transaction = namedtuple('Transaction', [
     'poid',
@@ -20,10 +34,30 @@ Transaction = namedtuple('Transaction', [
 
 class Ledger:
     """A ledger to keep track of transactions that occur in the order
-    management system."""
+    management system.
+
+    Transactions are appended into typed columns that grow by doubling their
+    capacity. Strings are stored as codes into categories, and quantities as
+    64-bit integers scaled by the precision of the instrument of the wallet,
+    e.g. 1.5 BTC with a precision of 8 is stored as 150000000.
+
+    Parameters
+    ----------
+    capacity : int, default 1024
+        The number of transactions to preallocate room for.
+    """
 
-    def __init__(self):
-        self.transactions: 'List[Transaction]' = []
+    categorical = ['poid', 'source', 'target', 'memo', 'wallet', 'instrument']
+    quantities = ['amount', 'free', 'locked', 'locked_poid']
+
+    missing = np.iinfo(np.int64).min
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self.reset()
+
+    def __len__(self) -> int:
+        return self._size
 
     def commit(self,
                wallet: 'Wallet',
@@ -49,23 +83,162 @@ class Ledger:
         poid = quantity.path_id
         locked_poid_balance = None if poid not in wallet.locked.keys() else wallet.locked[poid]
 
-        transaction = Transaction(
-            poid,
-            wallet.exchange.clock.step,
-            source,
-            target,
-            memo,
-            quantity,
-            wallet.balance,
-            wallet.locked_balance,
-            locked_poid_balance
+        i = self._size
+        if i == len(self._columns['step']):
+            self._grow()
+
+        instrument = wallet.instrument
+        if instrument.symbol not in self._categories['instrument']:
+            self._instruments += [instrument]
+        precision = instrument.precision
+
+        columns = self._columns
+        columns['poid'][i] = self._code('poid', poid)
+        columns['step'][i] = wallet.exchange.clock.step
+        columns['source'][i] = self._code('source', source)
+        columns['target'][i] = self._code('target', target)
+        columns['memo'][i] = self._code('memo', memo)
+        columns['wallet'][i] = self._code('wallet', f'{wallet.exchange.name}:/{instrument.symbol}')
+        columns['instrument'][i] = self._code('instrument', instrument.symbol)
+        columns['amount'][i] = self._scale(quantity, precision)
+        columns['free'][i] = self._scale(wallet.balance, precision)
+        columns['locked'][i] = self._scale(wallet.locked_balance, precision)
+        columns['locked_poid'][i] = (
+            self.missing if locked_poid_balance is None
+            else self._scale(locked_poid_balance, precision)
         )
 
-        self.transactions += [transaction]
+        self._size += 1
+
+    def _code(self, column: str, value: str) -> int:
+        """Gets the code of a value in a categorical column, or -1 for `None`."""
+        if value is None:
+            return -1
+        categories = self._categories[column]
+        code = categories.get(value)
+        if code is None:
+            code = categories[value] = len(categories)
+        return code
+
+    @staticmethod
+    def _scale(quantity: 'Quantity', precision: int) -> int:
+        """Scales the size of a quantity into an integer number of the smallest units of an instrument."""
+        if isinstance(quantity, FixedQuantity):
+            return quantity.units
+        return int(quantity.size.scaleb(precision).to_integral_value(ROUND_HALF_EVEN))
+
+    def _grow(self) -> None:
+        """Doubles the capacity of the columns."""
+        for k, column in self._columns.items():
+            grown = np.empty(2 * len(column), dtype=column.dtype)
+            grown[:len(column)] = column
+            self._columns[k] = grown
+
+    def as_arrays(self) -> 'Dict[str, np.ndarray]':
+        """Gets the raw columns of the ledger.
+
+        Returns
+        -------
+        `Dict[str, np.ndarray]`
+            Views of the columns holding the committed transactions. Categorical
+            columns hold codes into `categories`, with -1 for missing values,
+            and quantities hold integers scaled by the precision of the
+            instrument, with `Ledger.missing` for missing values.
+        """
+        return {k: v[:self._size] for k, v in self._columns.items()}
+
+    def categories(self, column: str) -> 'List[str]':
+        """Gets the categories of a categorical column.
+
+        Parameters
+        ----------
+        column : str
+            The name of the column.
+
+        Returns
+        -------
+        `List[str]`
+            The values of the column, indexed by code.
+        """
+        return list(self._categories[column])
+
+    def precision(self) -> 'np.ndarray':
+        """Gets the precision of the quantities of every transaction.
+
+        Returns
+        -------
+        `np.ndarray`
+            The precision of the instrument of the wallet of each transaction.
+        """
+        precisions = np.array([i.precision for i in self._instruments], dtype=np.int8)
+        return precisions[self._columns['instrument'][:self._size]]
+
+    @property
+    def transactions(self) -> 'List[Transaction]':
+        """The transactions in the ledger, rebuilt from the columns. (`List[Transaction]`, read-only)"""
+        columns = self.as_arrays()
+        strings = {k: self.categories(k) for k in ['poid', 'source', 'target', 'memo']}
+
+        def decode(column, i):
+            code = columns[column][i]
+            return None if code < 0 else strings[column][code]
+
+        def quantity(column, i, path_id=None):
+            value = columns[column][i]
+            if value == self.missing:
+                return None
+            instrument = self._instruments[columns['instrument'][i]]
+            size = Decimal(int(value)).scaleb(-instrument.precision)
+            return Quantity(instrument, size, path_id)
+
+        transactions = []
+        for i in range(self._size):
+            poid = decode('poid', i)
+            transactions += [Transaction(
+                poid,
+                int(columns['step'][i]),
+                decode('source', i),
+                decode('target', i),
+                decode('memo', i),
+                quantity('amount', i, poid),
+                quantity('free', i),
+                quantity('locked', i),
+                quantity('locked_poid', i, poid)
+            )]
+        return transactions
+
+    def order(self, sort_by_order_seq: bool = False) -> 'np.ndarray':
+        """Gets the order of the transactions in the ledger.
+
+        Parameters
+        ----------
+        sort_by_order_seq : bool, default False
+            If transactions should be grouped by order path, in the order each
+            path first appears, keeping their order within each path.
+            Transactions without an order path come last.
+
+        Returns
+        -------
+        `np.ndarray`
+            The indices of the transactions in order.
+        """
+        if not sort_by_order_seq:
+            return np.arange(self._size)
+
+        # Codes are assigned in order of first appearance, so a stable sort by
+        # code groups the transactions of each path in the right order. Small
+        # integer keys are sorted with a linear time radix sort.
+        n_paths = len(self._categories['poid'])
+        codes = self._columns['poid'][:self._size]
+        key = np.where(codes < 0, n_paths, codes)
+        key = key.astype(np.uint16 if n_paths < 2**16 else np.int64)
+        return np.argsort(key, kind='stable')
 
     def as_frame(self, sort_by_order_seq: bool = False) -> 'pd.DataFrame':
         """Converts the ledger records into a data frame.
 
+        Quantities are converted to floats, and string columns are categorical.
+
         Parameters
         ----------
         sort_by_order_seq : bool, default False
@@ -76,17 +249,167 @@ class Ledger:
         `pd.DataFrame`
             A data frame containing all the records in the ledger.
         """
+        order = self.order(sort_by_order_seq)
+        columns = {k: v[order] for k, v in self.as_arrays().items()}
+        scale = 10.0 ** -self.precision()[order]
 
-        if not sort_by_order_seq:
-            return pd.DataFrame(self.transactions)
+        frame = {}
+        for k in Transaction._fields + ('wallet', 'instrument'):
+            if k in self.categorical:
+                frame[k] = pd.Categorical.from_codes(columns[k], self.categories(k))
+            elif k in self.quantities:
+                values = columns[k] * scale
+                values[columns[k] == self.missing] = np.nan
+                frame[k] = values
+            else:
+                frame[k] = columns[k]
+        return pd.DataFrame(frame)
+
+    def iter_batches(self, batch_size: int = 65536,
+                     sort_by_order_seq: bool = False) -> 'Iterator[pa.RecordBatch]':
+        """Iterates over the ledger in Arrow record batches.
 
-        df = pd.DataFrame(self.transactions)
-        frames = []
-        for poid in df.poid.unique():
-            frames += [df.loc[df.poid == poid, :]]
+        Categorical columns are dictionary encoded and quantities are kept as
+        scaled integers next to a `precision` column, so no value is rounded.
 
-        return pd.concat(frames, ignore_index=True, axis=0)
+        Parameters
+        ----------
+        batch_size : int, default 65536
+            The number of transactions in each batch.
+        sort_by_order_seq : bool, default False
+            If records should be sorted by each order path.
+
+        Yields
+        ------
+        `pa.RecordBatch`
+            The next batch of transactions.
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError('Exporting the ledger requires `pyarrow` to be installed.')
+
+        order = self.order(sort_by_order_seq)
+        columns = self.as_arrays()
+        precision = self.precision()
+        dictionaries = {k: pa.array(self.categories(k), type=pa.string()) for k in self.categorical}
+
+        for start in range(0, self._size, batch_size):
+            rows = order[start:start + batch_size]
+            arrays = {}
+            for k in Transaction._fields + ('wallet', 'instrument'):
+                values = columns[k][rows]
+                if k in self.categorical:
+                    arrays[k] = pa.DictionaryArray.from_arrays(
+                        pa.array(values, mask=values < 0), dictionaries[k]
+                    )
+                elif k in self.quantities:
+                    arrays[k] = pa.array(values, mask=values == self.missing)
+                else:
+                    arrays[k] = pa.array(values)
+            arrays['precision'] = pa.array(precision[rows])
+            yield pa.RecordBatch.from_pydict(arrays)
+
+    def to_parquet(self, path: str, row_group_size: int = 65536,
+                   sort_by_order_seq: bool = False, **kwargs) -> None:
+        """Writes the ledger to a Parquet file, one row group at a time.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+        row_group_size : int, default 65536
+            The number of transactions in each row group.
+        sort_by_order_seq : bool, default False
+            If records should be sorted by each order path.
+        **kwargs : keyword arguments
+            Additional keyword arguments passed to `pyarrow.parquet.ParquetWriter`.
+        """
+        writer = None
+        try:
+            for batch in self.iter_batches(row_group_size, sort_by_order_seq):
+                if writer is None:
+                    writer = pq.ParquetWriter(path, batch.schema, **kwargs)
+                writer.write_batch(batch, row_group_size=row_group_size)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def to_arrow(self, path: str, batch_size: int = 65536,
+                 sort_by_order_seq: bool = False) -> None:
+        """Writes the ledger to an Arrow IPC file, one record batch at a time.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+        batch_size : int, default 65536
+            The number of transactions in each record batch.
+        sort_by_order_seq : bool, default False
+            If records should be sorted by each order path.
+        """
+        writer = None
+        try:
+            for batch in self.iter_batches(batch_size, sort_by_order_seq):
+                if writer is None:
+                    writer = pa.ipc.new_file(path, batch.schema)
+                writer.write_batch(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the transactions of the ledger.
+
+        Committed transactions are never modified, so the snapshot only keeps
+        references to the columns and categories together with their sizes.
+        They are copied on restore instead, so that the transactions committed
+        after a restore never overwrite the ones of another snapshot.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the ledger.
+        """
+        return {
+            "size": self._size,
+            "columns": dict(self._columns),
+            "categories": {k: (v, len(v)) for k, v in self._categories.items()},
+            "instruments": (self._instruments, len(self._instruments)),
+        }
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the transactions of the ledger captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the ledger.
+        """
+        size = self._size = state["size"]
+        self._columns = {}
+        for k, column in state["columns"].items():
+            self._columns[k] = np.empty_like(column)
+            self._columns[k][:size] = column[:size]
+        self._categories = {
+            k: dict(itertools.islice(v.items(), n)) for k, (v, n) in state["categories"].items()
+        }
+        instruments, n = state["instruments"]
+        self._instruments = instruments[:n]
 
     def reset(self):
         """Resets the ledger."""
-        self.transactions = []
+        self._size = 0
+        self._categories = {k: {} for k in self.categorical}
+        self._instruments = []
+        self._columns = {
+            'poid': np.empty(self.capacity, dtype=np.int32),
+            'step': np.empty(self.capacity, dtype=np.int64),
+            'source': np.empty(self.capacity, dtype=np.int32),
+            'target': np.empty(self.capacity, dtype=np.int32),
+            'memo': np.empty(self.capacity, dtype=np.int32),
+            'wallet': np.empty(self.capacity, dtype=np.int32),
+            'instrument': np.empty(self.capacity, dtype=np.int32),
+            'amount': np.empty(self.capacity, dtype=np.int64),
+            'free': np.empty(self.capacity, dtype=np.int64),
+            'locked': np.empty(self.capacity, dtype=np.int64),
+            'locked_poid': np.empty(self.capacity, dtype=np.int64),
+        }
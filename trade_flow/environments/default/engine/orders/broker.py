@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License
 
-from typing import List, Dict
+import heapq
+import itertools
+
+from typing import Any, List, Dict
 from collections import OrderedDict
 
 from trade_flow.core import TimeIndexed
@@ -24,11 +27,21 @@ class Broker(OrderListener, TimeIndexed):
     """A broker for handling the execution of orders on multiple exchanges.
     Orders are kept in a virtual order book until they are ready to be executed.
 
+    The order book is indexed so that each step only looks at the orders that
+    may have become executable or expired. Orders whose criteria can only be
+    satisfied once the quote price crosses a trigger price (see
+    `Criteria.trigger`) rest in heaps per exchange pair ordered by that price,
+    and only the orders crossed by the current quote price are checked. Other
+    orders are checked on every step. Orders with an end step are also kept in
+    a heap ordered by end step to find the expired ones.
+
     Attributes
     ----------
     unexecuted : `List[Order]`
         The list of orders the broker is waiting to execute, when their
-        criteria is satisfied.
+        criteria is satisfied. It is a read-only copy of the resting orders,
+        so orders are added and removed with `submit` and `cancel` instead of
+        assigning to or mutating the list.
     executed : `Dict[str, Order]`
         The dictionary of orders the broker has executed since resetting,
         organized by order id.
@@ -37,10 +50,17 @@ class Broker(OrderListener, TimeIndexed):
         organized by order id.
     """
 
+    # Relative slack given to trigger prices, so that rounding errors never
+    # keep an order whose criteria is satisfied from being checked.
+    tolerance = 1e-9
+
     def __init__(self):
-        self.unexecuted = []
-        self.executed = {}
-        self.trades = OrderedDict()
+        self.reset()
+
+    @property
+    def unexecuted(self) -> "List[Order]":
+        """The resting orders, in the order they were submitted. (`List[Order]`, read-only)"""
+        return list(self._resting.values())
 
     def submit(self, order: "Order") -> None:
         """Submits an order to the broker.
@@ -52,7 +72,39 @@ class Broker(OrderListener, TimeIndexed):
         order : `Order`
             The order to be submitted.
         """
-        self.unexecuted += [order]
+        seq = next(self._seq)
+        self._resting[order.id] = order
+        self._submitted[order.id] = seq
+        self._index(order, seq)
+        self._track_expiry(order)
+
+    def _index(self, order: "Order", seq: int) -> None:
+        """Adds a resting order to the heap of its exchange pair, or to the
+        orders checked on every step if it has no trigger price."""
+        trigger = order.criteria.trigger(order) if hasattr(order.criteria, "trigger") else None
+        if trigger is None:
+            self._unindexed[order.id] = order
+        else:
+            direction, price = trigger
+            slack = abs(price) * self.tolerance
+            pair = order.exchange_pair
+            book = self._books.setdefault(str(pair), (pair, [], []))
+            if direction == "below":
+                heapq.heappush(book[1], (-(price + slack), seq, order))
+            else:
+                heapq.heappush(book[2], (price - slack, seq, order))
+
+    def _track_expiry(self, order: "Order") -> None:
+        if order.end and order.id not in self._expiring:
+            self._expiring.add(order.id)
+            heapq.heappush(self._expiry, (order.end, next(self._seq), order))
+
+    def _remove(self, order: "Order") -> None:
+        """Removes an order from the resting orders, leaving its heap entries
+        to be discarded when they reach the top of their heap."""
+        self._resting.pop(order.id, None)
+        self._unindexed.pop(order.id, None)
+        self._submitted.pop(order.id, None)
 
     def cancel(self, order: "Order") -> None:
         """Cancels an order.
@@ -65,11 +117,40 @@ class Broker(OrderListener, TimeIndexed):
         if order.status == OrderStatus.CANCELLED:
             raise Warning(f"Order {order.id} has already been cancelled.")
 
-        if order in self.unexecuted:
-            self.unexecuted.remove(order)
-
+        if order.id in self._resting and order.id not in self._unindexed:
+            self._stale += 1
+        self._remove(order)
         order.cancel()
 
+        if self._stale > max(64, len(self._resting)):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drops the heap entries of orders that are no longer resting."""
+        for _, below, above in self._books.values():
+            below[:] = [e for e in below if e[2].id in self._resting]
+            above[:] = [e for e in above if e[2].id in self._resting]
+            heapq.heapify(below)
+            heapq.heapify(above)
+        self._stale = 0
+
+    def _candidates(self) -> "List[Order]":
+        """Gets the resting orders that may be executable at the current quote
+        prices, in the order they were submitted."""
+        candidates = list(self._unindexed.values())
+
+        for pair, below, above in self._books.values():
+            if not below and not above:
+                continue
+            price = float(pair.exchange.quote_price(pair.pair))
+            while below and -below[0][0] >= price:
+                candidates += [heapq.heappop(below)[2]]
+            while above and above[0][0] <= price:
+                candidates += [heapq.heappop(above)[2]]
+
+        candidates = [o for o in candidates if o.id in self._resting]
+        return sorted(candidates, key=lambda o: self._submitted[o.id])
+
     def update(self) -> None:
         """Updates the brokers order management system.
 
@@ -80,20 +161,33 @@ class Broker(OrderListener, TimeIndexed):
         Then the broker will find any orders that are active, but expired, and
         proceed to cancel them.
         """
-        executed_ids = []
-        for order in self.unexecuted:
+        for order in self._candidates():
             if order.is_executable:
-                executed_ids.append(order.id)
+                self._remove(order)
                 self.executed[order.id] = order
+                self._executed[order.id] = next(self._seq)
 
                 order.attach(self)
                 order.execute()
+            elif order.id not in self._unindexed:
+                # Crossed but not executable yet, e.g. before its start step.
+                self._index(order, self._submitted[order.id])
 
-        for order_id in executed_ids:
-            self.unexecuted.remove(self.executed[order_id])
+        expired = []
+        while self._expiry and self._expiry[0][2].is_expired:
+            order = heapq.heappop(self._expiry)[2]
+            self._expiring.discard(order.id)
+            if order.is_active and (order.id in self._resting or order.id in self.executed):
+                expired += [order]
 
-        for order in self.unexecuted + list(self.executed.values()):
-            if order.is_active and order.is_expired:
+        # Cancel the resting orders first, then the executed ones, in the
+        # order they were submitted and executed.
+        resting = [o for o in expired if o.id in self._resting]
+        resting.sort(key=lambda o: self._submitted[o.id])
+        expired = [o for o in expired if o.id not in self._resting]
+        expired.sort(key=lambda o: self._executed[o.id])
+        for order in resting + expired:
+            if order.is_active:
                 self.cancel(order)
 
     def on_fill(self, order: "Order", trade: "Trade") -> None:
@@ -116,14 +210,84 @@ class Broker(OrderListener, TimeIndexed):
                 if next_order:
                     if next_order.is_executable:
                         self.executed[next_order.id] = next_order
+                        self._executed[next_order.id] = next(self._seq)
+                        self._track_expiry(next_order)
 
                         next_order.attach(self)
                         next_order.execute()
                     else:
                         self.submit(next_order)
 
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the order book of the broker.
+
+        Besides the indices of the broker, the state of every active order is
+        captured, since orders are updated in place as they are executed and
+        filled. Orders that are filled or cancelled no longer change.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the broker.
+        """
+        seq = next(self._seq)
+        self._seq = itertools.count(seq)
+
+        orders = {}
+        for order in itertools.chain(self._resting.values(), self.executed.values()):
+            if order.is_active:
+                orders[order.id] = order
+
+        return {
+            "seq": seq,
+            "executed": dict(self.executed),
+            "trades": OrderedDict((k, list(v)) for k, v in self.trades.items()),
+            "resting": OrderedDict(self._resting),
+            "unindexed": OrderedDict(self._unindexed),
+            "submitted": dict(self._submitted),
+            "executed_seq": dict(self._executed),
+            "books": {k: (b[0], list(b[1]), list(b[2])) for k, b in self._books.items()},
+            "expiry": list(self._expiry),
+            "expiring": set(self._expiring),
+            "stale": self._stale,
+            "orders": [(order, order.snapshot()) for order in orders.values()],
+        }
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the broker to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the broker.
+        """
+        self.executed = dict(state["executed"])
+        self.trades = OrderedDict((k, list(v)) for k, v in state["trades"].items())
+
+        self._seq = itertools.count(state["seq"])
+        self._resting = OrderedDict(state["resting"])
+        self._unindexed = OrderedDict(state["unindexed"])
+        self._submitted = dict(state["submitted"])
+        self._executed = dict(state["executed_seq"])
+        self._books = {k: (b[0], list(b[1]), list(b[2])) for k, b in state["books"].items()}
+        self._expiry = list(state["expiry"])
+        self._expiring = set(state["expiring"])
+        self._stale = state["stale"]
+
+        for order, order_state in state["orders"]:
+            order.restore(order_state)
+
     def reset(self) -> None:
         """Resets the broker."""
-        self.unexecuted = []
         self.executed = {}
         self.trades = OrderedDict()
+
+        self._seq = itertools.count()
+        self._resting = OrderedDict()
+        self._unindexed = OrderedDict()
+        self._submitted = {}
+        self._executed = {}
+        self._books = {}
+        self._expiry = []
+        self._expiring = set()
+        self._stale = 0
@@ -16,7 +16,7 @@
 import operator
 
 from abc import abstractmethod, ABCMeta
-from typing import Callable, Union, TypeVar
+from typing import Callable, Tuple, Union, TypeVar
 from enum import Enum
 
 from trade_flow.environments.default.engine.orders import TradeSide, Order
@@ -44,6 +44,28 @@ class Criteria(object, metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def trigger(self, order: "Order") -> "Union[Tuple[str, float], None]":
+        """Gets the quote price at which the criteria can become satisfied.
+
+        Brokers use the trigger price to only check orders whose criteria may
+        be satisfied by the current quote price. Criteria that do not only
+        depend on the quote price crossing a fixed price have no trigger.
+
+        Parameters
+        ----------
+        order : `Order`
+            An order.
+
+        Returns
+        -------
+        Union[Tuple[str, float], None]
+            Either `("below", price)` if the criteria can only be satisfied when
+            the quote price is at or below `price`, `("above", price)` if it can
+            only be satisfied when the quote price is at or above `price`, or
+            `None` if there is no such price.
+        """
+        return None
+
     def __call__(self, order: "Order", exchange: "Exchange") -> bool:
         if not exchange.is_pair_tradable(order.pair):
             return False
@@ -155,6 +177,11 @@ class Limit(Criteria):
 
         return buy_satisfied or sell_satisfied
 
+    def trigger(self, order: "Order") -> "Tuple[str, float]":
+        if order.side == TradeSide.BUY:
+            return "below", float(self.limit_price)
+        return "above", float(self.limit_price)
+
     def __str__(self) -> str:
         return f"<Limit: price={self.limit_price}>"
 
@@ -194,6 +221,12 @@ class Stop(Criteria):
 
         return (is_take_profit or is_stop_loss) and percent >= self.percent
 
+    def trigger(self, order: "Order") -> "Tuple[str, float]":
+        price = float(order.price)
+        if self.direction == StopDirection.UP:
+            return "above", price * (1 + self.percent)
+        return "below", price * (1 - self.percent)
+
     def __str__(self):
         return f"<Stop: direction={self.direction}, percent={self.percent}>"
 
@@ -295,6 +295,35 @@ class Order(TimedIdentifiable, Observable):
 
                 wallet.locked.pop(self.path_id, None)
 
+    def snapshot(self) -> tuple:
+        """Captures the status, fills and listeners of the order.
+
+        Returns
+        -------
+        tuple
+            The state of the order.
+        """
+        return (
+            self.status,
+            self.remaining,
+            list(self.trades),
+            list(self.listeners or []),
+            list(self._specs),
+        )
+
+    def restore(self, state: tuple) -> None:
+        """Restores the order to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : tuple
+            The state of the order.
+        """
+        self.status, self.remaining, trades, listeners, specs = state
+        self.trades = list(trades)
+        self.listeners = list(listeners)
+        self._specs = list(specs)
+
     def to_dict(self) -> dict:
         """Creates a dictionary representation of the order.
 
@@ -0,0 +1,199 @@
+from typing import Any, Dict, List
+
+
+import numpy as np
+import pandas as pd
+
+
+class PerformanceRecorder(object):
+    """Records the performance of a portfolio in preallocated columns.
+
+    Every step is stored as a row of a 2D array with a column per tracked key,
+    together with the clock step it was recorded at. Recording the same step
+    again overwrites its row. Without a `max_length` the arrays grow by
+    doubling their capacity. With a `max_length` they act as a ring buffer
+    keeping only the latest `max_length` rows, each row being written twice,
+    `max_length` rows apart, so the recorded rows are always a contiguous
+    slice of the arrays.
+
+    Parameters
+    ----------
+    keys : `List[str]`
+        The keys of the values to record.
+    max_length : int, optional
+        The maximum number of rows to keep.
+    capacity : int, default 1024
+        The number of rows to preallocate when the number of rows is unbounded.
+
+    Attributes
+    ----------
+    keys : `List[str]`
+        The keys of the values recorded.
+    count : int
+        The number of steps recorded since the last reset, including the ones
+        that no longer fit in a bounded recorder.
+    """
+
+    def __init__(self, keys: "List[str]", max_length: int = None, capacity: int = 1024) -> None:
+        self.keys = list(keys)
+        self.max_length = max_length
+        self.index = {k: i for i, k in enumerate(self.keys)}
+
+        self.capacity = 2 * max_length if max_length else capacity
+        self.reset()
+
+    def record(self, step: int, values: dict) -> None:
+        """Records the values of a step.
+
+        Parameters
+        ----------
+        step : int
+            The step of the values.
+        values : dict
+            The values to record, keyed by at least every tracked key.
+        """
+        if self.count == 0 or step != self._last_step:
+            self.count += 1
+            self._last_step = step
+
+        row = [values[k] for k in self.keys]
+        if self.max_length:
+            i = (self.count - 1) % self.max_length
+            self._data[i] = self._data[i + self.max_length] = row
+            self._steps[i] = self._steps[i + self.max_length] = step
+        else:
+            i = self.count - 1
+            if i == len(self._data):
+                self._grow()
+            self._data[i] = row
+            self._steps[i] = step
+
+    def _grow(self) -> None:
+        """Doubles the capacity of the arrays."""
+        data = np.zeros((2 * len(self._data), len(self.keys)))
+        data[: len(self._data)] = self._data
+        steps = np.zeros(2 * len(self._steps), dtype=np.int64)
+        steps[: len(self._steps)] = self._steps
+        self._data, self._steps = data, steps
+
+    def _window(self) -> slice:
+        """Gets the slice of the arrays holding the recorded rows in order."""
+        if not self.max_length or self.count <= self.max_length:
+            return slice(0, self.count)
+        start = self.count % self.max_length
+        return slice(start, start + self.max_length)
+
+    def __len__(self) -> int:
+        return min(self.count, self.max_length) if self.max_length else self.count
+
+    def __getitem__(self, key: str) -> "np.ndarray":
+        """Gets the recorded values of a key, as a view of the arrays.
+
+        Parameters
+        ----------
+        key : str
+            The key to get the values of.
+
+        Returns
+        -------
+        `np.ndarray`
+            The values in the order they were recorded. The view is only valid
+            until the next step is recorded.
+        """
+        return self._data[self._window(), self.index[key]]
+
+    @property
+    def steps(self) -> "np.ndarray":
+        """The steps the rows were recorded at. (`np.ndarray`, read-only)"""
+        return self._steps[self._window()]
+
+    def as_arrays(self) -> "Dict[str, np.ndarray]":
+        """Gets the recorded values of every key as views of the arrays.
+
+        Returns
+        -------
+        `Dict[str, np.ndarray]`
+            The values of each key, plus the steps under `"step"`. The views
+            are only valid until the next step is recorded.
+        """
+        window = self._window()
+        arrays = {"step": self._steps[window]}
+        for k, i in self.index.items():
+            arrays[k] = self._data[window, i]
+        return arrays
+
+    def as_frame(self) -> "pd.DataFrame":
+        """Gets the recorded values as a data frame indexed by step.
+
+        The data frame shares its memory with the arrays, so it is only valid
+        until the next step is recorded.
+
+        Returns
+        -------
+        `pd.DataFrame`
+            The recorded values with a column per key.
+        """
+        window = self._window()
+        return pd.DataFrame(
+            self._data[window],
+            index=pd.Index(self._steps[window], copy=False),
+            columns=self.keys,
+            copy=False,
+        )
+
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the recorded values.
+
+        Rows are only appended to an unbounded recorder, so its arrays are kept
+        by reference and only the last row, which is overwritten if its step is
+        recorded again, is copied. The arrays of a bounded recorder are copied.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the recorder.
+        """
+        last = None
+        if self.max_length:
+            data, steps = self._data.copy(), self._steps.copy()
+        else:
+            data, steps = self._data, self._steps
+            if self.count > 0:
+                last = (data[self.count - 1].copy(), steps[self.count - 1])
+        return {
+            "count": self.count,
+            "last_step": self._last_step,
+            "data": data,
+            "steps": steps,
+            "last": last,
+        }
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the recorded values captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the recorder.
+        """
+        self.count = state["count"]
+        self._last_step = state["last_step"]
+
+        rows = len(state["data"]) if self.max_length else self.count
+        self._data = np.empty_like(state["data"])
+        self._data[:rows] = state["data"][:rows]
+        self._steps = np.empty_like(state["steps"])
+        self._steps[:rows] = state["steps"][:rows]
+        if state["last"] is not None:
+            self._data[self.count - 1], self._steps[self.count - 1] = state["last"]
+
+    def reset(self) -> None:
+        """Clears the recorded values.
+
+        New arrays are allocated rather than cleared, since snapshots of an
+        unbounded recorder keep the current ones by reference.
+        """
+        self.count = 0
+        self._last_step = None
+        self._data = np.zeros((self.capacity, len(self.keys)))
+        self._steps = np.zeros(self.capacity, dtype=np.int64)
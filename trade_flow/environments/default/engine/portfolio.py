@@ -1,5 +1,5 @@
 import re
-from typing import Callable, Tuple, List, TypeVar
+from typing import Any, Callable, Dict, Tuple, List, TypeVar
 from collections import OrderedDict
 
 from trade_flow.core import Component, TimedIdentifiable
@@ -8,6 +8,7 @@ from trade_flow.environments.default.engine.orders import OrderListener
 from trade_flow.environments.default.engine.instruments import Instrument, Quantity, ExchangePair
 from .wallet import Wallet
 from .ledger import Ledger
+from .performance import PerformanceRecorder
 
 
 WalletType = TypeVar("WalletType", Wallet, Tuple[Exchange, Instrument, float])
@@ -26,6 +27,9 @@ class Portfolio(Component, TimedIdentifiable):
         The order listener to set for all orders executed by this portfolio.
     performance_listener : `Callable[[OrderedDict], None]`
         The performance listener to send all portfolio updates to.
+    max_performance_length : int, optional
+        The maximum number of steps of performance to keep. By default the
+        performance of the whole episode is kept.
     """
 
     registered_name = "portfolio"
@@ -36,6 +40,7 @@ class Portfolio(Component, TimedIdentifiable):
         wallets: List[WalletType] = None,
         order_listener: "OrderListener" = None,
         performance_listener: Callable[[OrderedDict], None] = None,
+        max_performance_length: int = None,
     ):
         super().__init__()
 
@@ -44,6 +49,9 @@ class Portfolio(Component, TimedIdentifiable):
         self.base_instrument = self.default("base_instrument", base_instrument)
         self.order_listener = self.default("order_listener", order_listener)
         self.performance_listener = self.default("performance_listener", performance_listener)
+        self.max_performance_length = self.default(
+            "max_performance_length", max_performance_length
+        )
         self._wallets = {}
 
         for wallet in wallets:
@@ -109,8 +117,8 @@ class Portfolio(Component, TimedIdentifiable):
         return 1.0 - self.net_worth / self.initial_net_worth
 
     @property
-    def performance(self) -> "OrderedDict":
-        """The performance of the portfolio since the last reset. (`OrderedDict`, read-only)"""
+    def performance(self) -> "PerformanceRecorder":
+        """The performance of the portfolio since the last reset. (`PerformanceRecorder`, read-only)"""
         return self._performance
 
     @property
@@ -280,31 +288,71 @@ class Portfolio(Component, TimedIdentifiable):
         if not self._keys:
             self._keys = self._find_keys(data)
 
-        index = self.clock.step
-        performance_data = {k: data[k] for k in self._keys}
-        performance_data["base_symbol"] = self.base_instrument.symbol
-        performance_step = OrderedDict()
-        performance_step[index] = performance_data
+        if self._performance is None:
+            self._performance = PerformanceRecorder(
+                self._keys, max_length=self.max_performance_length
+            )
 
+        index = self.clock.step
         net_worth = data["net_worth"]
 
-        if self._performance is None:
-            self._performance = performance_step
+        if len(self._performance) == 0:
             self._initial_net_worth = net_worth
-            self._net_worth = net_worth
-        else:
-            self._performance.update(performance_step)
-            self._net_worth = net_worth
+        self._net_worth = net_worth
+        self._performance.record(index, data)
 
         if self.performance_listener:
+            performance_data = {k: data[k] for k in self._keys}
+            performance_data["base_symbol"] = self.base_instrument.symbol
+            performance_step = OrderedDict()
+            performance_step[index] = performance_data
             self.performance_listener(performance_step)
 
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the balances, performance and ledger of the portfolio.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the portfolio.
+        """
+        return {
+            "initial_balance": self._initial_balance,
+            "initial_net_worth": self._initial_net_worth,
+            "net_worth": self._net_worth,
+            "performance": self._performance.snapshot() if self._performance is not None else None,
+            "ledger": self.ledger.snapshot(),
+            "wallets": {k: w.snapshot() for k, w in self._wallets.items()},
+        }
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the portfolio to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the portfolio.
+        """
+        self._initial_balance = state["initial_balance"]
+        self._initial_net_worth = state["initial_net_worth"]
+        self._net_worth = state["net_worth"]
+
+        if state["performance"] is not None:
+            self._performance.restore(state["performance"])
+        elif self._performance is not None:
+            self._performance.reset()
+
+        self.ledger.restore(state["ledger"])
+        for k, wallet_state in state["wallets"].items():
+            self._wallets[k].restore(wallet_state)
+
     def reset(self) -> None:
         """Resets the portfolio."""
         self._initial_balance = self.base_balance
         self._initial_net_worth = None
         self._net_worth = None
-        self._performance = None
+        if self._performance is not None:
+            self._performance.reset()
 
         self.ledger.reset()
         for wallet in self._wallets.values():
@@ -25,7 +25,12 @@ from trade_flow.core.exceptions import (
     DoubleUnlockedQuantity,
     QuantityNotLocked,
 )
-from trade_flow.environments.default.engine.instruments import Instrument, Quantity, ExchangePair
+from trade_flow.environments.default.engine.instruments import (
+    Instrument,
+    Quantity,
+    FixedQuantity,
+    ExchangePair,
+)
 from trade_flow.environments.default.engine.orders import Order
 from trade_flow.environments.default.engine.exchanges import Exchange
 from trade_flow.environments.default.engine.ledger import Ledger
@@ -327,8 +332,8 @@ class Wallet(Identifiable):
         pair = source.instrument / target.instrument
         poid = quantity.path_id
 
-        lsb1 = source.locked.get(poid).size
-        ltb1 = target.locked.get(poid, 0 * pair.quote).size
+        lsb1 = source.locked.get(poid)
+        ltb1 = target.locked.get(poid, 0 * pair.quote)
 
         if commission.as_float() > 0.0:
             commission = source.withdraw(commission, "COMMISSION")
@@ -348,24 +353,32 @@ class Wallet(Identifiable):
             converted, "TRADED {} {} @ {}".format(quantity, exchange_pair, exchange_pair.price)
         )
 
-        lsb2 = source.locked.get(poid).size
-        ltb2 = target.locked.get(poid, 0 * pair.quote).size
-
-        q = quantity.size
-        c = commission.size
-        cv = converted.size
-        p = exchange_pair.inverse_price if pair == exchange_pair.pair else exchange_pair.price
-
-        source_quantization = Decimal(10) ** -source.instrument.precision
-        target_quantization = Decimal(10) ** -target.instrument.precision
-
-        lhs = Decimal((lsb1 - lsb2) - (q + c)).quantize(source_quantization)
-        rhs = Decimal(ltb2 - ltb1 - cv).quantize(target_quantization)
+        lsb2 = source.locked.get(poid)
+        ltb2 = target.locked.get(poid, 0 * pair.quote)
 
-        lhs_eq_zero = np.isclose(float(lhs), 0, atol=float(source_quantization))
-        rhs_eq_zero = np.isclose(float(rhs), 0, atol=float(target_quantization))
-
-        if not lhs_eq_zero or not rhs_eq_zero:
+        operands = [lsb1, lsb2, ltb1, ltb2, quantity, commission, converted]
+        if all(isinstance(x, FixedQuantity) for x in operands):
+            # Fixed-point sizes are exact, so funds must be conserved exactly.
+            lhs = (lsb1.units - lsb2.units) - (quantity.units + commission.units)
+            rhs = ltb2.units - ltb1.units - converted.units
+            conserved = lhs == 0 and rhs == 0
+        else:
+            source_quantization = Decimal(10) ** -source.instrument.precision
+            target_quantization = Decimal(10) ** -target.instrument.precision
+
+            lhs = Decimal((lsb1.size - lsb2.size) - (quantity.size + commission.size))
+            rhs = Decimal(ltb2.size - ltb1.size - converted.size)
+            lhs = lhs.quantize(source_quantization)
+            rhs = rhs.quantize(target_quantization)
+
+            lhs_eq_zero = np.isclose(float(lhs), 0, atol=float(source_quantization))
+            rhs_eq_zero = np.isclose(float(rhs), 0, atol=float(target_quantization))
+            conserved = lhs_eq_zero and rhs_eq_zero
+
+        if not conserved:
+            lsb1, lsb2, ltb1, ltb2 = lsb1.size, lsb2.size, ltb1.size, ltb2.size
+            q, c, cv = quantity.size, commission.size, converted.size
+            p = exchange_pair.inverse_price if pair == exchange_pair.pair else exchange_pair.price
             equation = (
                 "({} - {}) - ({} + {}) != ({} - {}) - {}   [LHS = {}, RHS = {}, Price = {}]".format(
                     lsb1, lsb2, q, c, ltb2, ltb1, cv, lhs, rhs, p
@@ -376,6 +389,27 @@ class Wallet(Identifiable):
 
         return Transfer(quantity, commission, exchange_pair.price)
 
+    def snapshot(self) -> "Tuple[Quantity, Dict[str, Quantity]]":
+        """Captures the balances of the wallet.
+
+        Returns
+        -------
+        `Tuple[Quantity, Dict[str, Quantity]]`
+            The free balance and the locked balances by order path.
+        """
+        return self.balance, dict(self._locked)
+
+    def restore(self, state: "Tuple[Quantity, Dict[str, Quantity]]") -> None:
+        """Restores the balances of the wallet captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Tuple[Quantity, Dict[str, Quantity]]`
+            The free balance and the locked balances by order path.
+        """
+        self.balance = state[0]
+        self._locked = dict(state[1])
+
     def reset(self) -> None:
         """Resets the wallet."""
         self.balance = Quantity(self.instrument, self._initial_size).quantize()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, Iterator, List, Union
 
 
 import datetime as dt
@@ -10,10 +10,10 @@ from random import randrange
 
 
 from trade_flow.feed import Stream, NameSpace, DataFeed
+from trade_flow.feed.base import Group
 from trade_flow.environments.default.engine.wallet import Wallet
 from trade_flow.environments.default.engine.portfolio import Portfolio
 from trade_flow.environments.generic import Observer
-from collections import OrderedDict
 
 
 def _create_wallet_source(wallet: "Wallet", include_worth: bool = True) -> "List[Stream[float]]":
@@ -91,68 +91,144 @@ def _create_internal_streams(portfolio: "Portfolio") -> "List[Stream[float]]":
     return sources
 
 
+def _feature_streams(streams: "List[Stream]") -> "List[Stream]":
+    """Lists the streams giving the features of an observation, in order.
+
+    Parameters
+    ----------
+    streams : `List[Stream]`
+        The streams of the observation, where groups are replaced by the
+        streams they contain.
+
+    Returns
+    -------
+    `List[Stream]`
+        The streams giving the features.
+    """
+    features = []
+    for s in streams:
+        features += _feature_streams(s.inputs) if isinstance(s, Group) else [s]
+    return features
+
+
+def _flatten(row: dict) -> "Iterator[Any]":
+    """Yields the values of a row of a group in the order of `_feature_streams`,
+    recursing into the rows of nested groups."""
+    for v in row.values():
+        if isinstance(v, dict):
+            yield from _flatten(v)
+        else:
+            yield v
+
+
 class ObservationHistory(object):
     """Stores observations from a given episode of the environment.
 
+    Observations are written in place into a preallocated ring buffer. Every
+    row is stored twice, `window_size` rows apart, so that the latest window of
+    observations is always a contiguous slice of the buffer.
+
     Parameters
     ----------
     window_size : int
         The amount of observations to keep stored before discarding them.
+    n_features : int, optional
+        The number of features of each observation. If not given, it is taken
+        from the first observation pushed.
+    dtype : `np.dtype`, default `np.float32`
+        The data type of the stored observations.
 
     Attributes
     ----------
     window_size : int
         The amount of observations to keep stored before discarding them.
-    rows : pd.DataFrame
-        The rows of observations that are used as the environment observation
-        at each step of an episode.
-
+    buffer : `np.ndarray`
+        The ring buffer of shape `(2 * window_size, n_features)` holding the
+        observations, with missing values replaced by zeros.
+    index : int
+        The number of observations pushed since the last reset.
     """
 
-    def __init__(self, window_size: int) -> None:
+    def __init__(self, window_size: int, n_features: int = None, dtype: "np.dtype" = np.float32) -> None:
         self.window_size = window_size
-        self.rows = OrderedDict()
+        self.dtype = dtype
+        self.buffer = None
+        if n_features is not None:
+            self.buffer = np.zeros((2 * window_size, n_features), dtype=dtype)
         self.index = 0
 
-    def push(self, row: dict) -> None:
+    def push(self, row: "Union[dict, np.ndarray]") -> None:
         """Stores an observation.
 
         Parameters
         ----------
-        row : dict
-            The new observation to store.
+        row : Union[dict, `np.ndarray`]
+            The new observation to store, either as a dictionary of feature
+            values or as a row of features in a fixed order.
         """
-        self.rows[self.index] = row
+        if isinstance(row, dict):
+            row = np.fromiter(row.values(), dtype=self.dtype, count=len(row))
+        if self.buffer is None:
+            self.buffer = np.zeros((2 * self.window_size, len(row)), dtype=self.dtype)
+
+        i = self.index % self.window_size
+        slot = self.buffer[i]
+        slot[:] = row
+        if not np.isfinite(slot).all():
+            np.nan_to_num(slot, copy=False)
+        self.buffer[i + self.window_size] = slot
         self.index += 1
-        if len(self.rows.keys()) > self.window_size:
-            del self.rows[list(self.rows.keys())[0]]
 
-    def observe(self) -> "np.array":
+    def observe(self, copy: bool = True) -> "np.array":
         """Gets the observation at a given step in an episode
 
+        Parameters
+        ----------
+        copy : bool, default True
+            Whether to return a copy of the observation instead of a view of
+            the buffer, which is overwritten by later pushes.
+
         Returns
         -------
         `np.array`
-            The current observation of the environment.
+            The current observation of the environment, padded with zeros at
+            the start while fewer than `window_size` rows have been pushed.
         """
-        rows = self.rows.copy()
+        start = self.index % self.window_size
+        rows = self.buffer[start : start + self.window_size]
+        return rows.copy() if copy else rows
 
-        if len(rows) < self.window_size:
-            size = self.window_size - len(rows)
-            padding = np.zeros((size, len(rows[list(rows.keys())[0]])))
-            r = np.array([list(inner_dict.values()) for inner_dict in rows.values()])
-            rows = np.concatenate((padding, r))
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the stored observations.
 
-        if isinstance(rows, OrderedDict):
-            rows = np.array([list(inner_dict.values()) for inner_dict in rows.values()])
+        Returns
+        -------
+        `Dict[str, Any]`
+            A copy of the buffer and the number of observations pushed.
+        """
+        buffer = self.buffer.copy() if self.buffer is not None else None
+        return {"buffer": buffer, "index": self.index}
 
-        rows = np.nan_to_num(rows)
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the stored observations captured by `snapshot`.
 
-        return rows
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the observation history.
+        """
+        if state["buffer"] is None:
+            self.reset()
+        elif self.buffer is None:
+            self.buffer = state["buffer"].copy()
+        else:
+            np.copyto(self.buffer, state["buffer"])
+        self.index = state["index"]
 
     def reset(self) -> None:
         """Resets the observation history"""
-        self.rows = OrderedDict()
+        if self.buffer is not None:
+            self.buffer[:] = 0
         self.index = 0
 
 
@@ -172,6 +248,8 @@ class TradeFlowObserver(Observer):
         The size of the observation window.
     min_periods : int
         The amount of steps needed to warmup the `feed`.
+    mode : {"step", "vectorized"}, default "step"
+        The mode to compile the external feed in, see `DataFeed.compile`.
     **kwargs : keyword arguments
         Additional keyword arguments for observer creation.
 
@@ -179,7 +257,12 @@ class TradeFlowObserver(Observer):
     ----------
     feed : `DataFeed`
         The master feed in charge of streaming the internal, external, and
-        renderer data feeds.
+        renderer data feeds. It extends the given `feed`, so the processing
+        order of the given feed is reused by every observer built from it.
+    external : `DataFeed`
+        The vectorized feed of the external data, if the observer was created
+        in vectorized mode and the external feed could be vectorized, in which
+        case `feed` only streams the internal and renderer data.
     window_size : int
         The size of the observation window.
     min_periods : int
@@ -188,6 +271,20 @@ class TradeFlowObserver(Observer):
         The observation history.
     renderer_history : `List[dict]`
         The history of the renderer data feed.
+    feature_index : `Dict[str, int]`
+        The column of each feature of the external feed in the observations.
+
+    Notes
+    -----
+    The streams of the external feed are written into a single preallocated
+    row of `dtype` on every step. A feed holding groups cannot be laid out in
+    a row, so the observer falls back to reading its values from dictionaries,
+    the features of nested groups following each other in order.
+
+    In vectorized mode the external feed is precomputed on its own, as long as
+    every source of it is a finite iterable or a constant, while the streams
+    of the portfolio, which depend on the actions taken, are still run one
+    step at a time. Otherwise the observer runs in step mode.
     """
 
     def __init__(
@@ -197,29 +294,47 @@ class TradeFlowObserver(Observer):
         renderer_feed: "DataFeed" = None,
         window_size: int = 1,
         min_periods: int = None,
+        mode: str = "step",
         **kwargs,
     ) -> None:
+        self._observation_dtype = kwargs.get("dtype", np.float32)
+        self._observation_lows = kwargs.get("observation_lows", -np.inf)
+        self._observation_highs = kwargs.get("observation_highs", np.inf)
+
         internal_group = Stream.group(_create_internal_streams(portfolio)).rename("internal")
         external_group = Stream.group(feed.inputs).rename("external")
-
+        features = _feature_streams(feed.inputs)
+        self._columnar = len(features) == len(feed.inputs)
+        if self._columnar:
+            external_group.columnar(self._observation_dtype)
+        self.feature_index = {s.name: i for i, s in enumerate(features)}
+
+        self.external = None
+        if mode == "vectorized":
+            external = feed.extend([external_group])
+            external.compile(mode)
+            if external.mode == mode:
+                self.external = external
+
+        groups = [internal_group]
+        if self.external is None:
+            groups += [external_group]
         if renderer_feed:
-            renderer_group = Stream.group(renderer_feed.inputs).rename("renderer")
+            groups += [Stream.group(renderer_feed.inputs).rename("renderer")]
 
-            self.feed = DataFeed([internal_group, external_group, renderer_group])
-        else:
-            self.feed = DataFeed([internal_group, external_group])
+        # The streams of a vectorized external feed must not be run again by
+        # the master feed.
+        self.feed = DataFeed(groups) if self.external is not None else feed.extend(groups)
 
         self.window_size = window_size
         self.min_periods = min_periods
 
-        self._observation_dtype = kwargs.get("dtype", np.float32)
-        self._observation_lows = kwargs.get("observation_lows", -np.inf)
-        self._observation_highs = kwargs.get("observation_highs", np.inf)
-
-        self.history = ObservationHistory(window_size=window_size)
+        self.feed.compile()
+        n_features = len(self.feature_index)
 
-        initial_obs = self.feed.next()["external"]
-        n_features = len(initial_obs.keys())
+        self.history = ObservationHistory(
+            window_size=window_size, n_features=n_features, dtype=self._observation_dtype
+        )
 
         self._observation_space = Box(
             low=self._observation_lows,
@@ -242,10 +357,15 @@ class TradeFlowObserver(Observer):
     def warmup(self) -> None:
         """Warms up the data feed."""
         if self.min_periods is not None:
-            for _ in range(self.min_periods):
-                if self.has_next():
-                    obs_row = self.feed.next()["external"]
-                    self.history.push(obs_row)
+            data = self.feed.next_n(self.min_periods)
+            if self.external is not None:
+                data = self.external.next_n(self.min_periods)
+            external = data["external"]
+            if not self._columnar:
+                external = np.column_stack(list(_flatten(external)))
+            # Only the last `window_size` rows survive in the history.
+            for row in external[-self.window_size :]:
+                self.history.push(row)
 
     def observe(self, env: "TradingEnvironment") -> np.array:
         """Observes the environment.
@@ -265,12 +385,15 @@ class TradeFlowObserver(Observer):
             self.renderer_history += [data["renderer"]]
 
         # Push new observation to observation history
-        obs_row = data["external"]
+        if self.external is not None:
+            obs_row = self.external.next()["external"]
+        else:
+            obs_row = data["external"]
+        if not self._columnar:
+            obs_row = np.fromiter(_flatten(obs_row), dtype=self._observation_dtype)
         self.history.push(obs_row)
 
-        obs = self.history.observe()
-        obs = obs.astype(self._observation_dtype)
-        return obs
+        return self.history.observe()
 
     def has_next(self) -> bool:
         """Checks if there is another observation to be generated.
@@ -280,13 +403,50 @@ class TradeFlowObserver(Observer):
         bool
             Whether there is another observation to be generated.
         """
+        if self.external is not None and not self.external.has_next():
+            return False
         return self.feed.has_next()
 
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the state of the feed and of the observation history.
+
+        The renderer history is only appended to, so it is kept by reference
+        together with its length.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the observer.
+        """
+        return {
+            "feed": self.feed.snapshot(),
+            "external": self.external.snapshot() if self.external is not None else None,
+            "history": self.history.snapshot(),
+            "renderer_history": (self.renderer_history, len(self.renderer_history)),
+        }
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the observer to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the observer.
+        """
+        self.feed.restore(state["feed"])
+        if self.external is not None:
+            self.external.restore(state["external"])
+        self.history.restore(state["history"])
+        renderer_history, n = state["renderer_history"]
+        self.renderer_history = renderer_history[:n]
+
     def reset(self, random_start=0) -> None:
         """Resets the observer"""
         self.renderer_history = []
         self.history.reset()
         self.feed.reset(random_start)
+        if self.external is not None:
+            self.external.reset(random_start)
         self.warmup()
 
 
@@ -347,9 +507,9 @@ class IntradayObserver(Observer):
         if renderer_feed:
             renderer_group = Stream.group(renderer_feed.inputs).rename("renderer")
 
-            self.feed = DataFeed([internal_group, external_group, renderer_group])
+            self.feed = feed.extend([internal_group, external_group, renderer_group])
         else:
-            self.feed = DataFeed([internal_group, external_group])
+            self.feed = feed.extend([internal_group, external_group])
 
         self.stop_time = stop_time
         self.window_size = window_size
@@ -360,12 +520,14 @@ class IntradayObserver(Observer):
         self._observation_lows = kwargs.get("observation_lows", -np.inf)
         self._observation_highs = kwargs.get("observation_highs", np.inf)
 
-        self.history = ObservationHistory(window_size=window_size)
-
         initial_obs = self.feed.next()["external"]
         initial_obs.pop("timestamp", None)
         n_features = len(initial_obs.keys())
 
+        self.history = ObservationHistory(
+            window_size=window_size, n_features=n_features, dtype=self._observation_dtype
+        )
+
         self._observation_space = Box(
             low=self._observation_lows,
             high=self._observation_highs,
@@ -429,9 +591,7 @@ class IntradayObserver(Observer):
         if obs_ts.time() == self.stop_time:
             self.stop = True
 
-        obs = self.history.observe()
-        obs = obs.astype(self._observation_dtype)
-        return obs
+        return self.history.observe()
 
     def has_next(self) -> bool:
         """Checks if there is another observation to be generated.
@@ -442,6 +602,35 @@ class IntradayObserver(Observer):
         """
         return self.feed.has_next() and not self.stop
 
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the state of the feed and of the observation history.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the observer.
+        """
+        return {
+            "feed": self.feed.snapshot(),
+            "history": self.history.snapshot(),
+            "renderer_history": (self.renderer_history, len(self.renderer_history)),
+            "stop": self.stop,
+        }
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the observer to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the observer.
+        """
+        self.feed.restore(state["feed"])
+        self.history.restore(state["history"])
+        renderer_history, n = state["renderer_history"]
+        self.renderer_history = renderer_history[:n]
+        self.stop = state["stop"]
+
     def reset(self) -> None:
         """Resets the observer"""
         self.renderer_history = []
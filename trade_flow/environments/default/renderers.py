@@ -114,9 +114,7 @@ class BaseRenderer(Renderer):
         if len(env.observer.renderer_history) > 0:
             price_history = pd.DataFrame(env.observer.renderer_history)
 
-        performance = pd.DataFrame.from_dict(
-            env.action_scheme.portfolio.performance, orient="index"
-        )
+        performance = env.action_scheme.portfolio.performance.as_frame()
 
         self.render_env(
             episode=kwargs.get("episode", None),
@@ -125,7 +123,7 @@ class BaseRenderer(Renderer):
             max_steps=kwargs.get("max_steps", None),
             price_history=price_history,
             net_worth=performance.net_worth,
-            performance=performance.drop(columns=["base_symbol"]),
+            performance=performance,
             trades=env.action_scheme.broker.trades,
         )
 
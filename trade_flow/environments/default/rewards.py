@@ -1,11 +1,14 @@
 from abc import abstractmethod
+from typing import TYPE_CHECKING, Any, Dict
 
 import numpy as np
-import pandas as pd
 
 from trade_flow.environments.generic import RewardScheme, TradingEnvironment
 from trade_flow.feed import Stream, DataFeed
 
+if TYPE_CHECKING:
+    from trade_flow.environments.default.engine.portfolio import Portfolio
+
 
 class TradeFlowRewardScheme(RewardScheme):
     """An abstract base class for reward schemes for the default environment."""
@@ -63,17 +66,144 @@ class SimpleProfit(TradeFlowRewardScheme):
             The cumulative percentage change in net worth over the previous
             `window_size` time steps.
         """
-        net_worths = [nw["net_worth"] for nw in portfolio.performance.values()]
+        net_worths = portfolio.performance["net_worth"]
         if len(net_worths) > 1:
             return net_worths[-1] / net_worths[-min(len(net_worths), self._window_size + 1)] - 1.0
         else:
             return 0.0
 
 
+class _RollingMoments(object):
+    """Running moments of the returns over a sliding window.
+
+    The sums over the window are updated in constant time as returns enter and
+    leave the window, and recomputed from the window once every `window_size`
+    updates so that rounding errors do not accumulate.
+
+    Parameters
+    ----------
+    window_size : int
+        The number of returns in the window.
+    target_returns : float
+        The target returns below which returns count as downside returns.
+    """
+
+    def __init__(self, window_size: int, target_returns: float) -> None:
+        self.window_size = window_size
+        self.target_returns = target_returns
+        self.returns = np.zeros(window_size)
+        self.downside = np.zeros(window_size)
+        self.reset()
+
+    def push(self, r: float) -> None:
+        d = r**2 if r < self.target_returns else r
+        i = self.updates % self.window_size
+        if self.n == self.window_size:
+            old_r, old_d = self.returns[i], self.downside[i]
+            self.sums -= (old_r, old_r**2, old_d, old_d**2)
+        else:
+            self.n += 1
+        self.returns[i] = r
+        self.downside[i] = d
+        self.sums += (r, r**2, d, d**2)
+        self.updates += 1
+
+        if self.updates % self.window_size == 0:
+            r, d = self.returns[: self.n], self.downside[: self.n]
+            self.sums[:] = (r.sum(), (r**2).sum(), d.sum(), (d**2).sum())
+
+    @property
+    def mean(self) -> float:
+        return self.sums[0] / self.n if self.n else np.nan
+
+    @property
+    def std(self) -> float:
+        return self._std(self.sums[0], self.sums[1])
+
+    @property
+    def downside_std(self) -> float:
+        return self._std(self.sums[2], self.sums[3])
+
+    def _std(self, total: float, total_sq: float) -> float:
+        if self.n == 0:
+            return np.nan
+        mean = total / self.n
+        return np.sqrt(max(total_sq / self.n - mean**2, 0.0))
+
+    def snapshot(self) -> tuple:
+        return self.returns.copy(), self.downside.copy(), self.sums.copy(), self.n, self.updates
+
+    def restore(self, state: tuple) -> None:
+        returns, downside, sums, self.n, self.updates = state
+        np.copyto(self.returns, returns)
+        np.copyto(self.downside, downside)
+        self.sums = sums.copy()
+
+    def reset(self) -> None:
+        self.sums = np.zeros(4)
+        self.n = 0
+        self.updates = 0
+
+
+class _ExponentialMoments(object):
+    """Exponentially weighted moments of the returns.
+
+    Parameters
+    ----------
+    alpha : float
+        The smoothing factor, in `(0, 1]`.
+    target_returns : float
+        The target returns below which returns count as downside returns.
+    """
+
+    def __init__(self, alpha: float, target_returns: float) -> None:
+        self.alpha = alpha
+        self.target_returns = target_returns
+        self.reset()
+
+    def push(self, r: float) -> None:
+        d = r**2 if r < self.target_returns else r
+        if self.n == 0:
+            self.mean, self.downside_mean = r, d
+        else:
+            a = self.alpha
+            delta, downside_delta = r - self.mean, d - self.downside_mean
+            self.mean += a * delta
+            self.downside_mean += a * downside_delta
+            self.var = (1 - a) * (self.var + a * delta**2)
+            self.downside_var = (1 - a) * (self.downside_var + a * downside_delta**2)
+        self.n += 1
+
+    @property
+    def std(self) -> float:
+        return np.sqrt(self.var) if self.n else np.nan
+
+    @property
+    def downside_std(self) -> float:
+        return np.sqrt(self.downside_var) if self.n else np.nan
+
+    def snapshot(self) -> tuple:
+        return self.mean, self.downside_mean, self.var, self.downside_var, self.n
+
+    def restore(self, state: tuple) -> None:
+        self.mean, self.downside_mean, self.var, self.downside_var, self.n = state
+
+    def reset(self) -> None:
+        self.mean = np.nan
+        self.downside_mean = np.nan
+        self.var = 0.0
+        self.downside_var = 0.0
+        self.n = 0
+
+
 class RiskAdjustedReturns(TradeFlowRewardScheme):
     """A reward scheme that rewards the agent for increasing its net worth,
     while penalizing more volatile strategies.
 
+    The moments of the returns are kept up to date from the latest net worth
+    of the portfolio on every step, instead of being recomputed from its whole
+    performance history.
+
     Parameters
     ----------
     return_algorithm : {'sharpe', 'sortino'}, Default 'sharpe'.
@@ -84,6 +214,9 @@ class RiskAdjustedReturns(TradeFlowRewardScheme):
         The target returns per period for use in calculating the sortino ratio.
     window_size : int
         The size of the look back window for computing the reward.
+    alpha : float, optional
+        If given, the returns are weighted exponentially with this smoothing
+        factor instead of equally over the last `window_size` steps.
     """
 
     def __init__(
@@ -92,6 +225,7 @@ class RiskAdjustedReturns(TradeFlowRewardScheme):
         risk_free_rate: float = 0.0,
         target_returns: float = 0.0,
         window_size: int = 1,
+        alpha: float = None,
     ) -> None:
         algorithm = self.default("return_algorithm", return_algorithm)
 
@@ -106,50 +240,74 @@ class RiskAdjustedReturns(TradeFlowRewardScheme):
         self._risk_free_rate = self.default("risk_free_rate", risk_free_rate)
         self._target_returns = self.default("target_returns", target_returns)
         self._window_size = self.default("window_size", window_size)
+        self._alpha = self.default("alpha", alpha)
 
-    def _sharpe_ratio(self, returns: "pd.Series") -> float:
-        """Computes the sharpe ratio for a given series of a returns.
+        if self._alpha is None:
+            self._moments = _RollingMoments(self._window_size, self._target_returns)
+        else:
+            self._moments = _ExponentialMoments(self._alpha, self._target_returns)
 
-        Parameters
-        ----------
-        returns : `pd.Series`
-            The returns for the `portfolio`.
+        self._seen = 0
+        self._net_worth = None
+
+    def _sharpe_ratio(self) -> float:
+        """Computes the sharpe ratio of the returns.
 
         Returns
         -------
         float
-            The sharpe ratio for the given series of a `returns`.
+            The sharpe ratio of the returns.
 
         References
         ----------
         .. [1] https://en.wikipedia.org/wiki/Sharpe_ratio
         """
-        return (np.mean(returns) - self._risk_free_rate + 1e-9) / (np.std(returns) + 1e-9)
-
-    def _sortino_ratio(self, returns: "pd.Series") -> float:
-        """Computes the sortino ratio for a given series of a returns.
+        moments = self._moments
+        return (moments.mean - self._risk_free_rate + 1e-9) / (moments.std + 1e-9)
 
-        Parameters
-        ----------
-        returns : `pd.Series`
-            The returns for the `portfolio`.
+    def _sortino_ratio(self) -> float:
+        """Computes the sortino ratio of the returns.
 
         Returns
         -------
         float
-            The sortino ratio for the given series of a `returns`.
+            The sortino ratio of the returns.
 
         References
         ----------
         .. [1] https://en.wikipedia.org/wiki/Sortino_ratio
         """
-        downside_returns = returns.copy()
-        downside_returns[returns < self._target_returns] = returns**2
+        moments = self._moments
+        downside_std = np.sqrt(moments.downside_std)
 
-        expected_return = np.mean(returns)
-        downside_std = np.sqrt(np.std(downside_returns))
+        return (moments.mean - self._risk_free_rate + 1e-9) / (downside_std + 1e-9)
 
-        return (expected_return - self._risk_free_rate + 1e-9) / (downside_std + 1e-9)
+    def _update(self, portfolio: "Portfolio") -> None:
+        """Pushes the returns of the net worths added to the performance of
+        the `portfolio` since the last update into the moments.
+
+        Parameters
+        ----------
+        portfolio : `Portfolio`
+            The current portfolio being used by the environment.
+        """
+        performance = portfolio.performance
+        size = performance.count if performance is not None else 0
+        if size < self._seen:
+            self.reset()
+
+        added = size - self._seen
+        if self._alpha is None and added > self._window_size + 1:
+            self.reset()
+            added = self._window_size + 1
+        net_worths = performance["net_worth"][-added:] if added > 0 else []
+
+        for net_worth in net_worths:
+            if self._net_worth is not None:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    self._moments.push(np.float64(net_worth) / self._net_worth - 1.0)
+            self._net_worth = net_worth
+        self._seen = size
 
     def get_reward(self, portfolio: "Portfolio") -> float:
         """Computes the reward corresponding to the selected risk-adjusted return metric.
@@ -164,12 +322,40 @@ class RiskAdjustedReturns(TradeFlowRewardScheme):
         float
             The reward corresponding to the selected risk-adjusted return metric.
         """
-        net_worths = [nw["net_worth"] for nw in portfolio.performance.values()][
-            -(self._window_size + 1) :
-        ]
-        returns = pd.Series(net_worths).pct_change().dropna()
-        risk_adjusted_return = self._return_algorithm(returns)
-        return risk_adjusted_return
+        self._update(portfolio)
+        return self._return_algorithm()
+
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the moments of the returns.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the reward scheme.
+        """
+        return {
+            "moments": self._moments.snapshot(),
+            "seen": self._seen,
+            "net_worth": self._net_worth,
+        }
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the moments of the returns captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the reward scheme.
+        """
+        self._moments.restore(state["moments"])
+        self._seen = state["seen"]
+        self._net_worth = state["net_worth"]
+
+    def reset(self) -> None:
+        """Resets the moments of the returns."""
+        self._moments.reset()
+        self._seen = 0
+        self._net_worth = None
 
 
 class PBR(TradeFlowRewardScheme):
@@ -208,6 +394,27 @@ class PBR(TradeFlowRewardScheme):
     def get_reward(self, portfolio: "Portfolio") -> float:
         return self.feed.next()["reward"]
 
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the `position` and `feed` of the reward scheme.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the reward scheme.
+        """
+        return {"position": self.position, "feed": self.feed.snapshot()}
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the `position` and `feed` of the reward scheme captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the reward scheme.
+        """
+        self.position = state["position"]
+        self.feed.restore(state["feed"])
+
     def reset(self) -> None:
         """Resets the `position` and `feed` of the reward scheme."""
         self.position = -1
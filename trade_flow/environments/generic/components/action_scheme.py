@@ -36,3 +36,23 @@ class ActionScheme(Component, TimeIndexed, metaclass=ABCMeta):
     def reset(self) -> None:
         """Resets the action scheme."""
         pass
+
+    def snapshot(self) -> Any:
+        """Captures the mutable state of the action scheme.
+
+        Returns
+        -------
+        Any
+            The state of the action scheme, or `None` if it has no state.
+        """
+        return None
+
+    def restore(self, state: Any) -> None:
+        """Restores the action scheme to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : Any
+            The state of the action scheme.
+        """
+        pass
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import Any
 
 from trade_flow.core.component import Component
 from trade_flow.core import TimeIndexed
@@ -28,3 +29,23 @@ class Informer(Component, TimeIndexed):
     def reset(self):
         """Resets the informer."""
         pass
+
+    def snapshot(self) -> Any:
+        """Captures the mutable state of the informer.
+
+        Returns
+        -------
+        Any
+            The state of the informer, or `None` if it has no state.
+        """
+        return None
+
+    def restore(self, state: Any) -> None:
+        """Restores the informer to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : Any
+            The state of the informer.
+        """
+        pass
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import Any
 
 
 import numpy as np
@@ -40,3 +41,23 @@ class Observer(Component, TimeIndexed):
     def reset(self, random_start=0):
         """Resets the observer."""
         pass
+
+    def snapshot(self) -> Any:
+        """Captures the mutable state of the observer.
+
+        Returns
+        -------
+        Any
+            The state of the observer, or `None` if it has no state.
+        """
+        return None
+
+    def restore(self, state: Any) -> None:
+        """Restores the observer to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : Any
+            The state of the observer.
+        """
+        pass
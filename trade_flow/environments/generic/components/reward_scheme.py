@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import Any
 
 from trade_flow.core.component import Component
 from trade_flow.core import TimeIndexed
@@ -28,3 +29,23 @@ class RewardScheme(Component, TimeIndexed):
     def reset(self) -> None:
         """Resets the reward scheme."""
         pass
+
+    def snapshot(self) -> Any:
+        """Captures the mutable state of the reward scheme.
+
+        Returns
+        -------
+        Any
+            The state of the reward scheme, or `None` if it has no state.
+        """
+        return None
+
+    def restore(self, state: Any) -> None:
+        """Restores the reward scheme to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : Any
+            The state of the reward scheme.
+        """
+        pass
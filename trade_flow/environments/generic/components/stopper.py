@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import Any
 
 from trade_flow.core.component import Component
 from trade_flow.core import TimeIndexed
@@ -30,3 +31,23 @@ class Stopper(Component, TimeIndexed):
     def reset(self) -> None:
         """Resets the stopper."""
         pass
+
+    def snapshot(self) -> Any:
+        """Captures the mutable state of the stopper.
+
+        Returns
+        -------
+        Any
+            The state of the stopper, or `None` if it has no state.
+        """
+        return None
+
+    def restore(self, state: Any) -> None:
+        """Restores the stopper to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : Any
+            The state of the stopper.
+        """
+        pass
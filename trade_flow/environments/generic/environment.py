@@ -1,6 +1,7 @@
 import uuid
 import logging
 
+from collections import namedtuple
 from typing import Dict, Any, Optional, Tuple
 from random import randint
 
@@ -18,6 +19,9 @@ from trade_flow.environments.generic import (
 )
 
 
+EnvironmentSnapshot = namedtuple("EnvironmentSnapshot", ["env_id", "episode_id", "step", "states"])
+
+
 class TradingEnvironment(gymnasium.Env, TimeIndexed):
     """A trading environment made for use with Gym-compatible reinforcement
     learning algorithms.
@@ -148,7 +152,7 @@ class TradingEnvironment(gymnasium.Env, TimeIndexed):
             The first observation of the environment.
         """
         if self.random_start_pct > 0.00:
-            size = len(self.observer.feed.process[-1].inputs[0].iterable)
+            size = self.observer.feed.source_length
             random_start = randint(0, int(size * self.random_start_pct))
         else:
             random_start = 0
@@ -170,6 +174,52 @@ class TradingEnvironment(gymnasium.Env, TimeIndexed):
 
         return obs, info
 
+    def snapshot(self) -> "EnvironmentSnapshot":
+        """Captures the state of the environment in the middle of an episode.
+
+        Unlike `copy.deepcopy`, only the state that changes while stepping is
+        captured: the step of the clock and the `snapshot` of every component
+        but the renderer, i.e. the cursors and windows of the streams of the
+        feed, the balances of the wallets, the order book of the broker, the
+        ledger and the observation history. The data, the configuration and
+        the stream graph are shared with the environment.
+
+        The environment can keep being stepped after a snapshot and be
+        restored to it any number of times, e.g. to branch rollouts from the
+        same state, or to start episodes from a warmed up state instead of
+        resetting.
+
+        Returns
+        -------
+        `EnvironmentSnapshot`
+            The snapshot to pass to `restore`.
+        """
+        states = {
+            name: c.snapshot() for name, c in self.components.items() if name != "renderer"
+        }
+        return EnvironmentSnapshot(id(self), self.episode_id, self.clock.step, states)
+
+    def restore(self, snapshot: "EnvironmentSnapshot") -> None:
+        """Restores the environment to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        snapshot : `EnvironmentSnapshot`
+            A snapshot of this environment.
+
+        Raises
+        ------
+        ValueError
+            Raised if the snapshot was taken from another environment.
+        """
+        if snapshot.env_id != id(self):
+            raise ValueError("The snapshot was taken from another environment.")
+
+        self.episode_id = snapshot.episode_id
+        self.clock.step = snapshot.step
+        for name, state in snapshot.states.items():
+            self.components[name].restore(state)
+
     def render(self, **kwargs) -> None:
         """Renders the environment."""
         self.renderer.render(self, **kwargs)
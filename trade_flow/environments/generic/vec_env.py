@@ -0,0 +1,439 @@
+"""
+A vectorized environment running `TradingEnvironment`s in subprocesses that
+exchange their steps through shared memory.
+
+Dependencies:
+    - Stable Baselines3
+"""
+
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import traceback
+
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from threading import BrokenBarrierError
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from stable_baselines3.common.env_util import is_wrapped
+from stable_baselines3.common.vec_env import VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+
+if TYPE_CHECKING:
+    from gymnasium.spaces import Space
+
+    from trade_flow.environments.generic import TradingEnvironment
+
+
+_STEP, _RESET, _CALL, _CLOSE = 1, 2, 3, 4
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """A vectorized environment running each environment in its own process,
+    exchanging actions, observations, rewards and dones through a single
+    shared memory block.
+
+    Every step, the controller writes the actions into the block and releases
+    the workers through a barrier. Each worker steps its environment, writes
+    its results into its own rows of the block and waits on the barrier again,
+    so nothing is pickled on the step path. Episodes that are done are reset
+    by their worker, which writes the last observation of the episode next to
+    the first observation of the new one.
+
+    The source dataset is written once to a `.npy` file that every worker
+    memory-maps read-only, so the data is shared through the page cache rather
+    than copied into each worker.
+
+    Parameters
+    ----------
+    env_fns : `List[Callable]`
+        The functions creating each environment. They are called in the
+        workers with the memory-mapped dataset as their only argument if a
+        dataset is given, and without arguments otherwise.
+    data : `Union[pd.DataFrame, np.ndarray, str]`, optional
+        The source dataset of the environments. Data frames must hold numeric
+        columns of a common type and are rebuilt on top of the memory-mapped
+        values. A string is taken as the path of an existing `.npy` file.
+    info_keys : `Sequence[str]`, default ("step", "net_worth")
+        The numeric entries of the step information to pass back from the
+        workers. Missing entries are passed back as `nan`.
+    start_method : str, optional
+        The start method of the worker processes. Defaults to `"forkserver"`
+        when available and `"spawn"` otherwise.
+    timeout : float, optional
+        The maximum time in seconds to wait for the workers on each call.
+    """
+
+    def __init__(
+        self,
+        env_fns: "List[Callable[..., TradingEnvironment]]",
+        data: "Union[pd.DataFrame, np.ndarray, str]" = None,
+        info_keys: "Sequence[str]" = ("step", "net_worth"),
+        start_method: str = None,
+        timeout: float = None,
+    ) -> None:
+        self.info_keys = list(info_keys)
+        self.timeout = timeout
+        self.closed = False
+
+        self._directory = None
+        self._data = self._share_data(data) if data is not None else None
+
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        # The workers must share the resource tracker of the controller, or the
+        # tracker each of them starts would unlink the memory when it exits.
+        resource_tracker.ensure_running()
+
+        n = len(env_fns)
+        self._barrier = ctx.Barrier(n + 1)
+        self._pipes, self._processes = [], []
+        for i, env_fn in enumerate(env_fns):
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(
+                    i,
+                    worker_remote,
+                    remote,
+                    CloudpickleWrapper(env_fn),
+                    self._data,
+                    self._barrier,
+                ),
+                daemon=True,
+            )
+            process.start()
+            worker_remote.close()
+            self._pipes += [remote]
+            self._processes += [process]
+
+        observation_space, action_space = self._receive(0)
+        for i in range(1, n):
+            self._receive(i)
+
+        self._layout = _layout(n, observation_space, action_space, len(self.info_keys))
+        self._memory = SharedMemory(create=True, size=max(1, self._layout["size"]))
+        self._arrays = _views(self._memory.buf, self._layout)
+        for pipe in self._pipes:
+            pipe.send((self._memory.name, self._layout, self.info_keys))
+        for i in range(n):
+            self._receive(i)
+
+        self.render_mode = None
+        super().__init__(n, observation_space, action_space)
+
+    def _share_data(self, data: "Union[pd.DataFrame, np.ndarray, str]") -> "Dict[str, Any]":
+        """Writes the dataset to a file the workers can memory-map.
+
+        Parameters
+        ----------
+        data : `Union[pd.DataFrame, np.ndarray, str]`
+            The dataset to share.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The path of the file, along with the columns and index to rebuild
+            a data frame with.
+        """
+        if isinstance(data, str):
+            return {"path": data}
+
+        spec = {}
+        if isinstance(data, pd.DataFrame):
+            spec["columns"] = data.columns
+            spec["index"] = data.index
+            data = data.to_numpy()
+            if data.dtype.hasobject:
+                raise ValueError("Only data frames of numeric columns can be shared.")
+
+        self._directory = tempfile.mkdtemp(prefix="trade_flow-")
+        spec["path"] = os.path.join(self._directory, "data.npy")
+        np.save(spec["path"], np.ascontiguousarray(data))
+        return spec
+
+    def _receive(self, i: int) -> Any:
+        """Receives a message from a worker, raising the errors of the worker."""
+        if self.timeout is not None and not self._pipes[i].poll(self.timeout):
+            raise TimeoutError(f"Worker {i} did not respond in {self.timeout} seconds.")
+        status, message = self._pipes[i].recv()
+        if status == "error":
+            raise RuntimeError(f"Worker {i} failed:\n{message}")
+        return message
+
+    def _wait(self) -> None:
+        """Waits for every worker at the barrier."""
+        try:
+            self._barrier.wait(self.timeout)
+        except BrokenBarrierError:
+            errors = []
+            for i, pipe in enumerate(self._pipes):
+                try:
+                    while pipe.poll():
+                        status, message = pipe.recv()
+                        if status == "error":
+                            errors += [f"Worker {i} failed:\n{message}"]
+                except (EOFError, OSError):
+                    pass
+            raise RuntimeError("\n".join(errors) or "A worker stopped responding.") from None
+
+    def _run(self, command: int) -> None:
+        """Runs a command on every worker and waits for them to finish."""
+        self._arrays["command"][0] = command
+        self._wait()
+        self._wait()
+
+    def reset(self) -> "np.ndarray":
+        """Resets every environment.
+
+        Returns
+        -------
+        `np.ndarray`
+            The first observation of each environment.
+        """
+        arrays = self._arrays
+        for i, seed in enumerate(self._seeds):
+            arrays["has_seed"][i] = seed is not None
+            arrays["seed"][i] = seed if seed is not None else 0
+        self._reset_seeds()
+
+        self._run(_RESET)
+        self.reset_infos = self._infos(np.zeros(self.num_envs, dtype=bool))
+        return arrays["obs"].copy()
+
+    def step_async(self, actions: "np.ndarray") -> None:
+        self._arrays["actions"][:] = np.reshape(actions, self._arrays["actions"].shape)
+        self._arrays["command"][0] = _STEP
+        self._wait()
+
+    def step_wait(self) -> "Tuple[np.ndarray, np.ndarray, np.ndarray, List[dict]]":
+        self._wait()
+        arrays = self._arrays
+        dones = arrays["terminated"] | arrays["truncated"]
+        infos = self._infos(dones)
+        return arrays["obs"].copy(), arrays["rewards"].copy(), dones, infos
+
+    def _infos(self, dones: "np.ndarray") -> "List[dict]":
+        """Rebuilds the step information of every environment."""
+        arrays = self._arrays
+        values = arrays["infos"].tolist()
+        infos = [dict(zip(self.info_keys, v)) for v in values]
+        for i in np.flatnonzero(dones):
+            infos[i]["terminal_observation"] = arrays["terminal"][i].copy()
+            infos[i]["TimeLimit.truncated"] = bool(
+                arrays["truncated"][i] and not arrays["terminated"][i]
+            )
+        return infos
+
+    def _call(
+        self, kind: str, name: str, args: tuple, indices: "Union[None, int, Sequence[int]]"
+    ) -> "List[Any]":
+        """Calls a method or accesses an attribute of the environments of the
+        given workers, passing the call through their pipes.
+
+        The calls and their results are exchanged while the workers are
+        between the two phases of the barrier, with every worker reading its
+        call as it is sent, so that neither has to fit in the pipe buffer.
+        """
+        indices = list(self._get_indices(indices))
+        calls = self._arrays["calls"]
+        calls[:] = False
+        calls[indices] = True
+
+        self._arrays["command"][0] = _CALL
+        self._wait()
+        for i in indices:
+            self._pipes[i].send((kind, name, args))
+        results = [self._receive(i) for i in indices]
+        self._wait()
+        return results
+
+    def get_attr(
+        self, attr_name: str, indices: "Union[None, int, Sequence[int]]" = None
+    ) -> "List[Any]":
+        return self._call("get", attr_name, (), indices)
+
+    def set_attr(
+        self, attr_name: str, value: Any, indices: "Union[None, int, Sequence[int]]" = None
+    ) -> None:
+        self._call("set", attr_name, (value,), indices)
+
+    def env_method(
+        self,
+        method_name: str,
+        *method_args,
+        indices: "Union[None, int, Sequence[int]]" = None,
+        **method_kwargs,
+    ) -> "List[Any]":
+        return self._call("method", method_name, (method_args, method_kwargs), indices)
+
+    def env_is_wrapped(
+        self, wrapper_class: type, indices: "Union[None, int, Sequence[int]]" = None
+    ) -> "List[bool]":
+        return self._call("wrapped", wrapper_class, (), indices)
+
+    def close(self) -> None:
+        """Stops the workers and releases the shared memory and dataset."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._arrays["command"][0] = _CLOSE
+            self._barrier.wait(self.timeout)
+        except BrokenBarrierError:
+            pass
+        for process in self._processes:
+            process.join(self.timeout)
+            if process.is_alive():
+                process.terminate()
+        for pipe in self._pipes:
+            pipe.close()
+
+        self._arrays = None
+        self._memory.close()
+        self._memory.unlink()
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+
+def _layout(n: int, observation_space: "Space", action_space: "Space", n_infos: int) -> dict:
+    """Computes where each array lives in the shared memory block.
+
+    Parameters
+    ----------
+    n : int
+        The number of environments.
+    observation_space : `Space`
+        The observation space of the environments.
+    action_space : `Space`
+        The action space of the environments.
+    n_infos : int
+        The number of entries of step information.
+
+    Returns
+    -------
+    dict
+        The dtype, shape and offset of each array under its name, and the total
+        size of the block under `"size"`.
+    """
+    arrays = [
+        ("command", np.int64, (1,)),
+        ("seed", np.int64, (n,)),
+        ("has_seed", np.bool_, (n,)),
+        ("calls", np.bool_, (n,)),
+        ("actions", action_space.dtype, (n,) + action_space.shape),
+        ("obs", observation_space.dtype, (n,) + observation_space.shape),
+        ("terminal", observation_space.dtype, (n,) + observation_space.shape),
+        ("rewards", np.float32, (n,)),
+        ("terminated", np.bool_, (n,)),
+        ("truncated", np.bool_, (n,)),
+        ("infos", np.float64, (n, n_infos)),
+    ]
+    layout, offset = {}, 0
+    for name, dtype, shape in arrays:
+        dtype = np.dtype(dtype)
+        offset = -(-offset // dtype.alignment) * dtype.alignment
+        layout[name] = (dtype.str, shape, offset)
+        offset += dtype.itemsize * int(np.prod(shape))
+    layout["size"] = offset
+    return layout
+
+
+def _views(buffer: "memoryview", layout: dict) -> "Dict[str, np.ndarray]":
+    """Creates the arrays of a layout on top of a shared memory buffer."""
+    views = {}
+    for name, spec in layout.items():
+        if name != "size":
+            dtype, shape, offset = spec
+            views[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+    return views
+
+
+def _load_data(spec: "Dict[str, Any]") -> "Union[pd.DataFrame, np.ndarray]":
+    """Memory-maps a shared dataset read-only."""
+    values = np.load(spec["path"], mmap_mode="r")
+    if "columns" in spec:
+        return pd.DataFrame(values, index=spec["index"], columns=spec["columns"], copy=False)
+    return values
+
+
+def _worker(
+    index: int,
+    remote: "mp.connection.Connection",
+    parent_remote: "mp.connection.Connection",
+    env_fn: "CloudpickleWrapper",
+    data: "Dict[str, Any]",
+    barrier: "mp.synchronize.Barrier",
+) -> None:
+    """Runs an environment, stepping it whenever the controller releases the barrier."""
+    parent_remote.close()
+    memory, arrays = None, None
+    try:
+        env = env_fn.var(_load_data(data)) if data is not None else env_fn.var()
+        remote.send(("ok", (env.observation_space, env.action_space)))
+
+        name, layout, info_keys = remote.recv()
+        memory = SharedMemory(name=name)
+        arrays = _views(memory.buf, layout)
+        discrete = arrays["actions"].ndim == 1
+        remote.send(("ok", None))
+
+        while True:
+            barrier.wait()
+            command = arrays["command"][0]
+
+            if command == _STEP:
+                action = arrays["actions"][index]
+                action = action.item() if discrete else action.copy()
+                obs, reward, terminated, truncated, info = env.step(action)
+                if terminated or truncated:
+                    arrays["terminal"][index] = obs
+                    obs, _ = env.reset()
+                arrays["obs"][index] = obs
+                arrays["rewards"][index] = reward
+                arrays["terminated"][index] = terminated
+                arrays["truncated"][index] = truncated
+                arrays["infos"][index] = [info.get(k, np.nan) for k in info_keys]
+
+            elif command == _RESET:
+                seed = int(arrays["seed"][index]) if arrays["has_seed"][index] else None
+                obs, info = env.reset(seed=seed)
+                arrays["obs"][index] = obs
+                arrays["infos"][index] = [info.get(k, np.nan) for k in info_keys]
+
+            elif command == _CALL:
+                if arrays["calls"][index]:
+                    kind, name, args = remote.recv()
+                    if kind == "get":
+                        result = getattr(env, name)
+                    elif kind == "set":
+                        result = setattr(env, name, args[0])
+                    elif kind == "method":
+                        result = getattr(env, name)(*args[0], **args[1])
+                    else:
+                        result = is_wrapped(env, name)
+                    remote.send(("ok", result))
+
+            elif command == _CLOSE:
+                env.close()
+                break
+
+            barrier.wait()
+
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        remote.send(("error", traceback.format_exc()))
+        barrier.abort()
+    finally:
+        if memory is not None:
+            arrays = None
+            memory.close()
+        remote.close()
@@ -0,0 +1,183 @@
+"""
+A columnar, memory-mapped store for the info and price data of symbols.
+
+A store is a directory holding a `symbols.json` header, with the info of every
+symbol and the layout of its data, and one `.npy` file per column of the price
+data of each symbol, plus one for its times. Loading a store maps the columns
+read-only instead of reading and unpickling them, so it takes about the same
+time whatever the amount of data, and processes loading the same store share
+the pages of the files.
+"""
+
+import os
+import json
+import argparse
+from urllib.parse import quote
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from trade_flow.environments.metatrader.terminal import SymbolInfo
+
+try:
+    import joblib
+
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    JOBLIB_AVAILABLE = False
+
+
+STORE_VERSION = 1
+HEADER_FILENAME = "symbols.json"
+INDEX_FILENAME = "_index.npy"
+
+
+def is_store(path: str) -> bool:
+    """
+    Checks whether a path is a symbol store.
+
+    Parameters:
+    ----------
+    path : str
+        The path to check.
+
+    Returns:
+    -------
+    bool
+        True if the path is a directory holding a store header.
+    """
+    return os.path.isfile(os.path.join(path, HEADER_FILENAME))
+
+
+def save_store(
+    path: str, symbols_info: Dict[str, SymbolInfo], symbols_data: Dict[str, pd.DataFrame]
+) -> None:
+    """
+    Saves the info and price data of symbols as a store.
+
+    The columns are written first and the header last, so a store interrupted
+    while saving is not mistaken for a complete one.
+
+    Parameters:
+    ----------
+    path : str
+        The directory to save the store in. It is created if needed.
+    symbols_info : Dict[str, SymbolInfo]
+        The info of each symbol.
+    symbols_data : Dict[str, pd.DataFrame]
+        The price data of each symbol, indexed by time.
+    """
+    symbols = {}
+    for symbol, df in symbols_data.items():
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError(f"The data of symbol '{symbol}' must be indexed by time.")
+
+        directory = quote(symbol, safe="")
+        os.makedirs(os.path.join(path, directory), exist_ok=True)
+
+        index = df.index.as_unit("ns")
+        np.save(os.path.join(path, directory, INDEX_FILENAME), index.asi8, allow_pickle=False)
+
+        columns = {}
+        for column in df.columns:
+            values = np.ascontiguousarray(df[column].to_numpy())
+            filename = quote(str(column), safe="") + ".npy"
+            np.save(os.path.join(path, directory, filename), values, allow_pickle=False)
+            columns[str(column)] = filename
+
+        info = dict(vars(symbols_info[symbol]))
+        info["currencies"] = list(info["currencies"])
+        symbols[symbol] = {
+            "info": info,
+            "directory": directory,
+            "length": len(df),
+            "index": {"name": df.index.name, "tz": str(index.tz) if index.tz else None},
+            "columns": columns,
+        }
+
+    header = {"version": STORE_VERSION, "symbols": symbols}
+    with open(os.path.join(path, HEADER_FILENAME), "w") as file:
+        json.dump(header, file, indent=2)
+
+
+def load_store(
+    path: str, mmap_mode: str = "r"
+) -> Tuple[Dict[str, SymbolInfo], Dict[str, pd.DataFrame]]:
+    """
+    Loads the info and price data of symbols from a store.
+
+    The columns of the data frames are memory-mapped, and read-only with the
+    default `mmap_mode`. The times of the index are read into memory.
+
+    Parameters:
+    ----------
+    path : str
+        The directory of the store.
+    mmap_mode : str, optional
+        The mode to map the columns with, as in `np.load` (default is "r").
+
+    Returns:
+    -------
+    Tuple[Dict[str, SymbolInfo], Dict[str, pd.DataFrame]]
+        The info and the price data of each symbol.
+    """
+    with open(os.path.join(path, HEADER_FILENAME)) as file:
+        header = json.load(file)
+
+    if header.get("version") != STORE_VERSION:
+        raise ValueError(f"Unsupported symbol store version '{header.get('version')}'.")
+
+    symbols_info, symbols_data = {}, {}
+    for symbol, entry in header["symbols"].items():
+        directory = os.path.join(path, entry["directory"])
+
+        info = SymbolInfo.__new__(SymbolInfo)
+        info.__dict__.update(entry["info"], currencies=tuple(entry["info"]["currencies"]))
+        symbols_info[symbol] = info
+
+        times = np.load(os.path.join(directory, INDEX_FILENAME), mmap_mode=mmap_mode)
+        tz = entry["index"]["tz"]
+        index = pd.DatetimeIndex(
+            times.view("datetime64[ns]"),
+            dtype="datetime64[ns, UTC]" if tz else "datetime64[ns]",
+            name=entry["index"]["name"],
+        )
+        if tz and tz != "UTC":
+            index = index.tz_convert(tz)
+
+        columns = {
+            column: np.asarray(np.load(os.path.join(directory, filename), mmap_mode=mmap_mode))
+            for column, filename in entry["columns"].items()
+        }
+        symbols_data[symbol] = pd.DataFrame(columns, index=index, copy=False)
+
+    return symbols_info, symbols_data
+
+
+def convert_joblib(src: str, dst: str) -> None:
+    """
+    Converts symbols saved with joblib, as `(symbols_info, symbols_data)`, to a store.
+
+    Parameters:
+    ----------
+    src : str
+        The joblib file to convert.
+    dst : str
+        The directory to save the store in.
+    """
+    if not JOBLIB_AVAILABLE:
+        raise ImportError("joblib is required to convert joblib files.")
+
+    with open(src, "rb") as file:
+        symbols_info, symbols_data = joblib.load(file)
+    save_store(dst, symbols_info, symbols_data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts joblib symbol files to stores.")
+    parser.add_argument("files", nargs="+", help="The joblib files to convert.")
+    args = parser.parse_args()
+
+    for filename in args.files:
+        convert_joblib(filename, os.path.splitext(filename)[0])
@@ -1,6 +1,5 @@
 from typing import List, Tuple, Dict, Any, Optional, Union, Callable
 
-import copy
 from datetime import datetime
 from pathos.multiprocessing import ProcessingPool as Pool
 
@@ -15,7 +14,8 @@ import plotly.graph_objects as go
 import gymnasium as gym
 from gymnasium import spaces
 
-from trade_flow.environments.metatrader.simulator import OrderType, Simulator as MT5Simulator
+from trade_flow.environments.metatrader.engine.orders import OrderType
+from trade_flow.environments.metatrader.engine.execution.simulated_2 import Simulator as MT5Simulator
 
 
 class MT5Env(gym.Env):
@@ -115,7 +115,7 @@ class MT5Env(gym.Env):
 
         self._truncated = False
         self._current_tick = self._start_tick
-        self.simulator = copy.deepcopy(self.original_simulator)
+        self.simulator = self.original_simulator.fork()
         self.simulator.current_time = self.time_points[self._current_tick]
         self.history = [self._create_info()]
 
@@ -2,13 +2,33 @@ from typing import List, Tuple, Dict, Any, Optional
 import numpy as np
 import pandas as pd
 import os
-import joblib
+import copy
 from datetime import datetime, timedelta
 
 from trade_flow.environments.metatrader.terminal import Timeframe, SymbolInfo, retrieve_data
+from trade_flow.environments.metatrader.data.store import is_store, save_store, load_store
 from trade_flow.environments.metatrader.engine.orders import OrderType, Order
 from trade_flow.environments.metatrader.engine.exceptions import SymbolNotFound, OrderNotFound
 
+try:
+    import joblib
+
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    JOBLIB_AVAILABLE = False
+
+# The fields of the open orders used to mark them to market, one row per order.
+ORDER_DTYPE = np.dtype(
+    [
+        ("symbol", np.intp),
+        ("sign", np.float64),
+        ("volume", np.float64),
+        ("contract_size", np.float64),
+        ("entry_price", np.float64),
+        ("fee", np.float64),
+        ("margin", np.float64),
+    ]
+)
 
 class Simulator:
     """
@@ -28,16 +48,18 @@ class Simulator:
     hedge: bool
         Whether hedging is allowed (default: True)
     symbols_filename: Optional[str]
-        Filename to load/save symbol information and data
+        Symbol store, or joblib file, to load symbol information and data from
 
     Methods:
     -------
     download_data(symbols, time_range, timeframe)
         Downloads symbol data for given time range and timeframe.
     save_symbols(filename)
-        Saves symbols information and data to a file.
+        Saves symbols information and data to a memory-mapped store.
     load_symbols(filename)
-        Loads symbols information and data from a file.
+        Loads symbols information and data from a store or a joblib file.
+    fork()
+        Creates a simulator sharing the market data, with a copy of the account.
     tick(delta_time)
         Simulates a time tick to update orders and account status.
     create_order(order_type, symbol, volume, fee, raise_exception)
@@ -72,6 +94,11 @@ class Simulator:
         self.closed_orders: List[Order] = []
         self.current_time: datetime = NotImplemented
 
+        self._price_arrays: Dict[str, Tuple[pd.DataFrame, np.ndarray, np.ndarray]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._open_orders: Optional[np.ndarray] = None
+        self._open_symbols: List[str] = []
+
         if symbols_filename:
             if not self.load_symbols(symbols_filename):
                 raise FileNotFoundError(f"file '{symbols_filename}' not found")
@@ -110,30 +137,81 @@ class Simulator:
 
     def save_symbols(self, filename: str) -> None:
         """
-        Saves the current symbol information and data to a file using joblib.
+        Saves the current symbol information and data as a memory-mapped store.
+
+        Parameters:
+        ----------
+        filename : str
+            The directory to save the store in.
         """
-        with open(filename, "wb") as file:
-            joblib.dump((self.symbols_info, self.symbols_data), file)
+        save_store(filename, self.symbols_info, self.symbols_data)
 
     def load_symbols(self, filename: str) -> bool:
         """
-        Loads symbol information and data from a file using joblib.
+        Loads symbol information and data from a memory-mapped store, or from
+        a file saved with joblib by earlier versions.
+
+        The price data of a store is mapped read-only rather than read, so it
+        is shared with every process loading the same store.
+
+        Parameters:
+        ----------
+        filename : str
+            The directory of the store, or the joblib file.
 
         Returns:
         -------
         bool
             True if the file exists and data is successfully loaded, False otherwise.
         """
-        if not os.path.exists(filename):
+        if is_store(filename):
+            self.symbols_info, self.symbols_data = load_store(filename)
+            return True
+        if not os.path.isfile(filename):
             return False
+        if not JOBLIB_AVAILABLE:
+            raise ImportError("joblib is required to load joblib files.")
         with open(filename, "rb") as file:
             self.symbols_info, self.symbols_data = joblib.load(file)
         return True
 
+    def fork(self) -> "Simulator":
+        """
+        Creates a simulator sharing the market data of this one, with a copy of its account.
+
+        The symbols info, the price data and the arrays built from it are shared
+        read-only between the simulators, and only the account state, i.e. the
+        balance, equity, margin, current time and orders, is copied. This makes
+        starting an episode from the same simulator independent of the amount
+        of price data, unlike `copy.deepcopy`.
+
+        Returns:
+        -------
+        Simulator
+            The new simulator.
+        """
+        for symbol in self.symbols_data:
+            self._get_price_arrays(symbol)
+
+        simulator = copy.copy(self)
+        simulator.symbols_info = dict(self.symbols_info)
+        simulator.symbols_data = dict(self.symbols_data)
+        simulator.orders = copy.deepcopy(self.orders)
+        simulator.closed_orders = copy.deepcopy(self.closed_orders)
+        simulator._price_arrays = dict(self._price_arrays)
+        simulator._cursors = dict(self._cursors)
+        simulator._open_orders = None
+        return simulator
+
     def tick(self, delta_time: timedelta = timedelta()) -> None:
         """
         Simulates the passage of time and updates all open orders' status.
 
+        The open orders are marked to market together, reading the close price
+        and unit ratio once per symbol. If the margin level falls below the
+        stop out level, the orders are sorted once by profit and the least
+        profitable ones are closed until the margin level recovers.
+
         Parameters:
         ----------
         delta_time : timedelta
@@ -144,23 +222,93 @@ class Simulator:
         self.current_time += delta_time
         self.equity = self.balance
 
-        for order in self.orders:
-            order.exit_time = self.current_time
-            order.exit_price = self.price_at(order.symbol, order.exit_time)["Close"]
-            self._update_order_profit(order)
-            self.equity += order.profit
-
-        while self.margin_level < self.stop_out_level and len(self.orders) > 0:
-            most_unprofitable_order = min(self.orders, key=lambda order: order.profit)
-            self.close_order(most_unprofitable_order)
+        if len(self.orders) > 0:
+            orders = self._get_open_orders()
+            closes = np.empty(len(self._open_symbols))
+            ratios = np.empty(len(self._open_symbols))
+            for i, symbol in enumerate(self._open_symbols):
+                closes[i] = self._close_at(symbol, self.current_time)
+                ratios[i] = self._get_unit_ratio(symbol, self.current_time)
+
+            exit_prices = closes[orders["symbol"]]
+            diff = exit_prices - orders["entry_price"]
+            v = orders["volume"] * orders["contract_size"]
+            profits = v * (orders["sign"] * diff - orders["fee"]) * ratios[orders["symbol"]]
+
+            for order, exit_price, profit in zip(
+                self.orders, exit_prices.tolist(), profits.tolist()
+            ):
+                order.exit_time = self.current_time
+                order.exit_price = exit_price
+                order.profit = profit
+            self.equity += float(profits.sum())
+
+            if self.margin_level < self.stop_out_level:
+                self._stop_out(orders, profits)
 
         if self.balance < 0.0:
             self.balance = 0.0
             self.equity = self.balance
 
+    def _get_open_orders(self) -> np.ndarray:
+        """
+        Get the open orders as a structured array of `ORDER_DTYPE`.
+
+        The array is rebuilt after the simulator opens, modifies or closes orders.
+
+        Returns:
+        -------
+        np.ndarray
+            The open orders, in the order of `orders`. The symbol of each order
+            is its index in `_open_symbols`.
+        """
+        if self._open_orders is None or len(self._open_orders) != len(self.orders):
+            symbols = list(dict.fromkeys(order.symbol for order in self.orders))
+            index = {symbol: i for i, symbol in enumerate(symbols)}
+            self._open_orders = np.array(
+                [
+                    (
+                        index[order.symbol],
+                        order.type.sign,
+                        order.volume,
+                        self.symbols_info[order.symbol].trade_contract_size,
+                        order.entry_price,
+                        order.fee,
+                        order.margin,
+                    )
+                    for order in self.orders
+                ],
+                dtype=ORDER_DTYPE,
+            )
+            self._open_symbols = symbols
+        return self._open_orders
+
+    def _stop_out(self, orders: np.ndarray, profits: np.ndarray) -> None:
+        """
+        Close the least profitable orders until the margin level reaches the stop out level.
+
+        Parameters:
+        ----------
+        orders : np.ndarray
+            The open orders, as returned by `_get_open_orders`.
+        profits : np.ndarray
+            The current profit of each open order.
+        """
+        worst = np.argsort(profits, kind="stable")
+        margins = np.cumsum(np.concatenate(([self.margin], -orders["margin"][worst])))[1:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            levels = self.equity / margins
+        levels[np.round(margins, 6) == 0.0] = np.inf
+
+        (recovered,) = np.nonzero(levels >= self.stop_out_level)
+        n = recovered[0] + 1 if len(recovered) > 0 else len(worst)
+        for order in [self.orders[i] for i in worst[:n].tolist()]:
+            self.close_order(order)
+
     def nearest_time(self, symbol: str, time: datetime) -> datetime:
         """
-        Finds the nearest available time for a symbol's data.
+        Finds the nearest available time for a symbol's data, i.e. the latest
+        time not after `time`, or the first time if `time` is before the data.
 
         Parameters:
         ----------
@@ -174,14 +322,7 @@ class Simulator:
         datetime
             The nearest available time in the symbol's data.
         """
-        df = self.symbols_data[symbol]
-        if time in df.index:
-            return time
-        try:
-            (i,) = df.index.get_indexer([time], method="ffill")
-        except KeyError:
-            (i,) = df.index.get_indexer([time], method="bfill")
-        return df.index[i]
+        return self.symbols_data[symbol].index[self._time_index(symbol, time)]
 
     def price_at(self, symbol: str, time: datetime) -> pd.Series:
         """
@@ -199,11 +340,96 @@ class Simulator:
         pd.Series
             The price data for the symbol at the nearest time.
         """
+        return self.symbols_data[symbol].iloc[self._time_index(symbol, time)]
+
+    def _get_price_arrays(self, symbol: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the times and close prices of a symbol's data as arrays.
+
+        The arrays are built once per DataFrame and rebuilt if the DataFrame of
+        the symbol is replaced, e.g. by `load_symbols`.
+
+        Parameters:
+        ----------
+        symbol : str
+            The symbol to get the arrays for.
+
+        Returns:
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The times, as int64 nanoseconds since the epoch, and the close
+            prices, as float64.
+        """
         df = self.symbols_data.get(symbol)
         if df is None:
             raise ValueError(f"Symbol '{symbol}' not found in symbols data.")
-        nearest_time = self.nearest_time(symbol, time)
-        return df.loc[nearest_time]
+
+        cached = self._price_arrays.get(symbol)
+        if cached is None or cached[0] is not df:
+            if not df.index.is_monotonic_increasing:
+                raise ValueError(f"The data of symbol '{symbol}' must be sorted by time.")
+            times = df.index.values.astype("datetime64[ns]", copy=False).view(np.int64)
+            times = np.ascontiguousarray(times)
+            closes = np.ascontiguousarray(df["Close"].to_numpy(dtype=np.float64))
+            times.flags.writeable = closes.flags.writeable = False
+            cached = self._price_arrays[symbol] = (df, times, closes)
+            self._cursors[symbol] = 0
+        return cached[1], cached[2]
+
+    def _time_index(self, symbol: str, time: datetime) -> int:
+        """
+        Get the position of the nearest available time in a symbol's data.
+
+        The last position found for each symbol is kept as a cursor, so that
+        moving forward one step at a time takes a couple of array reads, and
+        falls back to a binary search otherwise.
+
+        Parameters:
+        ----------
+        symbol : str
+            The symbol to get the position for.
+        time : datetime
+            The time to match.
+
+        Returns:
+        -------
+        int
+            The position of the latest time not after `time`, or 0 if `time`
+            is before the data.
+        """
+        times, _ = self._get_price_arrays(symbol)
+        t = pd.Timestamp(time).value
+
+        i = self._cursors[symbol]
+        if times[i] <= t:
+            if i + 1 == len(times) or t < times[i + 1]:
+                return i
+            if i + 2 == len(times) or t < times[i + 2]:
+                self._cursors[symbol] = i + 1
+                return i + 1
+
+        i = max(int(np.searchsorted(times, t, side="right")) - 1, 0)
+        self._cursors[symbol] = i
+        return i
+
+    def _close_at(self, symbol: str, time: datetime) -> float:
+        """
+        Get the close price of a symbol at the nearest available time.
+
+        Parameters:
+        ----------
+        symbol : str
+            The symbol to get the price for.
+        time : datetime
+            The time at which to get the price.
+
+        Returns:
+        -------
+        float
+            The close price of the symbol at the nearest time.
+        """
+        _, closes = self._get_price_arrays(symbol)
+        return float(closes[self._time_index(symbol, time)])
 
     def symbol_orders(self, symbol: str) -> List[Order]:
         """
@@ -288,7 +514,7 @@ class Simulator:
         """
         order_id = len(self.closed_orders) + len(self.orders) + 1
         entry_time = self.current_time
-        entry_price = self.price_at(symbol, entry_time)["Close"]
+        entry_price = self._close_at(symbol, entry_time)
 
         order = Order(
             order_id,
@@ -315,6 +541,7 @@ class Simulator:
         self.equity += order.profit
         self.margin += order.margin
         self.orders.append(order)
+        self._open_orders = None
         return order
 
     def _create_unhedged_order(
@@ -361,6 +588,7 @@ class Simulator:
             old_order.margin += new_order.margin
             old_order.entry_price = entry_price_weighted_average
             old_order.fee = max(old_order.fee, new_order.fee)
+            self._open_orders = None
 
             return old_order
 
@@ -381,6 +609,7 @@ class Simulator:
 
         self.balance += partial_profit
         self.margin -= partial_margin
+        self._open_orders = None
 
         return old_order
 
@@ -408,7 +637,7 @@ class Simulator:
             raise OrderNotFound("Order not found in the order list.")
 
         order.exit_time = self.current_time
-        order.exit_price = self.price_at(order.symbol, order.exit_time)["Close"]
+        order.exit_price = self._close_at(order.symbol, order.exit_time)
         self._update_order_profit(order)
 
         self.balance += order.profit
@@ -420,6 +649,7 @@ class Simulator:
 
         self.orders.remove(order)
         self.closed_orders.append(order)
+        self._open_orders = None
 
         return order.profit
 
@@ -513,13 +743,13 @@ class Simulator:
             return 1.0
 
         if self.unit == symbol_info.currency_margin:
-            return 1 / self.price_at(symbol, time)["Close"]
+            return 1 / self._close_at(symbol, time)
 
         unit_symbol_info = self._get_unit_symbol_info(symbol_info.currency_profit)
         if unit_symbol_info is None:
             raise SymbolNotFound(f"Unit symbol for '{symbol_info.currency_profit}' not found.")
 
-        unit_price = self.price_at(unit_symbol_info.name, time)["Close"]
+        unit_price = self._close_at(unit_symbol_info.name, time)
         if unit_symbol_info.currency_margin == self.unit:
             unit_price = 1.0 / unit_price
 
@@ -1 +1 @@
-# from .order import OrderType, Order
\ No newline at end of file
+from .order import OrderType, Order
\ No newline at end of file
@@ -1,16 +1,67 @@
+from functools import lru_cache
+from typing import Any
+
 from gymnasium.envs.registration import register
 
-from .terminal import Timeframe, SymbolInfo
-from .simulator import Simulator, OrderType, Order, SymbolNotFound, OrderNotFound
-from .envs import MT5Env
 from .data import FOREX_DATA_PATH, STOCKS_DATA_PATH, CRYPTO_DATA_PATH, MIXED_DATA_PATH
 
 
+@lru_cache(maxsize=None)
+def load_simulator(symbols_filename: str) -> Any:
+    """
+    Loads the symbols of a data file into a simulator, once per process.
+
+    Parameters:
+    ----------
+    symbols_filename : str
+        The symbol store, or joblib file, to load.
+
+    Returns:
+    -------
+    Simulator
+        The simulator holding the symbols. It is shared by every call with the
+        same file and must not be modified.
+    """
+    from .engine.execution import Simulator
+
+    return Simulator(symbols_filename=symbols_filename)
+
+
+def make_env(symbols_filename: str, hedge: bool, **kwargs: Any) -> Any:
+    """
+    Creates a `MT5Env` trading the symbols of a data file.
+
+    This is the entry point of the registered environments, so that their
+    data is only loaded when one of them is made, rather than when this
+    module is imported. Environments made from the same file share its data.
+
+    Parameters:
+    ----------
+    symbols_filename : str
+        The symbol store, or joblib file, to load.
+    hedge : bool
+        Whether hedging is allowed.
+    **kwargs : keyword arguments
+        The other arguments of `MT5Env`.
+
+    Returns:
+    -------
+    MT5Env
+        The environment.
+    """
+    from .engine.execution import MT5Env
+
+    simulator = load_simulator(symbols_filename).fork()
+    simulator.hedge = hedge
+    return MT5Env(original_simulator=simulator, **kwargs)
+
+
 register(
     id="forex-hedge-v0",
-    entry_point="trade_flow.environments.metatrader.envs:MT5Env",
+    entry_point="trade_flow.environments.metatrader.register_env:make_env",
     kwargs={
-        "original_simulator": Simulator(symbols_filename=FOREX_DATA_PATH, hedge=True),
+        "symbols_filename": FOREX_DATA_PATH,
+        "hedge": True,
         "trading_symbols": ["EURUSD", "GBPCAD", "USDJPY"],
         "window_size": 10,
         "symbol_max_orders": 2,
@@ -20,9 +71,10 @@ register(
 
 register(
     id="forex-unhedge-v0",
-    entry_point="trade_flow.environments.metatrader.envs:MT5Env",
+    entry_point="trade_flow.environments.metatrader.register_env:make_env",
     kwargs={
-        "original_simulator": Simulator(symbols_filename=FOREX_DATA_PATH, hedge=False),
+        "symbols_filename": FOREX_DATA_PATH,
+        "hedge": False,
         "trading_symbols": ["EURUSD", "GBPCAD", "USDJPY"],
         "window_size": 10,
         "fee": lambda symbol: 0.03 if "JPY" in symbol else 0.0003,
@@ -31,9 +83,10 @@ register(
 
 register(
     id="stocks-hedge-v0",
-    entry_point="trade_flow.environments.metatrader.envs:MT5Env",
+    entry_point="trade_flow.environments.metatrader.register_env:make_env",
     kwargs={
-        "original_simulator": Simulator(symbols_filename=STOCKS_DATA_PATH, hedge=True),
+        "symbols_filename": STOCKS_DATA_PATH,
+        "hedge": True,
         "trading_symbols": ["GOOG", "AAPL", "TSLA", "MSFT"],
         "window_size": 10,
         "symbol_max_orders": 2,
@@ -43,9 +96,10 @@ register(
 
 register(
     id="stocks-unhedge-v0",
-    entry_point="trade_flow.environments.metatrader.envs:MT5Env",
+    entry_point="trade_flow.environments.metatrader.register_env:make_env",
     kwargs={
-        "original_simulator": Simulator(symbols_filename=STOCKS_DATA_PATH, hedge=False),
+        "symbols_filename": STOCKS_DATA_PATH,
+        "hedge": False,
         "trading_symbols": ["GOOG", "AAPL", "TSLA", "MSFT"],
         "window_size": 10,
         "fee": 0.2,
@@ -54,9 +108,10 @@ register(
 
 register(
     id="crypto-hedge-v0",
-    entry_point="trade_flow.environments.metatrader.envs:MT5Env",
+    entry_point="trade_flow.environments.metatrader.register_env:make_env",
     kwargs={
-        "original_simulator": Simulator(symbols_filename=CRYPTO_DATA_PATH, hedge=True),
+        "symbols_filename": CRYPTO_DATA_PATH,
+        "hedge": True,
         "trading_symbols": ["BTCUSD", "ETHUSD", "BCHUSD"],
         "window_size": 10,
         "symbol_max_orders": 2,
@@ -70,9 +125,10 @@ register(
 
 register(
     id="crypto-unhedge-v0",
-    entry_point="trade_flow.environments.metatrader.envs:MT5Env",
+    entry_point="trade_flow.environments.metatrader.register_env:make_env",
     kwargs={
-        "original_simulator": Simulator(symbols_filename=CRYPTO_DATA_PATH, hedge=False),
+        "symbols_filename": CRYPTO_DATA_PATH,
+        "hedge": False,
         "trading_symbols": ["BTCUSD", "ETHUSD", "BCHUSD"],
         "window_size": 10,
         "fee": lambda symbol: {
@@ -85,9 +141,10 @@ register(
 
 register(
     id="mixed-hedge-v0",
-    entry_point="trade_flow.environments.metatrader.envs:MT5Env",
+    entry_point="trade_flow.environments.metatrader.register_env:make_env",
     kwargs={
-        "original_simulator": Simulator(symbols_filename=MIXED_DATA_PATH, hedge=True),
+        "symbols_filename": MIXED_DATA_PATH,
+        "hedge": True,
         "trading_symbols": ["EURUSD", "USDCAD", "GOOG", "AAPL", "BTCUSD", "ETHUSD"],
         "window_size": 10,
         "symbol_max_orders": 2,
@@ -104,9 +161,10 @@ register(
 
 register(
     id="mixed-unhedge-v0",
-    entry_point="trade_flow.environments.metatrader.envs:MT5Env",
+    entry_point="trade_flow.environments.metatrader.register_env:make_env",
     kwargs={
-        "original_simulator": Simulator(symbols_filename=MIXED_DATA_PATH, hedge=False),
+        "symbols_filename": MIXED_DATA_PATH,
+        "hedge": False,
         "trading_symbols": ["EURUSD", "USDCAD", "GOOG", "AAPL", "BTCUSD", "ETHUSD"],
         "window_size": 10,
         "fee": lambda symbol: {
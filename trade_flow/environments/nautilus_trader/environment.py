@@ -210,7 +210,7 @@ class NautilusTraderEnv(TradingEnvironment):
 
     def reset(self, seed=None, options=None) -> Tuple[np.array, Dict[str, Any]]:
         if self.random_start_pct > 0.00:
-            size = len(self.observer.feed.process[-1].inputs[0].iterable)
+            size = self.observer.feed.source_length
             random_start = random.randint(0, int(size * self.random_start_pct))
         else:
             random_start = 0
@@ -154,10 +154,18 @@ def create_env_from_dataframe(
     if not hasattr(action_scheme, "portfolio"):
         raise AttributeError("action scheme no attribute named portfolio.")
 
-    # If split is not enabled, create a single environment
+    # If split is not enabled, create a single environment. Numeric columns are
+    # streamed straight from their NumPy arrays instead of boxed Python lists.
     with NameSpace(name):
         streams = [
-            Stream.source(dataset[c].tolist(), dtype=dataset[c].dtype).rename(c)
+            Stream.source(
+                (
+                    dataset[c].to_numpy()
+                    if pd.api.types.is_numeric_dtype(dataset[c])
+                    else dataset[c].tolist()
+                ),
+                dtype=dataset[c].dtype,
+            ).rename(c)
             for c in dataset.columns
         ]
 
@@ -5,6 +5,7 @@ from .string import *
 
 from .base import Stream, NameSpace
 from .feed import DataFeed
+from .cache import FeatureCache as FeatureCache
 from .operators import Apply
 from .cdd import *
 
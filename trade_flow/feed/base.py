@@ -1,7 +1,12 @@
+import copy
 import inspect
+import itertools
 
 from abc import abstractmethod
-from typing import Generic, Iterable, TypeVar, Dict, Any, Callable, List, Tuple
+from collections import deque
+from typing import Generic, Iterable, TypeVar, Dict, Any, Callable, List, Set, Tuple
+
+import numpy as np
 
 from trade_flow.core import Observable
 from trade_flow.feed.accessors import CachedAccessor
@@ -11,6 +16,16 @@ from trade_flow.feed.mixins import DataTypeMixin
 T = TypeVar("T")
 
 
+def _copy_state(value: "Any") -> "Any":
+    """Copies the containers and arrays holding the state of a stream, sharing
+    the values inside them."""
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, (list, dict, set, deque)):
+        return copy.copy(value)
+    return value
+
+
 class Named:
     """A class for controlling the naming of objects.
 
@@ -120,6 +135,10 @@ class Stream(Generic[T], Named, Observable):
 
     _mixins: "Dict[str, DataTypeMixin]" = {}
     _accessors: "List[CachedAccessor]" = []
+    _reset_inputs: bool = True
+    _graph_version: int = 0
+    _in_plan: bool = False
+    _state: "Tuple[str, ...]" = ("value",)
     generic_name: str = "stream"
 
     def __new__(cls, *args, **kwargs):
@@ -151,6 +170,10 @@ class Stream(Generic[T], Named, Observable):
         `Stream[T]`
             The current stream inputs are being connected to.
         """
+        # Rewiring a stream in the processing order of a compiled feed makes
+        # the feeds sort their streams again.
+        if self._in_plan:
+            Stream._graph_version += 1
         self.inputs = inputs
         return self
 
@@ -182,6 +205,31 @@ class Stream(Generic[T], Named, Observable):
         """
         raise NotImplementedError()
 
+    def vectorize(self, *columns: "np.ndarray") -> "np.ndarray":
+        """Generates the values of the stream for every step at once.
+
+        Used by `DataFeed.compile(mode="vectorized")`. Streams that can only be
+        evaluated one step at a time leave this unimplemented and are run
+        through `forward()` instead.
+
+        Parameters
+        ----------
+        *columns : `np.ndarray`
+            The values of each input stream for every step, in the same order
+            as `inputs`.
+
+        Returns
+        -------
+        `np.ndarray`
+            The values of the stream for every step.
+
+        Raises
+        ------
+        NotImplementedError
+            Raised if the stream cannot be vectorized.
+        """
+        raise NotImplementedError()
+
     def astype(self, dtype: str) -> "Stream[T]":
         """Converts the data type to `dtype`.
 
@@ -205,11 +253,42 @@ class Stream(Generic[T], Named, Observable):
             if hasattr(listener, "reset"):
                 listener.reset()
 
-        for stream in self.inputs:
-            stream.reset()
+        # A `DataFeed` resets every stream of its graph exactly once, so it
+        # turns off the propagation to the inputs while doing so.
+        if Stream._reset_inputs:
+            for stream in self.inputs:
+                stream.reset()
 
         self.value = None
 
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the mutable state of the stream.
+
+        The state is made of the attributes named in `_state`, which stateful
+        streams extend with their running values. Arrays and containers are
+        copied, so the stream can keep running after the snapshot.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the stream, keyed by attribute.
+        """
+        return {k: _copy_state(getattr(self, k)) for k in self._state}
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the stream to a state captured by `snapshot`.
+
+        The state is copied again, so the same state can be restored any
+        number of times.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the stream.
+        """
+        for k, v in state.items():
+            setattr(self, k, _copy_state(v))
+
     def gather(self) -> "List[Tuple[Stream, Stream]]":
         """Gathers all the edges of the DAG connected in ancestry with this
         stream.
@@ -219,7 +298,7 @@ class Stream(Generic[T], Named, Observable):
         `List[Tuple[Stream, Stream]]`
             The list of edges connected through ancestry to this stream.
         """
-        return self._gather(self, [], [])
+        return self._gather(self, set(), [])
 
     @staticmethod
     def source(iterable: "Iterable[T]", dtype: str = None) -> "Stream[T]":
@@ -340,7 +419,7 @@ class Stream(Generic[T], Named, Observable):
 
     @staticmethod
     def _gather(
-        stream: "Stream", vertices: "List[Stream]", edges: "List[Tuple[Stream, Stream]]"
+        stream: "Stream", vertices: "Set[int]", edges: "List[Tuple[Stream, Stream]]"
     ) -> "List[Tuple[Stream, Stream]]":
         """Gathers all the edges relating back to this particular node.
 
@@ -348,8 +427,8 @@ class Stream(Generic[T], Named, Observable):
         ----------
         stream : `Stream`
             The stream to inspect the connections of.
-        vertices : `List[Stream]`
-            The list of streams that have already been inspected.
+        vertices : `Set[int]`
+            The ids of the streams that have already been inspected.
         edges : `List[Tuple[Stream, Stream]]`
             The connections that have been found to be in the graph at the moment
             not including `stream`.
@@ -359,14 +438,17 @@ class Stream(Generic[T], Named, Observable):
         `List[Tuple[Stream, Stream]]`
             The updated list of edges after inspecting `stream`.
         """
-        if stream not in vertices:
-            vertices += [stream]
+        stack = [stream]
+        while stack:
+            s = stack.pop()
+            if id(s) in vertices:
+                continue
+            vertices.add(id(s))
 
-            for s in stream.inputs:
-                edges += [(s, stream)]
+            for i in s.inputs:
+                edges += [(i, s)]
 
-            for s in stream.inputs:
-                Stream._gather(s, vertices, edges)
+            stack += reversed(s.inputs)
 
         return edges
 
@@ -374,6 +456,10 @@ class Stream(Generic[T], Named, Observable):
     def toposort(edges: "List[Tuple[Stream, Stream]]") -> "List[Stream]":
         """Sorts the order in which streams should be run.
 
+        Uses Kahn's algorithm, running in linear time in the number of streams
+        and connections. Streams are keyed by identity and streams without any
+        outgoing connections (i.e. the sinks of the graph) are left out.
+
         Parameters
         ----------
         edges : `List[Tuple[Stream, Stream]]`
@@ -385,24 +471,33 @@ class Stream(Generic[T], Named, Observable):
             The list of streams sorted with respect to the order in which they
             should be run.
         """
-        src = set([s for s, t in edges])
-        tgt = set([t for s, t in edges])
-
-        starting = list(src.difference(tgt))
-        process = starting.copy()
-
-        while len(starting) > 0:
-            start = starting.pop()
-
-            edges = list(filter(lambda e: e[0] != start, edges))
-
-            src = set([s for s, t in edges])
-            tgt = set([t for s, t in edges])
-
-            starting += [v for v in src.difference(tgt) if v not in starting]
-
-            if start not in process:
-                process += [start]
+        streams = {}
+        targets = {}
+        in_degree = {}
+
+        for s, t in edges:
+            for v in (s, t):
+                if id(v) not in streams:
+                    streams[id(v)] = v
+                    targets[id(v)] = []
+                    in_degree[id(v)] = 0
+            targets[id(s)] += [t]
+            in_degree[id(t)] += 1
+
+        queue = deque(v for k, v in streams.items() if in_degree[k] == 0)
+
+        process = []
+        while queue:
+            v = queue.popleft()
+            if targets[id(v)]:
+                process += [v]
+            for t in targets[id(v)]:
+                in_degree[id(t)] -= 1
+                if in_degree[id(t)] == 0:
+                    queue.append(t)
+
+        if any(d > 0 for d in in_degree.values()):
+            raise ValueError("The stream graph contains a cycle.")
 
         return process
 
@@ -492,6 +587,11 @@ class Stream(Generic[T], Named, Observable):
 class IterableStream(Stream[T]):
     """A private class used the `Stream` class for creating data sources.
 
+    Sources that support `len` and positional indexing, such as lists, NumPy
+    arrays, memory-mapped arrays or pandas series, are read through an integer
+    cursor. Resetting them, including to a random start, only moves the cursor
+    and never copies the underlying data.
+
     Parameters
     ----------
     source : `Iterable[T]`
@@ -501,30 +601,53 @@ class IterableStream(Stream[T]):
     """
 
     generic_name = "stream"
+    _state = Stream._state + ("_random_start", "_cursor", "stop")
 
     def __init__(self, source: "Iterable[T]", dtype: str = None):
         super().__init__(dtype=dtype)
         self.is_gen = False
+        self.is_sequence = False
         self.iterable = None
 
         if inspect.isgeneratorfunction(source):
             self.gen_fn = source
             self.is_gen = True
-            self.generator = self.gen_fn()
         else:
+            if hasattr(source, "iloc"):
+                source = source.array
             self.iterable = source
-            self.generator = iter(source)
+            self.is_sequence = hasattr(source, "__len__") and hasattr(source, "__getitem__")
 
+        self._random_start = 0
+        self._cursor = 0
+        self._start_iteration()
+
+    def _start_iteration(self) -> None:
+        """Positions the stream at the current random start."""
         self.stop = False
+        if self.is_sequence:
+            self._cursor = self._random_start
+            self._length = len(self.iterable)
+            return
+
+        if self.is_gen:
+            self.generator = self.gen_fn()
+        else:
+            self.generator = itertools.islice(iter(self.iterable), self._random_start, None)
 
         try:
             self.current = next(self.generator)
         except StopIteration:
             self.stop = True
 
-        self._random_start = 0
-
     def forward(self) -> T:
+        if self.is_sequence:
+            v = self.iterable[self._cursor]
+            self._cursor += 1
+            # Numeric arrays hold NumPy scalars, which are read as Python
+            # scalars as iterating over a list or a pandas series would.
+            return v.item() if isinstance(v, (np.number, np.bool_)) else v
+
         v = self.current
         try:
             self.current = next(self.generator)
@@ -533,42 +656,92 @@ class IterableStream(Stream[T]):
         return v
 
     def has_next(self):
+        if self.is_sequence:
+            return self._cursor < self._length
         return not self.stop
 
+    def vectorize(self) -> "np.ndarray":
+        if not self.is_sequence:
+            raise NotImplementedError()
+        return np.asarray(self.iterable[self._random_start :])
+
+    def snapshot(self) -> "Dict[str, Any]":
+        if not self.is_sequence:
+            raise ValueError(f"Stream {self.name} reads from an iterator and cannot be snapshot.")
+        return super().snapshot()
+
     def reset(self, random_start=0):
         if random_start != 0:
             self._random_start = random_start
 
-        if self.is_gen:
-            self.generator = self.gen_fn()
-        else:
-            self.generator = iter(self.iterable[self._random_start :])
-        self.stop = False
-
-        try:
-            self.current = next(self.generator)
-        except StopIteration:
-            self.stop = True
+        self._start_iteration()
         super().reset()
 
 
 class Group(Stream[T]):
-    """A stream that groups together other streams into a dictionary."""
+    """A stream that groups together other streams into a dictionary.
+
+    In columnar mode the group instead writes the values of its streams into a
+    single preallocated row, see `columnar`.
+
+    Attributes
+    ----------
+    index : `Dict[str, int]`
+        The position of each stream in the row, once the group is columnar.
+    """
 
     def __init__(self):
         super().__init__()
+        self.is_columnar = False
+        self.index = None
+        self.row = None
 
     def __call__(self, *inputs):
-        self.inputs = inputs
+        super().__call__(*inputs)
         self.streams = {s.name: s for s in inputs}
         return self
 
+    def columnar(self, dtype: "np.dtype" = np.float32) -> "Group":
+        """Makes the group generate a row array instead of a dictionary.
+
+        The same preallocated row is overwritten on every step, so consumers
+        that keep values around must copy them.
+
+        Parameters
+        ----------
+        dtype : `np.dtype`, default `np.float32`
+            The data type of the row.
+
+        Returns
+        -------
+        `Group`
+            The columnar group.
+        """
+        if any(isinstance(s, Group) for s in self.inputs):
+            raise ValueError("A columnar group cannot contain other groups.")
+        self.is_columnar = True
+        self.index = {s.name: i for i, s in enumerate(self.inputs)}
+        self.row = np.zeros(len(self.inputs), dtype=dtype)
+        return self
+
     def forward(self) -> "Dict[T]":
+        if self.is_columnar:
+            row = self.row
+            for i, s in enumerate(self.inputs):
+                row[i] = s.value
+            return row
         return {s.name: s.value for s in self.inputs}
 
     def __getitem__(self, name) -> "Stream[T]":
         return self.streams[name]
 
+    def restore(self, state: "Dict[str, Any]") -> None:
+        super().restore(state)
+        # Keep the value of a columnar group pointing at its row.
+        if self.is_columnar and self.value is not None:
+            np.copyto(self.row, self.value)
+            self.value = self.row
+
     def has_next(self) -> bool:
         return True
 
@@ -605,6 +778,9 @@ class Constant(Stream[T]):
     def has_next(self):
         return True
 
+    def vectorize(self) -> "np.ndarray":
+        return np.asarray(self.constant)
+
 
 class Placeholder(Stream[T]):
     """A stream that acts as a placeholder for data to be provided at later date."""
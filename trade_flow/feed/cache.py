@@ -0,0 +1,269 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import time
+import types
+
+from collections import deque
+from typing import Dict, List, Set, Union
+
+
+import numpy as np
+
+from trade_flow.feed.base import Stream, IterableStream
+
+
+class FeatureCache(object):
+    """A content-addressed on-disk cache of the precomputed values of feeds.
+
+    A vectorized `DataFeed` compiled with a cache fingerprints its graph, using
+    the type and parameters of every stream in processing order together with
+    a hash of the data of its sources. If values for the fingerprint are
+    already on disk they are memory-mapped instead of being computed again,
+    otherwise they are computed and saved as a `.npy` file. Feeds with
+    non-numeric values, or streams whose parameters cannot be fingerprinted,
+    are computed without the cache.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to store the cached values in.
+    max_bytes : int, optional
+        The maximum total size of the cached files. The least recently used
+        files are evicted first.
+    max_age : float, optional
+        The maximum time in seconds since a file was last used before it is
+        evicted.
+
+    Attributes
+    ----------
+    hits : int
+        The number of times values were loaded from the cache.
+    misses : int
+        The number of times values had to be computed.
+    """
+
+    suffix = ".npy"
+
+    def __init__(self, directory: str, max_bytes: int = None, max_age: float = None) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.evict()
+
+    def fingerprint(self, streams: "List[Stream]", outputs: "List[Stream]") -> "Union[str, None]":
+        """Computes the fingerprint of a graph of streams.
+
+        The streams are expected to be in processing order and freshly reset,
+        so that their attributes only hold their parameters and initial state.
+
+        Parameters
+        ----------
+        streams : `List[Stream]`
+            The streams of the graph, in processing order.
+        outputs : `List[Stream]`
+            The streams of the graph whose values are stored, in order.
+
+        Returns
+        -------
+        str or None
+            The fingerprint of the graph, or `None` if some stream cannot be
+            fingerprinted.
+        """
+        index = {id(s): i for i, s in enumerate(streams)}
+        digest = hashlib.blake2b(digest_size=20)
+        try:
+            for s in streams:
+                digest.update(f"{type(s).__module__}.{type(s).__qualname__}".encode())
+                digest.update(repr([index[id(i)] for i in s.inputs]).encode())
+                for k, v in sorted(vars(s).items()):
+                    if k in ("name", "inputs", "listeners", "value", "forward"):
+                        continue
+                    if k == "iterable" and isinstance(s, IterableStream):
+                        v = np.asarray(v)
+                    digest.update(k.encode())
+                    _tokenize(v, index, digest)
+            digest.update(repr([index[id(s)] for s in outputs]).encode())
+        except (_Unhashable, KeyError):
+            return None
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        """Gets the path of the file holding the values for a fingerprint.
+
+        Parameters
+        ----------
+        key : str
+            The fingerprint.
+
+        Returns
+        -------
+        str
+            The path of the file.
+        """
+        return os.path.join(self.directory, key + self.suffix)
+
+    def load(self, key: str) -> "Union[np.ndarray, None]":
+        """Loads the values stored for a fingerprint.
+
+        Parameters
+        ----------
+        key : str
+            The fingerprint.
+
+        Returns
+        -------
+        `np.ndarray` or None
+            The values memory-mapped in read-only mode, or `None` if nothing is
+            stored for the fingerprint.
+        """
+        path = self.path(key)
+        try:
+            values = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return values
+
+    def store(self, key: str, values: "np.ndarray") -> None:
+        """Stores values for a fingerprint and evicts stale files.
+
+        Parameters
+        ----------
+        key : str
+            The fingerprint.
+        values : `np.ndarray`
+            The values to store. Arrays of objects are not stored.
+        """
+        if values.dtype.hasobject:
+            return
+        path = self.path(key)
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "wb") as fp:
+            np.save(fp, values)
+        os.replace(partial, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes the files that are too old, then the least recently used
+        files until the cache fits in `max_bytes`."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(self.suffix):
+                stat = entry.stat()
+                files += [(stat.st_mtime, stat.st_size, entry.path)]
+        files.sort()
+
+        if self.max_age is not None:
+            now = time.time()
+            while files and now - files[0][0] > self.max_age:
+                self._remove(files.pop(0)[2])
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in files)
+            while files and total > self.max_bytes:
+                _, size, path = files.pop(0)
+                self._remove(path)
+                total -= size
+
+    def clear(self) -> None:
+        """Removes every file in the cache."""
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(self.suffix):
+                self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+class _Unhashable(Exception):
+    pass
+
+
+def _tokenize(
+    value: object, index: "Dict[int, int]", digest: "hashlib.blake2b", seen: "Set[int]" = None
+) -> None:
+    """Feeds a canonical representation of `value` into `digest`.
+
+    Streams are represented by their position in the graph and modules by
+    their name. Functions are represented by their qualified name, code, the
+    values they close over and the values of the globals they read, so that
+    changing a module-level constant or helper invalidates the fingerprint.
+    Attributes read from modules are assumed not to change between runs.
+    """
+    seen = set() if seen is None else seen
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        digest.update(f"{type(value).__name__}:{value!r}".encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"array:{value.dtype.str}:{value.shape}".encode())
+        if value.dtype.hasobject:
+            try:
+                digest.update(pickle.dumps(value.tolist()))
+            except Exception:
+                raise _Unhashable() from None
+        else:
+            digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, np.generic):
+        _tokenize(value.item(), index, digest, seen)
+    elif isinstance(value, Stream):
+        if id(value) not in index:
+            raise _Unhashable()
+        digest.update(f"stream:{index[id(value)]}".encode())
+    elif isinstance(value, (list, tuple, deque)):
+        digest.update(f"{type(value).__name__}:{len(value)}".encode())
+        for v in value:
+            _tokenize(v, index, digest, seen)
+    elif isinstance(value, dict):
+        digest.update(f"dict:{len(value)}".encode())
+        for k, v in sorted(value.items(), key=lambda item: repr(item[0])):
+            _tokenize(k, index, digest, seen)
+            _tokenize(v, index, digest, seen)
+    elif isinstance(value, types.FunctionType):
+        digest.update(f"function:{value.__module__}.{value.__qualname__}".encode())
+        if id(value) in seen:
+            return
+        seen.add(id(value))
+        _tokenize(value.__code__, index, digest, seen)
+        _tokenize(value.__defaults__, index, digest, seen)
+        for cell in value.__closure__ or ():
+            _tokenize(cell.cell_contents, index, digest, seen)
+        for name in sorted(_global_names(value.__code__)):
+            if name in value.__globals__:
+                digest.update(f"global:{name}".encode())
+                _tokenize(value.__globals__[name], index, digest, seen)
+    elif isinstance(value, types.ModuleType):
+        digest.update(f"module:{value.__name__}".encode())
+    elif isinstance(value, types.MethodType):
+        _tokenize(value.__func__, index, digest, seen)
+        _tokenize(value.__self__, index, digest, seen)
+    elif isinstance(value, types.CodeType):
+        digest.update(value.co_code)
+        _tokenize(value.co_consts, index, digest, seen)
+        _tokenize(value.co_names, index, digest, seen)
+    elif isinstance(value, (type, np.ufunc)) or callable(value) and hasattr(value, "__qualname__"):
+        name = getattr(value, "__qualname__", value.__name__)
+        digest.update(f"callable:{getattr(value, '__module__', '')}.{name}".encode())
+    elif isinstance(value, np.dtype):
+        digest.update(f"dtype:{value.str}".encode())
+    else:
+        raise _Unhashable()
+
+
+def _global_names(code: "types.CodeType") -> "Set[str]":
+    """Gets the names a code object, and the code objects nested in it, may
+    read as globals."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
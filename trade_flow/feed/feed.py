@@ -1,6 +1,12 @@
-from typing import List
+import time
 
-from trade_flow.feed.base import Stream, T, Placeholder, IterableStream
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Union
+
+import numpy as np
+
+from trade_flow.feed.base import Stream, T, Placeholder, IterableStream, Group, Constant
+from trade_flow.feed.cache import FeatureCache
+from trade_flow.feed.instrumentation import LatencyHistogram, Profiler
 
 
 class DataFeed(Stream[dict]):
@@ -12,33 +18,194 @@ class DataFeed(Stream[dict]):
         A list of streams to be used in the data feed.
     """
 
+    modes = ["step", "vectorized"]
+
     def __init__(self, streams: "List[Stream]") -> None:
         super().__init__()
 
         self.process = None
         self.compiled = False
+        self.mode = "step"
+
+        self._plan = None
+        self._base = None
+        self.profiler = None
+        self.cache = None
+
+        self._leaves = []
+        self._groups = []
+        self._blocks = {}
+        self._buffer = None
+        self._cursor = 0
+        self._start = None
 
         if streams:
             self.__call__(*streams)
 
-    def compile(self) -> None:
+    def compile(self, mode: str = "step", cache: "FeatureCache" = None) -> None:
         """Compiles all the given stream together.
 
         Organizes the order in which streams should be run to get valid output.
-        """
-        edges = self.gather()
 
-        self.process = self.toposort(edges)
+        With `mode="vectorized"` every stream is evaluated once over all of its
+        steps and `next()` then reads rows from the precomputed values. This
+        requires every source of the feed to be an `IterableStream` over a
+        finite iterable (or a constant), otherwise the feed is compiled in
+        `"step"` mode. Streams that do not implement `Stream.vectorize`, and
+        everything downstream of them, are still run one step at a time
+        through `forward()` while the values are being precomputed.
+
+        The processing order is cached on the feed, so compiling again, e.g.
+        when the feed is reused to create another environment, does not walk
+        the graph again unless streams of the graph have been connected to
+        other inputs since.
+
+        Parameters
+        ----------
+        mode : {"step", "vectorized"}, default "step"
+            The execution mode of the feed.
+        cache : `FeatureCache`, optional
+            A cache to store the precomputed values of a vectorized feed in, so
+            they can be loaded instead of computed again. Once given, the cache
+            is kept for later compilations of the feed.
+        """
+        if mode not in self.modes:
+            raise ValueError(f"Mode must be one of {self.modes}, not {mode}.")
+
+        if cache is not None and cache is not self.cache:
+            self.cache = cache
+            self._start = None
+
+        process = self._processing_order()
+        if process is not self.process:
+            self._start = None
+
+        self.process = process
+        if self.profiler is not None and self.profiler.is_attached:
+            self.profiler.attach(self.process)
+        mode = mode if mode == "step" or self._is_vectorizable() else "step"
+        if mode != self.mode:
+            self._start = None
+        self.mode = mode
         self.compiled = True
         self.reset()
 
+    def extend(self, streams: "List[Stream]") -> "DataFeed":
+        """Creates a feed of streams built on top of the streams of this feed.
+
+        The new feed starts its processing order with the one of this feed and
+        only gathers and sorts the streams that are not part of it, so feeds
+        extending the same feed, e.g. the observers of several environments,
+        share the work of compiling it. This feed is not run by the new feed.
+
+        Parameters
+        ----------
+        streams : `List[Stream]`
+            The streams of the new feed.
+
+        Returns
+        -------
+        `DataFeed`
+            The feed of `streams`.
+        """
+        feed = DataFeed(streams)
+        feed._base = self
+        return feed
+
+    def _processing_order(self) -> "List[Stream]":
+        """Gets the order in which the streams of the feed should be run.
+
+        The order is cached together with the version of the stream graph,
+        which changes whenever a stream of a compiled feed is connected to
+        other inputs, and is only sorted again once the version has changed.
+
+        Returns
+        -------
+        `List[Stream]`
+            The streams of the feed sorted in processing order.
+        """
+        base = self._base._processing_order() if self._base is not None else None
+        plan = self._plan
+        if plan is not None and plan[0] == Stream._graph_version and plan[1] is base:
+            return plan[2]
+
+        known = {id(s) for s in base} if base is not None else set()
+        edges = self._gather(self, set(known), [])
+        process = list(base or []) + [s for s in self.toposort(edges) if id(s) not in known]
+
+        self._in_plan = True
+        for s in process:
+            s._in_plan = True
+        self._plan = (Stream._graph_version, base, process)
+        return process
+
+    def profile(self, trace_allocations: bool = False) -> "Profiler":
+        """Starts profiling the `forward()` calls of the streams in the feed.
+
+        In vectorized mode only groups, and streams that could not be
+        vectorized while the values are precomputed, call `forward()`.
+
+        Parameters
+        ----------
+        trace_allocations : bool, default False
+            Whether to also measure the memory allocated by each call.
+
+        Returns
+        -------
+        `Profiler`
+            The profiler collecting the measurements, also available as
+            `DataFeed.profiler`.
+        """
+        if not self.compiled:
+            self.compile()
+        self.stop_profiling()
+        self.profiler = Profiler(trace_allocations=trace_allocations)
+        self.profiler.attach(self.process)
+        return self.profiler
+
+    def stop_profiling(self) -> "Profiler":
+        """Stops profiling the streams in the feed, keeping the measurements.
+
+        Returns
+        -------
+        `Profiler`
+            The profiler with the measurements, if the feed was profiled.
+        """
+        if self.profiler is not None:
+            self.profiler.detach()
+        return self.profiler
+
+    @property
+    def source_length(self) -> int:
+        """The length of the shortest finite iterable source of the feed. (int, read-only)"""
+        if not self.compiled:
+            self.compile()
+        return min(
+            len(s.iterable)
+            for s in self.process
+            if isinstance(s, IterableStream) and s.is_sequence
+        )
+
     def run(self) -> None:
         """Runs all the streams in processing order."""
         if not self.compiled:
             self.compile()
 
-        for s in self.process:
-            s.run()
+        if self.mode == "vectorized":
+            row = self._buffer[self._cursor]
+            for s, v in zip(self._leaves, row):
+                s.value = v
+            for s in self._groups:
+                block = self._blocks.get(id(s))
+                if block is None:
+                    s.value = s.forward()
+                else:
+                    np.copyto(s.row, block[self._cursor])
+                    s.value = s.row
+            self._cursor += 1
+        else:
+            for s in self.process:
+                s.run()
 
         super().run()
 
@@ -49,15 +216,316 @@ class DataFeed(Stream[dict]):
         self.run()
         return self.value
 
+    def next_n(self, n: int, structured: bool = False) -> "Union[dict, np.ndarray]":
+        """Advances the feed by up to `n` steps at once.
+
+        In vectorized mode the steps are read as a single slice of the
+        precomputed buffer. Otherwise, or when listeners are attached to the
+        feed and need to be notified on every step, the feed is stepped `n`
+        times and the outputs are stacked.
+
+        Parameters
+        ----------
+        n : int
+            The number of steps to advance. Fewer steps are returned if the
+            feed runs out of data.
+        structured : bool, default False
+            Whether to return a structured array with one field per stream
+            instead of a dictionary of columns.
+
+        Returns
+        -------
+        dict or `np.ndarray`
+            A dictionary with the same layout as the output of `next()` holding
+            an array of values per stream, or a structured array with a field
+            per stream named after the stream. Columnar groups are returned as
+            a single 2D array with a column per stream.
+        """
+        if not self.compiled:
+            self.compile()
+
+        if self.mode == "vectorized" and not self.listeners:
+            rows = self._buffer[self._cursor : self._cursor + n]
+            if len(rows) > 0:
+                self._cursor += len(rows) - 1
+                self.run()
+            index = {id(s): i for i, s in enumerate(self._leaves)}
+            columns = self._columns(self.inputs, lambda s: rows[:, index[id(s)]])
+        else:
+            rows = []
+            while len(rows) < n and self.has_next():
+                rows += [self._snapshot(self.next())]
+            columns = self._stack(rows)
+
+        if structured:
+            return self._structure(columns)
+        return columns
+
+    def iter_chunks(self, size: int, structured: bool = False) -> "Iterator[Union[dict, np.ndarray]]":
+        """Iterates over the remaining steps of the feed in chunks.
+
+        Parameters
+        ----------
+        size : int
+            The number of steps in each chunk. The last chunk may be shorter.
+        structured : bool, default False
+            Whether to yield structured arrays instead of dictionaries of columns.
+
+        Yields
+        ------
+        dict or `np.ndarray`
+            The next chunk of steps, as returned by `next_n`.
+        """
+        while self.has_next():
+            yield self.next_n(size, structured=structured)
+
+    def _columns(self, streams: "List[Stream]", column: "Callable[[Stream], np.ndarray]") -> dict:
+        """Lays out the columns of `streams`, recursing into groups."""
+        output = {}
+        for s in streams:
+            if isinstance(s, Group) and s.is_columnar:
+                output[s.name] = np.column_stack([column(c) for c in s.inputs]).astype(s.row.dtype)
+            elif isinstance(s, Group):
+                output[s.name] = self._columns(s.inputs, column)
+            else:
+                output[s.name] = column(s)
+        return output
+
+    def _snapshot(self, value: "Union[dict, np.ndarray]") -> "Union[dict, np.ndarray]":
+        """Copies the rows of columnar groups, which are overwritten on every step."""
+        if isinstance(value, dict):
+            return {k: self._snapshot(v) for k, v in value.items()}
+        if isinstance(value, np.ndarray):
+            return value.copy()
+        return value
+
+    def _stack(self, rows: "List[dict]") -> dict:
+        """Stacks the outputs of several steps into a dictionary of columns."""
+        if not rows:
+            return self._columns(self.inputs, lambda s: np.array([]))
+
+        def stack(values):
+            if isinstance(values[0], dict):
+                return {k: stack([v[k] for v in values]) for k in values[0].keys()}
+            return np.asarray(values)
+
+        return stack(rows)
+
+    @staticmethod
+    def _structure(columns: dict) -> "np.ndarray":
+        """Converts a dictionary of columns into a structured array."""
+        flat = {}
+
+        def flatten(d):
+            for k, v in d.items():
+                if isinstance(v, dict):
+                    flatten(v)
+                else:
+                    flat[k] = v
+
+        flatten(columns)
+        size = len(next(iter(flat.values()))) if flat else 0
+        output = np.empty(size, dtype=[(k, v.dtype, v.shape[1:]) for k, v in flat.items()])
+        for k, v in flat.items():
+            output[k] = v
+        return output
+
     def has_next(self) -> bool:
+        if self.mode == "vectorized":
+            return self._cursor < len(self._buffer)
         return all(s.has_next() for s in self.process)
 
     def reset(self, random_start=0) -> None:
+        self._reset_process(random_start)
+
+        if self.mode == "vectorized":
+            start = tuple(s._random_start for s in self.process if isinstance(s, IterableStream))
+            if start != self._start:
+                self._vectorize()
+                self._start = start
+                self._reset_process()
+            self._cursor = 0
+
+    def snapshot(self) -> "Dict[str, Any]":
+        """Captures the state of every stream of the feed.
+
+        In vectorized mode the precomputed values are shared with the snapshot
+        instead of being copied, since they are never written to.
+
+        Returns
+        -------
+        `Dict[str, Any]`
+            The state of the feed.
+
+        Raises
+        ------
+        ValueError
+            Raised if a source of the feed reads from an iterator.
+        """
+        if not self.compiled:
+            self.compile()
+        return {
+            "streams": [s.snapshot() for s in self.process],
+            "cursor": self._cursor,
+            "values": (self._buffer, self._blocks, self._start),
+            "has_value": self.value is not None,
+        }
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        """Restores the feed to a state captured by `snapshot`.
+
+        Parameters
+        ----------
+        state : `Dict[str, Any]`
+            The state of the feed.
+        """
+        if len(state["streams"]) != len(self.process):
+            raise ValueError("The state was captured from a different feed.")
+        for s, v in zip(self.process, state["streams"]):
+            s.restore(v)
+        self._cursor = state["cursor"]
+        self._buffer, self._blocks, self._start = state["values"]
+        self.value = self.forward() if state["has_value"] else None
+
+    def _reset_process(self, random_start=0) -> None:
+        """Resets every stream in the processing order once, in linear time."""
+        propagate, Stream._reset_inputs = Stream._reset_inputs, False
+        try:
+            for s in self.process:
+                if isinstance(s, IterableStream):
+                    s.reset(random_start)
+                else:
+                    s.reset()
+        finally:
+            Stream._reset_inputs = propagate
+
+    def _is_vectorizable(self) -> bool:
+        """Checks if every source of the feed is a finite iterable or a constant."""
+        sources = [s for s in self.process if len(s.inputs) == 0]
+        finite = [s for s in sources if isinstance(s, IterableStream) and s.is_sequence]
+        constant = [s for s in sources if isinstance(s, Constant)]
+        return len(finite) > 0 and len(finite) + len(constant) == len(sources)
+
+    def _vectorize(self) -> None:
+        """Precomputes the values of every stream in the feed for all steps.
+
+        Streams are vectorized in processing order as long as all of their
+        inputs have been vectorized to numeric columns. The remaining streams,
+        apart from groups which are rebuilt from their inputs on every step,
+        are run together one step at a time. The values of the streams read by
+        the feed and its groups are then laid out in a single 2D buffer, and
+        the rows of columnar groups are precomputed in their own blocks.
+
+        With a `FeatureCache` the buffer is loaded from the cache when the
+        same graph was already computed over the same data.
+        """
+        self._groups = [s for s in self.process if isinstance(s, Group)]
+        consumers = self._groups + [self]
+        self._leaves = []
+        for c in consumers:
+            self._leaves += [
+                s for s in c.inputs if not isinstance(s, Group) and s not in self._leaves
+            ]
+
+        key = self.cache.fingerprint(self.process, self._leaves) if self.cache else None
+        buffer = self.cache.load(key) if key else None
+        if buffer is None:
+            buffer = self._precompute()
+            if key:
+                self.cache.store(key, buffer)
+        self._buffer = buffer
+
+        index = {id(s): i for i, s in enumerate(self._leaves)}
+        self._blocks = {
+            id(g): self._buffer[:, [index[id(s)] for s in g.inputs]].astype(g.row.dtype)
+            for g in self._groups
+            if g.is_columnar
+        }
+
+    def _precompute(self) -> "np.ndarray":
+        """Computes the values of the streams read by the feed and its groups.
+
+        Returns
+        -------
+        `np.ndarray`
+            The values with a row per step and a column per stream, in the
+            order of `_leaves`.
+        """
+        sources = [s for s in self.process if isinstance(s, IterableStream)]
+        size = max(0, min(len(s.iterable) - s._random_start for s in sources))
+
+        columns = {}
+        stepped = []
         for s in self.process:
-            if isinstance(s, IterableStream):
-                s.reset(random_start)
+            if isinstance(s, Group):
+                continue
+            inputs = [columns.get(id(i)) for i in s.inputs]
+            if all(c is not None and c.dtype.kind in "biuf" for c in inputs):
+                try:
+                    column = s.vectorize(*inputs)
+                except NotImplementedError:
+                    stepped += [s]
+                    continue
+                if column.ndim == 0:
+                    column = np.broadcast_to(column, (size,))
+                columns[id(s)] = column[:size]
             else:
-                s.reset()
+                stepped += [s]
+
+        if stepped:
+            columns.update(self._step(stepped, columns, size))
+
+        leaves = [columns[id(s)] for s in self._leaves]
+        if not all(c.dtype.kind in "biuf" for c in leaves):
+            leaves = [c.astype(object) for c in leaves]
+        return np.column_stack(leaves)
+
+    def _step(
+        self, stepped: "List[Stream]", columns: "Dict[int, np.ndarray]", size: int
+    ) -> "Dict[int, np.ndarray]":
+        """Runs streams that could not be vectorized one step at a time.
+
+        Parameters
+        ----------
+        stepped : `List[Stream]`
+            The streams to run, in processing order.
+        columns : `Dict[int, np.ndarray]`
+            The vectorized values of the other streams keyed by stream id.
+        size : int
+            The number of steps to run.
+
+        Returns
+        -------
+        `Dict[int, np.ndarray]`
+            The values generated by each of the `stepped` streams keyed by stream id.
+        """
+        ids = set(id(s) for s in stepped)
+        boundary = []
+        for s in stepped:
+            boundary += [i for i in s.inputs if id(i) not in ids and i not in boundary]
+
+        # Vectorized columns that are not one value per step (e.g. rolling
+        # windows) cannot be served to a stream, so their producer is run as well.
+        for b in list(boundary):
+            if columns[id(b)].ndim != 1:
+                boundary.remove(b)
+                stepped = [x for x in self.process if x is b or x in stepped]
+                boundary += [i for i in b.inputs if i not in boundary]
+
+        values = {id(s): np.empty(size, dtype=object) for s in stepped}
+        for i in range(size):
+            for b in boundary:
+                b.value = columns[id(b)][i]
+            for s in stepped:
+                s.value = s.forward()
+                values[id(s)][i] = s.value
+
+        for k, v in values.items():
+            if size > 0 and np.ndim(v[0]) == 0:
+                column = np.asarray(v.tolist())
+                if column.dtype.kind in "biuf":
+                    values[k] = column
+        return values
 
 
 class PushFeed(DataFeed):
@@ -67,52 +535,140 @@ class PushFeed(DataFeed):
     ensures that the user can wait until all of their data has been loaded for the
     next time step.
 
+    Pushes may provide values for only some of the placeholders, in which case
+    the other placeholders keep their last pushed value. Only the streams that
+    depend on the pushed placeholders are run again, so stateful streams such
+    as rolling windows only advance when their inputs receive new data.
+
     Parameters
     ----------
     streams : `List[Stream]`
         A list of streams to be used in the data feed.
+    instrument : bool, default False
+        Whether to measure the time every stream takes to run on each push.
+
+    Attributes
+    ----------
+    latency : `Dict[str, LatencyHistogram]`
+        The latency histograms of the streams run by the feed, filled in when
+        `instrument` is set. They are keyed by `"{i}:{name}"`, where `i` is the
+        position of the stream in the processing order, as several streams of a
+        graph may share a name.
     """
 
-    def __init__(self, streams: "List[Stream]"):
+    def __init__(self, streams: "List[Stream]", instrument: bool = False):
         super().__init__(streams)
 
-        self.compile()
+        self.instrument = instrument
+        self.latency = {}
+
+        self._loaded = set()
+        self._dirty = set()
+        self._primed = False
+        self._subgraphs = {}
 
-        edges = self.gather()
-        src = set([s for s, t in edges])
-        tgt = set([t for s, t in edges])
+        self.compile()
 
-        self.start = [s for s in src.difference(tgt) if isinstance(s, Placeholder)]
+        self.start = [s for s in self.process if isinstance(s, Placeholder) and not s.inputs]
+        self._placeholders = {s.name: s for s in self.start}
+        self._latency_keys = {id(s): f"{i}:{s.name}" for i, s in enumerate(self.process)}
 
     @property
     def is_loaded(self):
-        return all([s.value is not None for s in self.start])
+        return len(self._loaded) == len(self.start)
 
-    def push(self, data: dict) -> dict:
+    def push(self, data: dict) -> "Union[dict, None]":
         """Generates the values from the data feed based on the values being
         provided in `data`.
 
         Parameters
         ----------
         data : dict
-            The data to be pushed to each of the placholders in the feed.
+            The data to be pushed to the placeholders in the feed. Keys that do
+            not name a placeholder are ignored.
 
         Returns
         -------
-        dict
-            The next data point generated from the feed based on `data`.
+        dict or None
+            The next data point generated from the feed based on `data`, or
+            `None` if some placeholders have not received any data yet.
         """
-        for s in self.start:
-            s.push(data[s.name])
+        for name, value in data.items():
+            s = self._placeholders.get(name)
+            if s is not None:
+                s.push(value)
+                self._loaded.add(id(s))
+                self._dirty.add(id(s))
 
-        output = self.next()
+        if not self.is_loaded:
+            return None
+        return self.next()
 
-        for s in self.start:
-            s.value = None
-        return output
+    def run(self) -> None:
+        """Runs the streams that depend on the placeholders pushed since the
+        last run, or every stream on the first run after a reset."""
+        nodes = self._subgraph(frozenset(self._dirty)) if self._primed else self.process
+        self._dirty.clear()
+        self._primed = True
+
+        if self.instrument:
+            for s in nodes:
+                t = time.perf_counter_ns()
+                s.run()
+                latency = time.perf_counter_ns() - t
+                key = self._latency_keys[id(s)]
+                if key not in self.latency:
+                    self.latency[key] = LatencyHistogram()
+                self.latency[key].record(latency)
+        else:
+            for s in nodes:
+                s.run()
+
+        Stream.run(self)
+
+    def _subgraph(self, pushed: "FrozenSet[int]") -> "List[Stream]":
+        """Gets the streams downstream of the pushed placeholders in processing order.
+
+        Parameters
+        ----------
+        pushed : `FrozenSet[int]`
+            The ids of the placeholders that were pushed.
+
+        Returns
+        -------
+        `List[Stream]`
+            The streams that have to be run again.
+        """
+        nodes = self._subgraphs.get(pushed)
+        if nodes is None:
+            dirty = set(pushed)
+            nodes = []
+            for s in self.process:
+                if id(s) in dirty or any(id(i) in dirty for i in s.inputs):
+                    dirty.add(id(s))
+                    nodes += [s]
+            self._subgraphs[pushed] = nodes
+        return nodes
 
     def next(self) -> dict:
         if not self.is_loaded:
             raise Exception("No data has been pushed to the feed.")
         self.run()
         return self.value
+
+    def snapshot(self) -> "Dict[str, Any]":
+        state = super().snapshot()
+        state["pushed"] = (set(self._loaded), set(self._dirty), self._primed)
+        return state
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        super().restore(state)
+        loaded, dirty, self._primed = state["pushed"]
+        self._loaded, self._dirty = set(loaded), set(dirty)
+
+    def reset(self, random_start=0) -> None:
+        super().reset(random_start)
+        self._loaded = set()
+        self._dirty = set()
+        self._primed = False
+        self._subgraphs = {}
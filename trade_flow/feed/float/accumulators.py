@@ -12,6 +12,8 @@ class CumSum(Stream[float]):
     .. [1] https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.cumsum.html
     """
 
+    _state = Stream._state + ("c_sum",)
+
     def __init__(self) -> None:
         super().__init__()
         self.c_sum = 0
@@ -26,6 +28,14 @@ class CumSum(Stream[float]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        missing = np.isnan(values)
+        return np.where(missing, np.nan, np.cumsum(np.where(missing, 0, values)))
+
+    def reset(self) -> None:
+        self.c_sum = 0
+        super().reset()
+
 
 class CumProd(Stream[float]):
     """A stream operator that creates a cumulative product of values.
@@ -35,6 +45,8 @@ class CumProd(Stream[float]):
     .. [1] https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.cumprod.html
     """
 
+    _state = Stream._state + ("c_prod",)
+
     def __init__(self) -> None:
         super().__init__()
         self.c_prod = 1
@@ -49,6 +61,14 @@ class CumProd(Stream[float]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        missing = np.isnan(values)
+        return np.where(missing, np.nan, np.cumprod(np.where(missing, 1, values)))
+
+    def reset(self) -> None:
+        self.c_prod = 1
+        super().reset()
+
 
 class CumMin(Stream[float]):
     """A stream operator that creates a cumulative minimum of values.
@@ -63,6 +83,8 @@ class CumMin(Stream[float]):
     [1] https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.cummin.html
     """
 
+    _state = Stream._state + ("c_min",)
+
     def __init__(self, skip_na: bool = True) -> None:
         super().__init__()
         self.skip_na = skip_na
@@ -87,6 +109,15 @@ class CumMin(Stream[float]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        if not self.skip_na:
+            return np.minimum.accumulate(values)
+        return np.where(np.isnan(values), np.nan, np.fmin.accumulate(values))
+
+    def reset(self) -> None:
+        self.c_min = np.inf
+        super().reset()
+
 
 class CumMax(Stream[float]):
     """A stream operator that creates a cumulative maximum of values.
@@ -101,6 +132,8 @@ class CumMax(Stream[float]):
     [1] https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.cummax.html
     """
 
+    _state = Stream._state + ("c_max",)
+
     def __init__(self, skip_na: bool = True) -> None:
         super().__init__()
         self.skip_na = skip_na
@@ -125,6 +158,15 @@ class CumMax(Stream[float]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        if not self.skip_na:
+            return np.maximum.accumulate(values)
+        return np.where(np.isnan(values), np.nan, np.fmax.accumulate(values))
+
+    def reset(self) -> None:
+        self.c_max = -np.inf
+        super().reset()
+
 
 @Float.register(["cumsum"])
 def cumsum(s: "Stream[float]") -> "Stream[float]":
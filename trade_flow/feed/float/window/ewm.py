@@ -3,7 +3,7 @@ ewm.py contains functions and classes for exponential weighted moving stream
 operations.
 """
 
-from typing import List, Tuple
+from typing import Any, Dict, List, Tuple
 
 import numpy as np
 
@@ -34,6 +34,8 @@ class ExponentialWeightedMovingAverage(Stream[float]):
     .. [1] https://github.com/pandas-dev/pandas/blob/d9fff2792bf16178d4e450fe7384244e50635733/pandas/_libs/window/aggregations.pyx#L1801
     """
 
+    _state = Stream._state + ("i", "n", "avg", "old_wt")
+
     def __init__(self, alpha: float, adjust: bool, ignore_na: bool, min_periods: int) -> None:
         super().__init__()
         self.alpha = alpha
@@ -115,6 +117,18 @@ class ExponentialWeightedMovingCovariance(Stream[float]):
         Use a standard estimation bias correction
     """
 
+    _state = Stream._state + (
+        "i",
+        "n",
+        "avg",
+        "old_wt",
+        "mean_x",
+        "mean_y",
+        "cov",
+        "sum_wt",
+        "sum_wt2",
+    )
+
     def __init__(
         self, alpha: float, adjust: bool, ignore_na: bool, min_periods: int, bias: bool
     ) -> None:
@@ -290,6 +304,8 @@ class EWM(Stream[List[float]]):
     .. [1] https://github.com/pandas-dev/pandas/blob/d9fff2792bf16178d4e450fe7384244e50635733/pandas/core/window/ewm.py#L65
     """
 
+    _state = Stream._state + ("history", "weights")
+
     def __init__(
         self,
         com: float = None,
@@ -392,6 +408,11 @@ class EWM(Stream[List[float]]):
         """
         return self.var(bias).sqrt()
 
+    def restore(self, state: "Dict[str, Any]") -> None:
+        super().restore(state)
+        if self.value is not None:
+            self.value = self.history, self.weights
+
     def reset(self) -> None:
         self.history = []
         self.weights = []
@@ -2,7 +2,7 @@
 expanding.py contains functions and classes for expanding stream operations.
 """
 
-from typing import Callable, List
+from typing import Any, Callable, Dict, List
 
 import numpy as np
 
@@ -25,10 +25,24 @@ class ExpandingNode(Stream[float]):
 
     def forward(self) -> float:
         expanding = self.inputs[0]
-        history = expanding.value
-        if len(history) < expanding.min_periods:
+        if expanding.n_valid < expanding.min_periods:
             return np.nan
-        return self.func(history)
+        return self.aggregate(expanding)
+
+    def aggregate(self, expanding: "Expanding") -> float:
+        """Aggregates the values seen so far by `expanding`.
+
+        Parameters
+        ----------
+        expanding : `Expanding`
+            The expanding window to aggregate.
+
+        Returns
+        -------
+        float
+            The aggregated value.
+        """
+        return self.func(expanding.history)
 
     def has_next(self):
         return True
@@ -41,30 +55,147 @@ class ExpandingCount(ExpandingNode):
         super().__init__(lambda w: (~np.isnan(w)).sum())
 
     def forward(self) -> float:
-        return self.func(self.inputs[0].value)
+        return self.inputs[0].n_valid
+
+
+class ExpandingSum(ExpandingNode):
+    """A stream operator that computes the sum of all non-missing values."""
+
+    def __init__(self) -> None:
+        super().__init__(np.sum)
+
+    def aggregate(self, expanding: "Expanding") -> float:
+        return expanding.total
+
+
+class ExpandingMean(ExpandingNode):
+    """A stream operator that computes the mean of all non-missing values."""
+
+    def __init__(self) -> None:
+        super().__init__(np.mean)
+
+    def aggregate(self, expanding: "Expanding") -> float:
+        return expanding.running_mean if expanding.n_valid > 0 else np.nan
+
+
+class ExpandingVar(ExpandingNode):
+    """A stream operator that computes the sample variance of all non-missing
+    values."""
+
+    def __init__(self) -> None:
+        super().__init__(lambda x: np.var(x, ddof=1))
+
+    def aggregate(self, expanding: "Expanding") -> float:
+        if expanding.n_valid < 2:
+            return np.nan
+        return expanding.m2 / (expanding.n_valid - 1)
+
+
+class ExpandingStd(ExpandingVar):
+    """A stream operator that computes the sample standard deviation of all
+    non-missing values."""
+
+    def aggregate(self, expanding: "Expanding") -> float:
+        return np.sqrt(super().aggregate(expanding))
+
+
+class ExpandingMin(ExpandingNode):
+    """A stream operator that computes the minimum of all non-missing values."""
+
+    def __init__(self) -> None:
+        super().__init__(np.min)
+
+    def aggregate(self, expanding: "Expanding") -> float:
+        return expanding.minimum if expanding.n_valid > 0 else np.nan
+
+
+class ExpandingMax(ExpandingNode):
+    """A stream operator that computes the maximum of all non-missing values."""
+
+    def __init__(self) -> None:
+        super().__init__(np.max)
+
+    def aggregate(self, expanding: "Expanding") -> float:
+        return expanding.maximum if expanding.n_valid > 0 else np.nan
 
 
 class Expanding(Stream[List[float]]):
     """A stream that generates the entire history of a stream at each time step.
 
+    The count, sum, mean, variance, minimum and maximum of the non-missing
+    values are kept as online accumulators (Welford's algorithm for the mean and
+    variance), so these aggregations use constant memory. The values themselves
+    are only stored in `history` once an arbitrary aggregation is requested
+    through `agg` or `median`.
+
     Parameters
     ----------
     min_periods : int, default 1
         The number of periods to wait before producing values from the aggregation
         function.
+
+    Attributes
+    ----------
+    history : `List[float]`
+        The non-missing values seen so far, if they are being kept.
+    n_valid : int
+        The number of non-missing values seen so far.
+    total : float
+        The sum of the non-missing values seen so far.
+    running_mean : float
+        The running mean of the non-missing values seen so far.
+    m2 : float
+        The running sum of squared deviations from the mean.
+    minimum : float
+        The minimum of the non-missing values seen so far.
+    maximum : float
+        The maximum of the non-missing values seen so far.
     """
 
     generic_name = "expanding"
+    _state = Stream._state + (
+        "history",
+        "n_valid",
+        "total",
+        "running_mean",
+        "m2",
+        "minimum",
+        "maximum",
+    )
 
     def __init__(self, min_periods: int = 1) -> None:
         super().__init__()
         self.min_periods = min_periods
+        self.keep_history = False
+        self.reset_accumulators()
+
+    def reset_accumulators(self) -> None:
+        """Clears the history and the online accumulators."""
         self.history = []
+        self.n_valid = 0
+        self.total = 0.0
+        self.running_mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
 
     def forward(self) -> "List[float]":
         v = self.inputs[0].value
         if not np.isnan(v):
-            self.history += [v]
+            self.n_valid += 1
+            self.total += v
+
+            delta = v - self.running_mean
+            self.running_mean += delta / self.n_valid
+            self.m2 += delta * (v - self.running_mean)
+
+            if v < self.minimum:
+                self.minimum = v
+            if v > self.maximum:
+                self.maximum = v
+
+            if self.keep_history:
+                self.history += [v]
         return self.history
 
     def has_next(self) -> bool:
@@ -73,6 +204,9 @@ class Expanding(Stream[List[float]]):
     def agg(self, func: Callable[[List[float]], float]) -> "Stream[float]":
         """Computes an aggregation of a stream's history.
 
+        Requesting an arbitrary aggregation makes the stream keep its full
+        history.
+
         Parameters
         ----------
         func : `Callable[[List[float]], float]`
@@ -84,6 +218,7 @@ class Expanding(Stream[List[float]]):
             A stream producing aggregations of the stream history at each time
             step.
         """
+        self.keep_history = True
         return ExpandingNode(func)(self).astype("float")
 
     def count(self) -> "Stream[float]":
@@ -104,7 +239,7 @@ class Expanding(Stream[List[float]]):
         `Stream[float]`
             An expanding sum stream.
         """
-        return self.agg(np.sum).astype("float")
+        return ExpandingSum()(self).astype("float")
 
     def mean(self) -> "Stream[float]":
         """Computes an expanding mean fo the underlying stream.
@@ -114,7 +249,7 @@ class Expanding(Stream[List[float]]):
         `Stream[float]`
             An expanding mean stream.
         """
-        return self.agg(np.mean).astype("float")
+        return ExpandingMean()(self).astype("float")
 
     def var(self) -> "Stream[float]":
         """Computes an expanding variance fo the underlying stream.
@@ -124,7 +259,7 @@ class Expanding(Stream[List[float]]):
         `Stream[float]`
             An expanding variance stream.
         """
-        return self.agg(lambda x: np.var(x, ddof=1)).astype("float")
+        return ExpandingVar()(self).astype("float")
 
     def median(self) -> "Stream[float]":
         """Computes an expanding median fo the underlying stream.
@@ -144,7 +279,7 @@ class Expanding(Stream[List[float]]):
         `Stream[float]`
             An expanding standard deviation stream.
         """
-        return self.agg(lambda x: np.std(x, ddof=1)).astype("float")
+        return ExpandingStd()(self).astype("float")
 
     def min(self) -> "Stream[float]":
         """Computes an expanding minimum fo the underlying stream.
@@ -154,7 +289,7 @@ class Expanding(Stream[List[float]]):
         `Stream[float]`
             An expanding minimum stream.
         """
-        return self.agg(np.min).astype("float")
+        return ExpandingMin()(self).astype("float")
 
     def max(self) -> "Stream[float]":
         """Computes an expanding maximum fo the underlying stream.
@@ -164,10 +299,15 @@ class Expanding(Stream[List[float]]):
         `Stream[float]`
             An expanding maximum stream.
         """
-        return self.agg(np.max).astype("float")
+        return ExpandingMax()(self).astype("float")
+
+    def restore(self, state: "Dict[str, Any]") -> None:
+        super().restore(state)
+        if self.value is not None:
+            self.value = self.history
 
     def reset(self) -> None:
-        self.history = []
+        self.reset_accumulators()
         super().reset()
 
 
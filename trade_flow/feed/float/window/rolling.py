@@ -2,14 +2,53 @@
 rolling.py contains functions and classes for rolling stream operations.
 """
 
-from typing import List, Callable
+import warnings
+
+from collections import deque
+from typing import Callable, List
 
 import numpy as np
 
+from numpy.lib.stride_tricks import sliding_window_view
+
 from trade_flow.feed.base import Stream
 from trade_flow.feed.float import Float
 
 
+def _nanvar(x, axis=None):
+    return np.nanvar(x, axis=axis, ddof=1)
+
+
+def _var(x, axis=None):
+    return np.var(x, axis=axis, ddof=1)
+
+
+_REDUCTIONS = (
+    np.sum,
+    np.nansum,
+    np.mean,
+    np.nanmean,
+    _var,
+    _nanvar,
+    np.median,
+    np.nanmedian,
+    np.min,
+    np.nanmin,
+    np.max,
+    np.nanmax,
+)
+
+
+def _reduce_windows(func: "Callable", windows: "np.ndarray", chunk_size: int = 2**20) -> "np.ndarray":
+    """Applies a reduction over every row of a window matrix, a bounded number of
+    elements at a time."""
+    rows = max(1, chunk_size // max(1, windows.shape[1]))
+    output = np.empty(len(windows))
+    for i in range(0, len(windows), rows):
+        output[i : i + rows] = func(windows[i : i + rows], axis=1)
+    return output
+
+
 class RollingNode(Stream[float]):
     """A stream operator for aggregating a rolling window of a stream.
 
@@ -26,15 +65,40 @@ class RollingNode(Stream[float]):
 
     def forward(self) -> float:
         rolling = self.inputs[0]
-        history = rolling.value
+        if rolling.n - rolling.nan < rolling.min_periods:
+            return np.nan
+        return self.aggregate(rolling)
 
-        output = np.nan if rolling.n - rolling.nan < rolling.min_periods else self.func(history)
+    def aggregate(self, rolling: "Rolling") -> float:
+        """Aggregates the current window of `rolling`.
 
-        return output
+        Parameters
+        ----------
+        rolling : `Rolling`
+            The rolling window to aggregate.
+
+        Returns
+        -------
+        float
+            The aggregated value of the window.
+        """
+        return self.func(rolling.value)
 
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, windows: "np.ndarray") -> "np.ndarray":
+        if self.func not in _REDUCTIONS:
+            raise NotImplementedError()
+        rolling = self.inputs[0]
+        n = np.arange(1, len(windows) + 1)
+        nan = np.cumsum(np.isnan(windows[:, 0]))
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            output = _reduce_windows(self.func, windows)
+        output[n - nan < rolling.min_periods] = np.nan
+        return output
+
     def reset(self) -> None:
         self.n = 0
         super().reset()
@@ -48,14 +112,128 @@ class RollingCount(RollingNode):
         super().__init__(lambda w: (~np.isnan(w)).sum())
 
     def forward(self):
-        rolling = self.inputs[0]
-        history = rolling.value
-        return self.func(history)
+        return self.inputs[0].n_valid
+
+    def vectorize(self, windows: "np.ndarray") -> "np.ndarray":
+        return _reduce_windows(lambda w, axis: (~np.isnan(w)).sum(axis=axis), windows)
+
+
+class RollingSum(RollingNode):
+    """A stream operator that computes the sum of the rolling window in constant
+    time per step.
+
+    Parameters
+    ----------
+    skip_na : bool
+        Whether to ignore missing values in the window. If not, any missing value
+        in the window makes the sum missing.
+    """
+
+    def __init__(self, skip_na: bool) -> None:
+        super().__init__(np.nansum if skip_na else np.sum)
+        self.skip_na = skip_na
+
+    def aggregate(self, rolling: "Rolling") -> float:
+        if rolling.n_missing > 0 and not self.skip_na:
+            return np.nan
+        return rolling.shifted_sum + rolling.shift * rolling.n_valid
+
+
+class RollingMean(RollingNode):
+    """A stream operator that computes the mean of the rolling window in constant
+    time per step.
+
+    Parameters
+    ----------
+    skip_na : bool
+        Whether to ignore missing values in the window. If not, any missing value
+        in the window makes the mean missing.
+    """
+
+    def __init__(self, skip_na: bool) -> None:
+        super().__init__(np.nanmean if skip_na else np.mean)
+        self.skip_na = skip_na
+
+    def aggregate(self, rolling: "Rolling") -> float:
+        if (rolling.n_missing > 0 and not self.skip_na) or rolling.n_valid == 0:
+            return np.nan
+        return rolling.shift + rolling.shifted_sum / rolling.n_valid
+
+
+class RollingVar(RollingNode):
+    """A stream operator that computes the sample variance of the rolling window
+    in constant time per step.
+
+    Parameters
+    ----------
+    skip_na : bool
+        Whether to ignore missing values in the window. If not, any missing value
+        in the window makes the variance missing.
+    """
+
+    def __init__(self, skip_na: bool) -> None:
+        super().__init__(_nanvar if skip_na else _var)
+        self.skip_na = skip_na
+
+    def aggregate(self, rolling: "Rolling") -> float:
+        n = rolling.n_valid
+        if (rolling.n_missing > 0 and not self.skip_na) or n < 2:
+            return np.nan
+        s = rolling.shifted_sum
+        return max(rolling.shifted_sq_sum - s * s / n, 0.0) / (n - 1)
+
+
+class RollingMin(RollingNode):
+    """A stream operator that computes the minimum of the rolling window in
+    amortized constant time per step using a monotonic deque.
+
+    Parameters
+    ----------
+    skip_na : bool
+        Whether to ignore missing values in the window. If not, any missing value
+        in the window makes the minimum missing.
+    """
+
+    def __init__(self, skip_na: bool) -> None:
+        super().__init__(np.nanmin if skip_na else np.min)
+        self.skip_na = skip_na
+
+    def aggregate(self, rolling: "Rolling") -> float:
+        if (rolling.n_missing > 0 and not self.skip_na) or not rolling.minima:
+            return np.nan
+        return rolling.minima[0][1]
+
+
+class RollingMax(RollingNode):
+    """A stream operator that computes the maximum of the rolling window in
+    amortized constant time per step using a monotonic deque.
+
+    Parameters
+    ----------
+    skip_na : bool
+        Whether to ignore missing values in the window. If not, any missing value
+        in the window makes the maximum missing.
+    """
+
+    def __init__(self, skip_na: bool) -> None:
+        super().__init__(np.nanmax if skip_na else np.max)
+        self.skip_na = skip_na
+
+    def aggregate(self, rolling: "Rolling") -> float:
+        if (rolling.n_missing > 0 and not self.skip_na) or not rolling.maxima:
+            return np.nan
+        return rolling.maxima[0][1]
 
 
 class Rolling(Stream[List[float]]):
     """A stream that generates a rolling window of values from a stream.
 
+    The window is kept in a preallocated ring buffer together with running
+    statistics of the values in it, so that the sum, mean, variance, minimum,
+    maximum and count of the window are updated in constant time per step.
+    The value of the stream is a new list of the values of the window ordered
+    from newest to oldest, as given by `history`.
+
     Parameters
     ----------
     window : int
@@ -63,9 +241,47 @@ class Rolling(Stream[List[float]]):
     min_periods : int, default 1
         The number of periods to wait before producing values from the aggregation
         function.
+
+    Attributes
+    ----------
+    n : int
+        The number of values seen since the last reset.
+    nan : int
+        The number of missing values seen since the last reset.
+    n_valid : int
+        The number of non-missing values in the window.
+    n_missing : int
+        The number of missing values in the window.
+    shift : float
+        The offset subtracted from values before accumulating them, used to
+        keep the running sums numerically stable.
+    shifted_sum : float
+        The sum of the shifted non-missing values in the window.
+    shifted_sq_sum : float
+        The sum of squares of the shifted non-missing values in the window.
+    minima : `deque`
+        The (step, value) pairs of the window that are candidates for the minimum,
+        in increasing order of value. Only maintained once `min()` is used.
+    maxima : `deque`
+        The (step, value) pairs of the window that are candidates for the maximum,
+        in decreasing order of value. Only maintained once `max()` is used.
     """
 
     generic_name = "rolling"
+    _state = Stream._state + (
+        "buffer",
+        "position",
+        "size",
+        "n",
+        "nan",
+        "n_valid",
+        "n_missing",
+        "shift",
+        "shifted_sum",
+        "shifted_sq_sum",
+        "minima",
+        "maxima",
+    )
 
     def __init__(self, window: int, min_periods: int = 1) -> None:
         super().__init__()
@@ -73,26 +289,109 @@ class Rolling(Stream[List[float]]):
         self.window = window
         self.min_periods = min_periods
 
+        self.buffer = np.full(window, np.nan)
+        self.track_min = False
+        self.track_max = False
+
+        self.reset_window()
+
+    def reset_window(self) -> None:
+        """Empties the window and its running statistics."""
+        self.buffer.fill(np.nan)
+        self.position = 0
+        self.size = 0
+
         self.n = 0
         self.nan = 0
 
-        self.history = []
+        self.n_valid = 0
+        self.n_missing = 0
+        self.shift = 0.0
+        self.shifted_sum = 0.0
+        self.shifted_sq_sum = 0.0
+        self.minima = deque()
+        self.maxima = deque()
 
     def forward(self) -> "List[float]":
-        node = self.inputs[0]
+        v = self.inputs[0].value
+        is_nan = v != v
 
         self.n += 1
-        self.nan += int(node.value != node.value)
-
-        self.history.insert(0, node.value)
+        self.nan += int(is_nan)
+
+        if self.size == self.window:
+            old = self.buffer[self.position]
+            if old == old:
+                old -= self.shift
+                self.n_valid -= 1
+                self.shifted_sum -= old
+                self.shifted_sq_sum -= old * old
+            else:
+                self.n_missing -= 1
+        else:
+            self.size += 1
+
+        self.buffer[self.position] = v
+        self.position = (self.position + 1) % self.window
+
+        if is_nan:
+            self.n_missing += 1
+        else:
+            if self.n_valid == 0:
+                self.shift = v
+                self.shifted_sum = 0.0
+                self.shifted_sq_sum = 0.0
+            d = v - self.shift
+            self.n_valid += 1
+            self.shifted_sum += d
+            self.shifted_sq_sum += d * d
+
+            if self.track_min:
+                while self.minima and self.minima[-1][1] >= v:
+                    self.minima.pop()
+                self.minima.append((self.n, v))
+            if self.track_max:
+                while self.maxima and self.maxima[-1][1] <= v:
+                    self.maxima.pop()
+                self.maxima.append((self.n, v))
+
+        expired = self.n - self.window
+        while self.minima and self.minima[0][0] <= expired:
+            self.minima.popleft()
+        while self.maxima and self.maxima[0][0] <= expired:
+            self.maxima.popleft()
+
+        # Resynchronize the running sums once per window to bound the
+        # accumulated floating point error.
+        if self.n % self.window == 0:
+            self.resync()
 
-        if len(self.history) > self.window:
-            self.history.pop()
         return self.history
 
+    def resync(self) -> None:
+        """Recomputes the running sums from the values in the window."""
+        values = self.buffer[~np.isnan(self.buffer)]
+        if len(values) > 0:
+            self.shift = float(values.mean())
+            d = values - self.shift
+            self.shifted_sum = float(d.sum())
+            self.shifted_sq_sum = float(d @ d)
+
+    @property
+    def history(self) -> "List[float]":
+        """The values in the window ordered from newest to oldest. (`List[float]`, read-only)"""
+        index = (self.position - 1 - np.arange(self.size)) % self.window
+        return self.buffer[index].tolist()
+
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        # Windows are ordered from newest to oldest, as in step mode, and padded
+        # with NaN until the window is full.
+        padded = np.concatenate([np.full(self.window - 1, np.nan), values.astype(float)])
+        return sliding_window_view(padded, self.window)[:, ::-1]
+
     def agg(self, func: "Callable[[List[float]], float]") -> "Stream[float]":
         """Computes an aggregation of a rolling window of values.
 
@@ -126,8 +425,7 @@ class Rolling(Stream[List[float]]):
         `Stream[float]`
             A rolling sum stream.
         """
-        func = np.nansum if self.min_periods < self.window else np.sum
-        return self.agg(func).astype("float")
+        return RollingSum(skip_na=self.min_periods < self.window)(self).astype("float")
 
     def mean(self) -> "Stream[float]":
         """Computes a rolling mean from the underlying stream.
@@ -137,8 +435,7 @@ class Rolling(Stream[List[float]]):
         `Stream[float]`
             A rolling mean stream.
         """
-        func = np.nanmean if self.min_periods < self.window else np.mean
-        return self.agg(func).astype("float")
+        return RollingMean(skip_na=self.min_periods < self.window)(self).astype("float")
 
     def var(self) -> "Stream[float]":
         """Computes a rolling variance from the underlying stream.
@@ -148,15 +445,7 @@ class Rolling(Stream[List[float]]):
         `Stream[float]`
             A rolling variance stream.
         """
-
-        def func1(x):
-            return np.nanvar(x, ddof=1)
-
-        def func2(x):
-            return np.var(x, ddof=1)
-
-        func = func1 if self.min_periods < self.window else func2
-        return self.agg(func).astype("float")
+        return RollingVar(skip_na=self.min_periods < self.window)(self).astype("float")
 
     def median(self) -> "Stream[float]":
         """Computes a rolling median from the underlying stream.
@@ -187,8 +476,8 @@ class Rolling(Stream[List[float]]):
         `Stream[float]`
             A rolling minimum stream.
         """
-        func = np.nanmin if self.min_periods < self.window else np.min
-        return self.agg(func).astype("float")
+        self.track_min = True
+        return RollingMin(skip_na=self.min_periods < self.window)(self).astype("float")
 
     def max(self) -> "Stream[float]":
         """Computes a rolling maximum from the underlying stream.
@@ -198,13 +487,11 @@ class Rolling(Stream[List[float]]):
         `Stream[float]`
             A rolling maximum stream.
         """
-        func = np.nanmax if self.min_periods < self.window else np.max
-        return self.agg(func).astype("float")
+        self.track_max = True
+        return RollingMax(skip_na=self.min_periods < self.window)(self).astype("float")
 
     def reset(self) -> None:
-        self.n = 0
-        self.nan = 0
-        self.history = []
+        self.reset_window()
         super().reset()
 
 
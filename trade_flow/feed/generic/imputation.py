@@ -11,6 +11,7 @@ class ForwardFill(Stream[T]):
     """A stream operator that computes the forward fill imputation of a stream."""
 
     generic_name = "ffill"
+    _state = Stream._state + ("previous",)
 
     def __init__(self) -> None:
         super().__init__()
@@ -25,6 +26,16 @@ class ForwardFill(Stream[T]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        taken = np.isfinite(values)
+        # A non-finite value directly after a zero is carried forward as well,
+        # since zero does not count as a previous value in `forward`.
+        taken[1:] |= values[:-1] == 0
+        if len(taken) > 0:
+            taken[0] = True
+        index = np.maximum.accumulate(np.where(taken, np.arange(len(values)), 0))
+        return values[index]
+
 
 class FillNa(Stream[T]):
     """A stream operator that computes the padded imputation of a stream.
@@ -49,3 +60,6 @@ class FillNa(Stream[T]):
 
     def has_next(self) -> bool:
         return True
+
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        return np.where(np.isnan(values), self.fill_value, values)
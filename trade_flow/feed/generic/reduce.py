@@ -31,6 +31,11 @@ class Aggregate(Stream[T]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, *columns: "np.ndarray") -> "np.ndarray":
+        if self.func not in (np.sum, np.min, np.max, np.prod, np.mean):
+            raise NotImplementedError()
+        return self.func(np.vstack(columns), axis=0)
+
 
 class Reduce(Stream[list]):
     """A stream for reducing multiple streams of the same type.
@@ -16,6 +16,8 @@ class WarmUp(Stream[T]):
         Number of periods to warm up.
     """
 
+    _state = Stream._state + ("count",)
+
     def __init__(self, periods: int) -> None:
         super().__init__()
         self.count = 0
@@ -31,6 +33,11 @@ class WarmUp(Stream[T]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        output = values.astype(float)
+        output[: self.periods] = np.nan
+        return output
+
     def reset(self) -> None:
         self.count = 0
 
@@ -0,0 +1,356 @@
+import json
+import time
+import tracemalloc
+
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, TypeVar
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from trade_flow.feed.base import Stream
+
+
+T = TypeVar("T")
+
+
+class LatencyHistogram(object):
+    """A fixed-size histogram of latencies measured in nanoseconds.
+
+    Latencies are counted in log-linear buckets: every power of two range is
+    split into `n_sub_buckets` buckets of equal width, and latencies below
+    `2 * n_sub_buckets` nanoseconds get a bucket each. Recording a sample is
+    therefore constant time and the memory used does not grow with the number
+    of samples. Percentiles are reported as the upper bound of the bucket they
+    fall in, which is exact below `2 * n_sub_buckets` nanoseconds and above the
+    exact value by at most `1 / n_sub_buckets` of it otherwise. The exact count,
+    total, minimum and maximum are kept as well.
+
+    Attributes
+    ----------
+    buckets : `np.ndarray`
+        The number of samples in each bucket.
+    count : int
+        The number of samples recorded.
+    total : int
+        The sum of all the samples recorded, in nanoseconds.
+    """
+
+    n_sub_buckets = 8
+    # Enough buckets for any latency below 2 ** 63 nanoseconds.
+    n_buckets = 61 * n_sub_buckets
+
+    def __init__(self) -> None:
+        self.buckets = np.zeros(self.n_buckets, dtype=np.int64)
+        self.reset()
+
+    @classmethod
+    def bucket(cls, latency: int) -> int:
+        """Gets the bucket of a latency.
+
+        Parameters
+        ----------
+        latency : int
+            The latency, in nanoseconds.
+
+        Returns
+        -------
+        int
+            The index of the bucket counting `latency`.
+        """
+        shift = max(0, latency.bit_length() - cls.n_sub_buckets.bit_length())
+        return min(shift * cls.n_sub_buckets + (latency >> shift), cls.n_buckets - 1)
+
+    @classmethod
+    def upper_bound(cls, bucket: int) -> int:
+        """Gets the largest latency counted in a bucket.
+
+        Parameters
+        ----------
+        bucket : int
+            The index of the bucket.
+
+        Returns
+        -------
+        int
+            The largest latency of the bucket, in nanoseconds.
+        """
+        shift = max(0, bucket // cls.n_sub_buckets - 1)
+        return ((bucket - shift * cls.n_sub_buckets + 1) << shift) - 1
+
+    def record(self, latency: int) -> None:
+        """Records a latency.
+
+        Parameters
+        ----------
+        latency : int
+            The latency to record, in nanoseconds.
+        """
+        self.buckets[self.bucket(latency)] += 1
+        self.count += 1
+        self.total += latency
+        if latency < self.minimum:
+            self.minimum = latency
+        if latency > self.maximum:
+            self.maximum = latency
+
+    @property
+    def mean(self) -> "Optional[float]":
+        """The mean latency in nanoseconds, None without samples. (float, read-only)"""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q: float) -> "Optional[int]":
+        """Gets an upper bound of the `q`-th percentile of the latencies.
+
+        Parameters
+        ----------
+        q : float
+            The percentile to compute, between 0 and 100.
+
+        Returns
+        -------
+        int, optional
+            The upper bound of the bucket the percentile falls in, capped by the
+            largest latency recorded, in nanoseconds. None if no latency was
+            recorded.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, int(np.ceil(self.count * q / 100)))
+        i = int(np.searchsorted(np.cumsum(self.buckets), rank))
+        return min(self.upper_bound(i), self.maximum)
+
+    def to_dict(self) -> "Dict[str, Optional[float]]":
+        """Summarizes the histogram.
+
+        Returns
+        -------
+        `Dict[str, Optional[float]]`
+            The count, mean, minimum, maximum and the 50th, 90th and 99th
+            percentiles of the latencies, in nanoseconds. The percentiles are
+            upper bounds, see `percentile`. Everything but the count is None if
+            no latency was recorded.
+        """
+        empty = self.count == 0
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": None if empty else self.minimum,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": None if empty else self.maximum,
+        }
+
+    def reset(self) -> None:
+        """Resets the histogram."""
+        self.buckets[:] = 0
+        self.count = 0
+        self.total = 0
+        self.minimum = np.iinfo(np.int64).max
+        self.maximum = 0
+
+
+class NodeProfile(object):
+    """The measurements of a single stream collected by a `Profiler`.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stream.
+    cls : str
+        The class name of the stream.
+    """
+
+    def __init__(self, name: str, cls: str) -> None:
+        self.name = name
+        self.cls = cls
+        self.latency = LatencyHistogram()
+        self.allocated = 0
+
+    def to_dict(self) -> dict:
+        """Summarizes the measurements of the stream.
+
+        Returns
+        -------
+        dict
+            The name and class of the stream, its call count, its cumulative,
+            mean and 99th percentile `forward()` time in nanoseconds and, when
+            traced, the bytes allocated by its calls. The mean and percentile
+            are None for streams that were never called.
+        """
+        return {
+            "name": self.name,
+            "class": self.cls,
+            "calls": self.latency.count,
+            "total": self.latency.total,
+            "mean": self.latency.mean,
+            "p99": self.latency.percentile(99),
+            "allocated": self.allocated,
+        }
+
+
+class Profiler(object):
+    """A profiler of the `forward()` calls of the streams in a feed.
+
+    The profiler wraps the `forward` method of every stream it is attached to
+    and removes the wrappers once it is detached, so streams that are not being
+    profiled run without any overhead.
+
+    Parameters
+    ----------
+    trace_allocations : bool, default False
+        Whether to measure the memory allocated by each call with `tracemalloc`.
+        This slows down every call considerably.
+
+    Attributes
+    ----------
+    profiles : `Dict[int, NodeProfile]`
+        The measurements of each profiled stream, keyed by stream id.
+    """
+
+    def __init__(self, trace_allocations: bool = False) -> None:
+        self.trace_allocations = trace_allocations
+        self.profiles = {}
+        self._streams = []
+        self._tracing = False
+
+    def attach(self, streams: "List[Stream]") -> None:
+        """Starts profiling the given streams.
+
+        Parameters
+        ----------
+        streams : `List[Stream]`
+            The streams to profile.
+        """
+        self.detach()
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        for s in streams:
+            if id(s) not in self.profiles:
+                self.profiles[id(s)] = NodeProfile(s.name, type(s).__name__)
+            s.forward = self._wrap(s.forward, self.profiles[id(s)])
+        self._streams = list(streams)
+
+    @property
+    def is_attached(self) -> bool:
+        """Whether the profiler is currently profiling any streams. (bool, read-only)"""
+        return len(self._streams) > 0
+
+    def detach(self) -> None:
+        """Stops profiling, restoring the original `forward` of every stream."""
+        for s in self._streams:
+            s.__dict__.pop("forward", None)
+        self._streams = []
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def _wrap(self, forward: "Callable[[], T]", profile: "NodeProfile") -> "Callable[[], T]":
+        record = profile.latency.record
+        clock = time.perf_counter_ns
+
+        if not self.trace_allocations:
+
+            def timed():
+                t = clock()
+                value = forward()
+                record(clock() - t)
+                return value
+
+            return timed
+
+        def traced():
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            t = clock()
+            value = forward()
+            record(clock() - t)
+            profile.allocated += tracemalloc.get_traced_memory()[1] - before
+            return value
+
+        return traced
+
+    def stats(self, sort_by: str = "total") -> "List[dict]":
+        """Gets the measurements of every profiled stream.
+
+        Parameters
+        ----------
+        sort_by : str, default "total"
+            The measurement to sort the streams by, in descending order.
+
+        Returns
+        -------
+        `List[dict]`
+            The summary of each stream, as given by `NodeProfile.to_dict`.
+        """
+        stats = [p.to_dict() for p in self.profiles.values()]
+        # Streams that were never called, without a mean or percentile, go last.
+        return sorted(
+            stats, key=lambda s: (s[sort_by] is not None, s[sort_by] or 0), reverse=True
+        )
+
+    def to_json(self, sort_by: str = "total", **kwargs) -> str:
+        """Exports the measurements as JSON.
+
+        Parameters
+        ----------
+        sort_by : str, default "total"
+            The measurement to sort the streams by, in descending order.
+        **kwargs : keyword arguments
+            Additional keyword arguments passed to `json.dumps`.
+
+        Returns
+        -------
+        str
+            A JSON list with the summary of each stream, with `null` for the
+            measurements of streams that were never called.
+        """
+        return json.dumps(self.stats(sort_by), **kwargs)
+
+    def to_table(self, sort_by: str = "total", limit: int = None) -> str:
+        """Exports the measurements as a text table, with times in microseconds.
+
+        Parameters
+        ----------
+        sort_by : str, default "total"
+            The measurement to sort the streams by, in descending order.
+        limit : int, optional
+            The maximum number of streams to include.
+
+        Returns
+        -------
+        str
+            The table of measurements.
+        """
+        stats = self.stats(sort_by)[:limit]
+        header = ["name", "class", "calls", "total (us)", "mean (us)", "p99 (us)"]
+        rows = [
+            [
+                s["name"],
+                s["class"],
+                str(s["calls"]),
+                f"{s['total'] / 1e3:.1f}",
+                f"{s['mean'] / 1e3:.2f}" if s["calls"] else "-",
+                f"{s['p99'] / 1e3:.2f}" if s["calls"] else "-",
+            ]
+            for s in stats
+        ]
+        if self.trace_allocations:
+            header += ["allocated (B)"]
+            for row, s in zip(rows, stats):
+                row += [str(s["allocated"])]
+
+        widths = [max(len(r[i]) for r in [header] + rows) for i in range(len(header))]
+        lines = [
+            "  ".join(v.ljust(w) if i < 2 else v.rjust(w) for i, (v, w) in enumerate(zip(r, widths)))
+            for r in [header] + rows
+        ]
+        lines.insert(1, "  ".join("-" * w for w in widths))
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """Clears the measurements."""
+        self.profiles = {}
+        if self.is_attached:
+            self.attach(self._streams)
@@ -32,6 +32,11 @@ class Apply(Stream[K]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        if not isinstance(self.func, np.ufunc):
+            raise NotImplementedError()
+        return self.func(values)
+
 
 class Lag(Stream[T]):
     """An operator stream that returns the lagged value of a given stream.
@@ -45,6 +50,7 @@ class Lag(Stream[T]):
     """
 
     generic_name = "lag"
+    _state = Stream._state + ("runs", "history")
 
     def __init__(self, lag: int = 1, dtype: str = None) -> None:
         super().__init__(dtype=dtype)
@@ -65,6 +71,13 @@ class Lag(Stream[T]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        if self.lag == 0:
+            return values
+        output = np.full(len(values), np.nan)
+        output[self.lag :] = values[: -self.lag]
+        return output
+
     def reset(self) -> None:
         self.runs = 0
         self.history = []
@@ -81,6 +94,8 @@ class Accumulator(Stream[T]):
         The data type of accumulated value.
     """
 
+    _state = Stream._state + ("past",)
+
     def __init__(self, func: "Callable[[T, T], T]", dtype: str = None) -> None:
         super().__init__(dtype)
         self.func = func
@@ -116,12 +131,16 @@ class Copy(Stream[T]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        return values
+
 
 class Freeze(Stream[T]):
     """A stream operator that freezes the value of a given stream and generates
     that value."""
 
     generic_name = "freeze"
+    _state = Stream._state + ("freeze_value",)
 
     def __init__(self) -> None:
         super().__init__()
@@ -136,6 +155,13 @@ class Freeze(Stream[T]):
     def has_next(self) -> bool:
         return True
 
+    def vectorize(self, values: "np.ndarray") -> "np.ndarray":
+        output = values.copy()
+        truthy = np.flatnonzero(values != 0)
+        if len(truthy) > 0:
+            output[truthy[0] :] = values[truthy[0]]
+        return output
+
     def reset(self) -> None:
         self.freeze_value = None
 
@@ -163,3 +189,8 @@ class BinOp(Stream[T]):
 
     def has_next(self) -> bool:
         return True
+
+    def vectorize(self, left: "np.ndarray", right: "np.ndarray") -> "np.ndarray":
+        if not isinstance(self.op, np.ufunc):
+            raise NotImplementedError()
+        return self.op(left, right)